@@ -0,0 +1,82 @@
+"""add video_metrics table with precomputed, indexed ranking metrics
+
+Revision ID: 0a38ce3d4527
+Revises: e7a1c3d4f2b8
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0a38ce3d4527"
+down_revision = "e7a1c3d4f2b8"
+branch_labels = None
+depends_on = None
+
+RANK_INDEXES = {
+    "ix_video_metrics_channel_views": "view_count",
+    "ix_video_metrics_channel_views_per_day": "views_per_day",
+    "ix_video_metrics_channel_views_last_30d": "views_last_30d",
+    "ix_video_metrics_channel_watch_time": "estimated_minutes_watched",
+    "ix_video_metrics_channel_revenue": "estimated_revenue",
+    "ix_video_metrics_channel_rpm": "rpm",
+    "ix_video_metrics_channel_ctr": "click_through_rate",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "video_metrics",
+        sa.Column("video_id", sa.Uuid(), sa.ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("channel_id", sa.Uuid(), sa.ForeignKey("channels.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("view_count", sa.BigInteger(), nullable=False),
+        sa.Column("like_count", sa.BigInteger(), nullable=False),
+        sa.Column("comment_count", sa.BigInteger(), nullable=False),
+        sa.Column("views_per_day", sa.Float(), nullable=False),
+        sa.Column("views_last_30d", sa.BigInteger(), nullable=True),
+        sa.Column("estimated_minutes_watched", sa.Float(), nullable=True),
+        sa.Column("estimated_revenue", sa.Float(), nullable=True),
+        sa.Column("rpm", sa.Float(), nullable=True),
+        sa.Column("click_through_rate", sa.Float(), nullable=True),
+        sa.Column("impressions", sa.Integer(), nullable=True),
+        sa.Column("average_view_duration_seconds", sa.Float(), nullable=True),
+        sa.Column("average_view_percentage", sa.Float(), nullable=True),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    for name, column in RANK_INDEXES.items():
+        op.create_index(name, "video_metrics", ["channel_id", column])
+
+    # backfill from the latest snapshots so autopsy works before the next sync runs.
+    # views_last_30d stays null until a sync fetches it from the analytics api
+    op.execute(
+        """
+        INSERT INTO video_metrics (
+            video_id, channel_id, view_count, like_count, comment_count, views_per_day,
+            estimated_minutes_watched, estimated_revenue, rpm, click_through_rate, impressions,
+            average_view_duration_seconds, average_view_percentage, computed_at
+        )
+        SELECT
+            v.id, v.channel_id, s.view_count, s.like_count, s.comment_count,
+            s.view_count::float / greatest(current_date - v.published_at::date, 1),
+            a.estimated_minutes_watched, a.estimated_revenue, a.rpm, a.click_through_rate,
+            a.impressions, a.average_view_duration_seconds,
+            coalesce(
+                a.average_view_percentage,
+                nullif(a.average_view_duration_seconds, 0) / nullif(v.duration_seconds, 0) * 100
+            ),
+            now()
+        FROM videos v
+        JOIN (
+            SELECT DISTINCT ON (video_id) video_id, view_count, like_count, comment_count
+            FROM video_stats ORDER BY video_id, fetched_at DESC
+        ) s ON s.video_id = v.id
+        LEFT JOIN (
+            SELECT DISTINCT ON (video_id) *
+            FROM video_analytics ORDER BY video_id, date DESC
+        ) a ON a.video_id = v.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("video_metrics")
@@ -0,0 +1,23 @@
+"""add indexes backing the video list filters
+
+Revision ID: 5f2d9b7c1e64
+Revises: 8c536e302836
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+revision = "5f2d9b7c1e64"
+down_revision = "8c536e302836"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_videos_channel_published", "videos", ["channel_id", "published_at"])
+    op.create_index("ix_videos_tags", "videos", ["tags"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_videos_tags", table_name="videos")
+    op.drop_index("ix_videos_channel_published", table_name="videos")
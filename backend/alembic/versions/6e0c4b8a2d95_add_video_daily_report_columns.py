@@ -0,0 +1,32 @@
+"""add reporting api columns to video_daily_analytics
+
+Revision ID: 6e0c4b8a2d95
+Revises: b93d5e2a7f16
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "6e0c4b8a2d95"
+down_revision = "b93d5e2a7f16"
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ("watch_time_minutes", sa.Float()),
+    ("shares", sa.Integer()),
+    ("subscribers_gained", sa.Integer()),
+    ("subscribers_lost", sa.Integer()),
+    ("estimated_revenue", sa.Float()),
+]
+
+
+def upgrade() -> None:
+    for name, type_ in COLUMNS:
+        op.add_column("video_daily_analytics", sa.Column(name, type_, nullable=True))
+
+
+def downgrade() -> None:
+    for name, _ in reversed(COLUMNS):
+        op.drop_column("video_daily_analytics", name)
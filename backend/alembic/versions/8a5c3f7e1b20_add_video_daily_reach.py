@@ -0,0 +1,40 @@
+"""add video_daily_reach + processed_reports ledger for incremental reach ingestion
+
+Revision ID: 8a5c3f7e1b20
+Revises: d2f8a61c9e47
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "8a5c3f7e1b20"
+down_revision = "d2f8a61c9e47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "video_daily_reach",
+        sa.Column("video_id", sa.Uuid(), sa.ForeignKey("videos.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("impressions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("click_through_rate", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("video_id", "date"),
+    )
+    op.create_table(
+        "processed_reports",
+        sa.Column("report_id", sa.String(255), primary_key=True),
+        sa.Column("job_id", sa.String(255), nullable=False),
+        sa.Column("channel_id", sa.Uuid(), sa.ForeignKey("channels.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("create_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_processed_reports_job_created", "processed_reports", ["job_id", "create_time"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_processed_reports_job_created", table_name="processed_reports")
+    op.drop_table("processed_reports")
+    op.drop_table("video_daily_reach")
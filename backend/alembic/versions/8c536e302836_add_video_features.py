@@ -0,0 +1,119 @@
+"""add video_features table for precomputed title + metadata features
+
+Revision ID: 8c536e302836
+Revises: 0a38ce3d4527
+Create Date: 2026-10-19
+
+"""
+import hashlib
+import re
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "8c536e302836"
+down_revision = "0a38ce3d4527"
+branch_labels = None
+depends_on = None
+
+# rows per fetch + insert in the backfill — never more than this many videos held at once
+BACKFILL_BATCH = 1_000
+
+# ── frozen copy of app/utils/title_features as of this revision ──────────────
+# the migration has to keep producing these exact rows however that module changes
+# later, so it carries its own extractor instead of importing the app's
+
+_DURATION_BUCKET_BOUNDS = [
+    (180, "< 3 min"), (480, "3–7 min"), (600, "8–9 min"), (720, "10–11 min"), (900, "12–14 min"),
+]
+_STOP_WORDS = {
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for",
+    "of", "with", "by", "is", "it", "this", "that", "i", "my", "you",
+    "your", "we", "me", "be", "do", "did", "was", "are", "has", "have",
+    "had", "not", "no", "so", "if", "as", "from", "up", "out", "am",
+    "what", "when", "how", "who", "all", "get", "got", "its", "im",
+    "just", "more", "about", "than", "into", "they", "them", "will",
+    "can", "her", "his", "him", "she", "he", "us", "vs", "was", "were",
+}
+_TITLE_SCANNER = re.compile(r"(?P<word>[\w']+)|(?P<mark>[?!:(\[{])")
+_ASCII_CAPS = re.compile(r"[A-Z]{2,}")
+_ASCII_TOKEN = re.compile(r"[a-z']{3,}")
+
+
+def _duration_bucket(secs: int | None) -> str:
+    if not secs:
+        return "Unknown"
+    for upper, label in _DURATION_BUCKET_BOUNDS:
+        if secs < upper:
+            return label
+    return "15+ min"
+
+
+def _title_features(title: str) -> dict:
+    has_number = has_all_caps = False
+    marks: set[str] = set()
+    tokens: list[str] = []
+    for match in _TITLE_SCANNER.finditer(title):
+        mark = match.group("mark")
+        if mark:
+            marks.add(mark)
+            continue
+        word = match.group("word")
+        if not has_number and any(c.isdigit() for c in word):
+            has_number = True
+        if not has_all_caps and any(_ASCII_CAPS.fullmatch(part) for part in word.split("'")):
+            has_all_caps = True
+        lowered = word.lower().strip("'")
+        if _ASCII_TOKEN.fullmatch(lowered) and lowered not in _STOP_WORDS:
+            tokens.append(lowered)
+    return {
+        "title_hash": hashlib.sha1(title.encode()).hexdigest(),
+        "title_length": len(title),
+        "word_count": len(title.split()),
+        "has_number": has_number,
+        "has_question": "?" in marks,
+        "has_exclamation": "!" in marks,
+        "has_all_caps": has_all_caps,
+        "has_colon": ":" in marks,
+        "has_brackets": bool(marks & {"(", "[", "{"}),
+        "title_tokens": tokens,
+    }
+
+
+def upgrade() -> None:
+    video_features = op.create_table(
+        "video_features",
+        sa.Column("video_id", sa.Uuid(), sa.ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("title_hash", sa.String(40), nullable=False),
+        sa.Column("title_length", sa.Integer(), nullable=False),
+        sa.Column("word_count", sa.Integer(), nullable=False),
+        sa.Column("has_number", sa.Boolean(), nullable=False),
+        sa.Column("has_question", sa.Boolean(), nullable=False),
+        sa.Column("has_exclamation", sa.Boolean(), nullable=False),
+        sa.Column("has_all_caps", sa.Boolean(), nullable=False),
+        sa.Column("has_colon", sa.Boolean(), nullable=False),
+        sa.Column("has_brackets", sa.Boolean(), nullable=False),
+        sa.Column("title_tokens", postgresql.ARRAY(sa.Text()), nullable=False),
+        sa.Column("duration_bucket", sa.String(20), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+    # backfill existing videos a batch at a time, keyset-paged on the primary key — sync
+    # keeps the table current after this. (not a yield_per cursor: under asyncpg it stays
+    # open until the migration transaction ends, and blocks the later DDL on videos)
+    bind = op.get_bind()
+    batch_query = sa.text(
+        "SELECT id, title, duration_seconds FROM videos WHERE id > :after ORDER BY id LIMIT :batch"
+    )
+    after = "00000000-0000-0000-0000-000000000000"
+    while batch := bind.execute(batch_query, {"after": after, "batch": BACKFILL_BATCH}).all():
+        op.bulk_insert(video_features, [
+            {"video_id": video_id, "duration_bucket": _duration_bucket(duration), **_title_features(title)}
+            for video_id, title, duration in batch
+        ])
+        after = batch[-1].id
+
+
+def downgrade() -> None:
+    op.drop_table("video_features")
@@ -0,0 +1,45 @@
+"""add engagement + comment rate to video_metrics and index the derived sort columns
+
+Revision ID: a4e1f7c9d2b3
+Revises: 5f2d9b7c1e64
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "a4e1f7c9d2b3"
+down_revision = "5f2d9b7c1e64"
+branch_labels = None
+depends_on = None
+
+SORT_INDEXES = {
+    "ix_video_metrics_channel_engagement": "engagement_rate",
+    "ix_video_metrics_channel_comment_rate": "comment_rate",
+    "ix_video_metrics_channel_avg_view_pct": "average_view_percentage",
+}
+
+
+def upgrade() -> None:
+    op.add_column("video_metrics", sa.Column("engagement_rate", sa.Float(), nullable=False, server_default="0"))
+    op.add_column("video_metrics", sa.Column("comment_rate", sa.Float(), nullable=False, server_default="0"))
+
+    # backfill from the counters already on the row — the next sync keeps them current
+    op.execute(
+        """
+        UPDATE video_metrics SET
+            engagement_rate = like_count::float / view_count * 100,
+            comment_rate = comment_count::float / view_count * 100
+        WHERE view_count > 0
+        """
+    )
+
+    for name, column in SORT_INDEXES.items():
+        op.create_index(name, "video_metrics", ["channel_id", column])
+
+
+def downgrade() -> None:
+    for name in SORT_INDEXES:
+        op.drop_index(name, table_name="video_metrics")
+    op.drop_column("video_metrics", "comment_rate")
+    op.drop_column("video_metrics", "engagement_rate")
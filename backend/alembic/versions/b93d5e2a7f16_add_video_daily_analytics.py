@@ -0,0 +1,31 @@
+"""add video_daily_analytics table for stored per-video daily history
+
+Revision ID: b93d5e2a7f16
+Revises: c71e3a9f0d58
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b93d5e2a7f16"
+down_revision = "c71e3a9f0d58"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "video_daily_analytics",
+        sa.Column("video_id", sa.Uuid(), sa.ForeignKey("videos.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("likes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("comments", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("video_id", "date"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("video_daily_analytics")
@@ -0,0 +1,38 @@
+"""desc nulls last indexes for the nullable video_metrics sort columns
+
+Revision ID: c2d7e9a1f3b6
+Revises: f4b7a2c9e318
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c2d7e9a1f3b6"
+down_revision = "f4b7a2c9e318"
+branch_labels = None
+depends_on = None
+
+# the video list sorts nulls last both ways. the (channel_id, column) indexes already
+# serve asc nulls last; walked backwards they give desc nulls *first*, so desc on a
+# nullable column needs an index of its own
+COLUMNS = {
+    "revenue": "estimated_revenue",
+    "rpm": "rpm",
+    "avg_view_pct": "average_view_percentage",
+    "ctr_last_28d": "ctr_last_28d",
+}
+
+
+def upgrade() -> None:
+    for name, column in COLUMNS.items():
+        op.create_index(
+            f"ix_video_metrics_channel_{name}_desc",
+            "video_metrics",
+            ["channel_id", sa.text(f"{column} DESC NULLS LAST")],
+        )
+
+
+def downgrade() -> None:
+    for name in COLUMNS:
+        op.drop_index(f"ix_video_metrics_channel_{name}_desc", table_name="video_metrics")
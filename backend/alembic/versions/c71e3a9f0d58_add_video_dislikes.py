@@ -0,0 +1,28 @@
+"""add video_dislikes table for prefetched return youtube dislike counts
+
+Revision ID: c71e3a9f0d58
+Revises: a4e1f7c9d2b3
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c71e3a9f0d58"
+down_revision = "a4e1f7c9d2b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "video_dislikes",
+        sa.Column("youtube_video_id", sa.String(255), primary_key=True),
+        sa.Column("dislikes", sa.BigInteger(), nullable=False),
+        sa.Column("likes", sa.BigInteger(), nullable=True),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("video_dislikes")
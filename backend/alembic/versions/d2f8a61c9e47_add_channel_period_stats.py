@@ -0,0 +1,67 @@
+"""add channel_period_stats weekly/monthly rollups for the charts page
+
+Revision ID: d2f8a61c9e47
+Revises: 6e0c4b8a2d95
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d2f8a61c9e47"
+down_revision = "6e0c4b8a2d95"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "channel_period_stats",
+        sa.Column("channel_id", sa.Uuid(), sa.ForeignKey("channels.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("granularity", sa.String(10), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("views", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("likes", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("comments", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("subscribers_gained", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("impressions", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("ctr_weighted", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("watch_time_minutes", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("avg_view_duration_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("avg_view_duration_n", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("channel_id", "granularity", "period_start"),
+    )
+
+    # backfill from the daily rows already stored — later syncs keep it current
+    for granularity, unit in (("weekly", "week"), ("monthly", "month")):
+        op.execute(
+            f"""
+            INSERT INTO channel_period_stats (
+                channel_id, granularity, period_start, views, likes, comments,
+                subscribers_gained, impressions, ctr_weighted, watch_time_minutes, revenue,
+                avg_view_duration_sum, avg_view_duration_n
+            )
+            SELECT
+                channel_id,
+                '{granularity}',
+                date_trunc('{unit}', date)::date,
+                sum(coalesce(views, 0)),
+                sum(coalesce(likes, 0)),
+                sum(coalesce(comments, 0)),
+                sum(coalesce(subscribers_gained, 0)),
+                sum(coalesce(impressions, 0)),
+                sum(coalesce(click_through_rate, 0) * coalesce(impressions, 0)),
+                sum(coalesce(estimated_minutes_watched, 0)),
+                sum(coalesce(estimated_revenue, 0)),
+                sum(coalesce(average_view_duration_seconds, 0)),
+                count(average_view_duration_seconds)
+            FROM channel_daily_stats
+            GROUP BY channel_id, date_trunc('{unit}', date)::date
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("channel_period_stats")
@@ -0,0 +1,34 @@
+"""brin index on video_daily_reach.date + windowed ctr columns on video_metrics
+
+Revision ID: f4b7a2c9e318
+Revises: 8a5c3f7e1b20
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "f4b7a2c9e318"
+down_revision = "8a5c3f7e1b20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_video_daily_reach_date_brin", "video_daily_reach", ["date"], postgresql_using="brin"
+    )
+    op.add_column("video_metrics", sa.Column("ctr_first_7d", sa.Float(), nullable=True))
+    op.add_column("video_metrics", sa.Column("ctr_last_28d", sa.Float(), nullable=True))
+    op.add_column("video_metrics", sa.Column("impressions_last_28d", sa.BigInteger(), nullable=True))
+    op.create_index(
+        "ix_video_metrics_channel_ctr_last_28d", "video_metrics", ["channel_id", "ctr_last_28d"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_video_metrics_channel_ctr_last_28d", table_name="video_metrics")
+    op.drop_column("video_metrics", "impressions_last_28d")
+    op.drop_column("video_metrics", "ctr_last_28d")
+    op.drop_column("video_metrics", "ctr_first_7d")
+    op.drop_index("ix_video_daily_reach_date_brin", table_name="video_daily_reach")
@@ -52,16 +52,15 @@ async def trigger_sync(
     # bust all caches for this channel so fresh data shows immediately after sync
     redis = request.app.state.redis
     channel_id = str(channel.id)
-    # delete autopsy cache
-    for pct in [5, 10, 20, 25]:
-        for ws in [10, 50, 100, 150, 200]:
-            await redis.delete(f"autopsy:{channel_id}:{ws}:{pct}")
+    # delete autopsy cache (every window size / tier / rank_by combo)
+    async for key in redis.scan_iter(f"autopsy:{channel_id}:*"):
+        await redis.delete(key)
     # delete video list cache pages (covers common page/sort combos)
     async for key in redis.scan_iter(f"vlist:{channel_id}:*"):
         await redis.delete(key)
-    # delete charts cache (all granularities)
-    for granularity in ["daily", "weekly", "monthly"]:
-        await redis.delete(f"charts:{channel_id}:{granularity}")
+    # delete charts cache (every granularity + year block)
+    async for key in redis.scan_iter(f"charts:{channel_id}:*"):
+        await redis.delete(key)
 
     return {
         "ok": True,
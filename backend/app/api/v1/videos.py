@@ -1,36 +1,42 @@
-import asyncio
 import json
-from datetime import UTC, date, datetime, timedelta
+from datetime import date, datetime
 from uuid import UUID
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy import asc, delete, desc, func, select
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.database import get_db
 from app.models.channels import Channel
-from app.models.stats import VideoAnalytics, VideoStats
+from app.models.stats import VideoAnalytics, VideoMetrics, VideoStats
 from app.models.users import User
 from app.models.videos import Video, VideoComment
-from app.services import youtube as yt
+from app.services.comments import (
+    cached_comments,
+    is_fresh,
+    refresh_comments,
+    schedule_comments_refresh,
+    wait_for_refresh,
+)
+from app.services.dislikes import get_dislikes
+from app.services.export import EXPORT_FORMATS, stream_export
+from app.services.reach import REACH_WINDOWS, video_reach
+from app.services.stats_history import (
+    DEFAULT_MAX_POINTS,
+    MAX_POINTS_LIMIT,
+    latest_stats,
+    stats_history,
+)
+from app.services.video_history import refresh_video_history, stored_video_history
 from app.utils.dependencies import get_current_user
+from app.utils.pagination import TOTAL_MODES, encode_cursor, keyset_after, keyset_order
 from app.utils.security import decrypt_token
+from app.utils.video_filters import SORT_COLUMNS, video_filter_clauses
 
 router = APIRouter(prefix="/videos", tags=["videos"])
 
-SORT_COLUMNS = {
-    "views": VideoStats.view_count,
-    "likes": VideoStats.like_count,
-    "comments": VideoStats.comment_count,
-    "published_at": Video.published_at,
-    "duration": Video.duration_seconds,
-    "title": Video.title,
-    "revenue": VideoAnalytics.estimated_revenue,
-    "rpm": VideoAnalytics.rpm,
-}
-
 
 @router.get("")
 async def list_videos(
@@ -40,10 +46,26 @@ async def list_videos(
     order: str = Query(default="desc", enum=["asc", "desc"]),
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
+    total: str | None = Query(default=None, enum=TOTAL_MODES),
+    is_short: bool | None = None,
+    published_after: datetime | None = None,
+    published_before: datetime | None = None,
+    min_duration: int | None = Query(default=None, ge=0, description="seconds"),
+    max_duration: int | None = Query(default=None, ge=0, description="seconds"),
+    category_id: str | None = None,
+    tags: str | None = Query(default=None, description="comma-separated, videos must have all of them"),
+    min_views: int | None = Query(default=None, ge=0),
+    min_revenue: float | None = Query(default=None, ge=0),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """return a paginated list of videos for a channel, with sorting."""
+    """return a paginated list of videos for a channel, with sorting and filters.
+    pass the previous page's next_cursor to keep scrolling — that seeks straight to the
+    spot instead of making postgres walk and discard every earlier row like page does.
+    total defaults to an exact count on the first page and is skipped once a cursor is
+    given; ask for "estimate" to get the channel's video count without a query (only
+    without filters — a filtered list always counts exactly)."""
     # make sure this channel belongs to the logged-in user
     channel = await db.get(Channel, channel_id)
     if not channel or channel.user_id != current_user.id:
@@ -51,65 +73,109 @@ async def list_videos(
 
     # check redis — the join query is expensive and this data only changes on sync
     redis = request.app.state.redis
-    cache_key = f"vlist:{channel_id}:{sort_by}:{order}:{page}:{per_page}"
+    filters = {
+        key: value
+        for key, value in {
+            "is_short": is_short,
+            "published_after": published_after,
+            "published_before": published_before,
+            "min_duration": min_duration,
+            "max_duration": max_duration,
+            "category_id": category_id,
+            "tags": [t.strip() for t in tags.split(",") if t.strip()] if tags else None,
+            "min_views": min_views,
+            "min_revenue": min_revenue,
+        }.items()
+        if value is not None
+    }
+    total_mode = total or ("none" if cursor else "exact")
+    if filters and total_mode == "estimate":
+        total_mode = "exact"
+    filter_key = json.dumps(filters, sort_keys=True, default=str)
+    cache_key = f"vlist:{channel_id}:{sort_by}:{order}:{page}:{per_page}:{cursor}:{total_mode}:{filter_key}"
     cached = await redis.get(cache_key)
     if cached:
         return json.loads(cached)
 
-    # get the latest stats snapshot per video using a subquery
-    latest_stats = (
-        select(
-            VideoStats.video_id,
-            func.max(VideoStats.fetched_at).label("latest_fetch"),
-        )
-        .group_by(VideoStats.video_id)
-        .subquery()
-    )
-
-    # get the most recent analytics row per video (outer join — not all videos have data yet)
-    latest_analytics = (
-        select(
-            VideoAnalytics.video_id,
-            func.max(VideoAnalytics.date).label("latest_date"),
-        )
-        .group_by(VideoAnalytics.video_id)
-        .subquery()
-    )
-
+    # every video in the channel, with its video_metrics row outer-joined — a video
+    # synced before its metrics were computed (or whose metrics step failed) still
+    # lists, it just sorts last on the metric columns. latest stats and analytics are
+    # then read for just the page's videos
     sort_col = SORT_COLUMNS[sort_by]
-    direction = desc if order == "desc" else asc
-
+    # a metric column is null for those unjoined videos whatever its own NOT NULL says
+    nullable = None if sort_col.class_ is Video else True
     query = (
-        select(Video, VideoStats, VideoAnalytics)
-        .join(latest_stats, latest_stats.c.video_id == Video.id)
-        .join(
-            VideoStats,
-            (VideoStats.video_id == Video.id)
-            & (VideoStats.fetched_at == latest_stats.c.latest_fetch),
-        )
-        .outerjoin(latest_analytics, latest_analytics.c.video_id == Video.id)
-        .outerjoin(
-            VideoAnalytics,
-            (VideoAnalytics.video_id == Video.id)
-            & (VideoAnalytics.date == latest_analytics.c.latest_date),
-        )
-        .where(Video.channel_id == channel_id)
-        .order_by(direction(sort_col))
-        .offset((page - 1) * per_page)
-        .limit(per_page)
+        select(Video, VideoMetrics, sort_col.label("sort_key"))
+        .outerjoin(VideoMetrics, VideoMetrics.video_id == Video.id)
+        .where(Video.channel_id == channel_id, *video_filter_clauses(**filters))
+        .order_by(*keyset_order(sort_col, Video.id, order, nullable))
+        # one extra row tells us whether there's a next page without counting
+        .limit(per_page + 1)
     )
+    if cursor:
+        try:
+            query = query.where(keyset_after(sort_col, Video.id, cursor, sort_by, order, filters, nullable))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        query = query.offset((page - 1) * per_page)
 
     result = await db.execute(query)
     rows = result.all()
-
-    # get total count for pagination info
-    count_query = select(func.count(Video.id)).where(Video.channel_id == channel_id)
-    total = (await db.execute(count_query)).scalar_one()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    # newest snapshot + analytics row for the page only — distinct on rides the
+    # (video_id, fetched_at) / (video_id, date) indexes, one probe per video
+    page_ids = [r.Video.id for r in rows]
+    stats_by_video = {}
+    analytics_by_video = {}
+    if page_ids:
+        stats_by_video = {
+            s.video_id: s
+            for s in (
+                await db.execute(
+                    select(VideoStats)
+                    .where(VideoStats.video_id.in_(page_ids))
+                    .order_by(VideoStats.video_id, VideoStats.fetched_at.desc())
+                    .distinct(VideoStats.video_id)
+                )
+            ).scalars()
+        }
+        analytics_by_video = {
+            a.video_id: a
+            for a in (
+                await db.execute(
+                    select(VideoAnalytics)
+                    .where(VideoAnalytics.video_id.in_(page_ids))
+                    .order_by(VideoAnalytics.video_id, VideoAnalytics.date.desc())
+                    .distinct(VideoAnalytics.video_id)
+                )
+            ).scalars()
+        }
+    page_rows = [(v, m, stats_by_video.get(v.id), analytics_by_video.get(v.id)) for v, m, _ in rows]
+
+    # total count for pagination info — only as exact as the caller asked for
+    if total_mode == "exact":
+        count_query = (
+            select(func.count())
+            .select_from(Video)
+            .outerjoin(VideoMetrics, VideoMetrics.video_id == Video.id)
+            .where(Video.channel_id == channel_id, *video_filter_clauses(**filters))
+        )
+        total_count = (await db.execute(count_query)).scalar_one()
+    elif total_mode == "estimate":
+        total_count = channel.video_count
+    else:
+        total_count = None
 
     result = {
-        "total": total,
+        "total": total_count,
         "page": page,
         "per_page": per_page,
+        "next_cursor": (
+            encode_cursor(rows[-1].sort_key, rows[-1].Video.id, sort_by, order, filters) if has_more else None
+        ),
         "videos": [
             {
                 "id": str(v.id),
@@ -121,15 +187,20 @@ async def list_videos(
                 "thumbnail_url": v.thumbnail_url,
                 "tags": v.tags,
                 "category_id": v.category_id,
-                "view_count": s.view_count,
-                "like_count": s.like_count,
-                "comment_count": s.comment_count,
-                "stats_fetched_at": s.fetched_at,
-                "views_per_day": round(
-                    s.view_count / max((date.today() - v.published_at.date()).days, 1), 1
-                ),
+                # video_metrics copies its counters from the newest snapshot at sync —
+                # a video without a metrics row yet falls back to that snapshot
+                "view_count": m.view_count if m else s.view_count if s else None,
+                "like_count": m.like_count if m else s.like_count if s else None,
+                "comment_count": m.comment_count if m else s.comment_count if s else None,
+                "stats_fetched_at": s.fetched_at if s else None,
+                "views_per_day": round(m.views_per_day, 1) if m else None,
+                "engagement_rate": round(m.engagement_rate, 2) if m else None,
+                "comment_rate": round(m.comment_rate, 3) if m else None,
                 "click_through_rate": a.click_through_rate if a else None,
                 "impressions": a.impressions if a else None,
+                "ctr_first_7d": m.ctr_first_7d if m else None,
+                "ctr_last_28d": m.ctr_last_28d if m else None,
+                "impressions_last_28d": m.impressions_last_28d if m else None,
                 "average_view_duration_seconds": a.average_view_duration_seconds if a else None,
                 "average_view_percentage": (
                     a.average_view_percentage
@@ -141,64 +212,63 @@ async def list_videos(
                 "estimated_revenue": a.estimated_revenue if a else None,
                 "rpm": a.rpm if a else None,
             }
-            for v, s, a in rows
+            for v, m, s, a in page_rows
         ],
     }
     await redis.set(cache_key, json.dumps(result, default=str), ex=300)
     return result
 
 
+@router.get("/export")
+async def export_videos(
+    channel_id: UUID,
+    format: str = Query(default="ndjson", enum=list(EXPORT_FORMATS)),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """stream every video in a channel with its latest stats + analytics as ndjson, csv,
+    parquet or arrow. rows come off a server-side cursor in batches and go straight out,
+    so a 50k-video channel never sits in memory (or redis) in one piece."""
+    channel = await db.get(Channel, channel_id)
+    if not channel or channel.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="channel not found")
+
+    media_type, ext = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_export(channel_id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="videos-{channel_id}.{ext}"'},
+    )
+
+
 @router.get("/dislikes")
 async def get_video_dislikes(
     request: Request,
     ids: str = Query(..., description="comma-separated youtube video ids"),
     current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """return dislike counts for a list of youtube video ids.
-    results are cached in redis for 24 hours to avoid hammering the ryd api on every page load."""
-    youtube_ids = [i.strip() for i in ids.split(",") if i.strip()][:100]
-    redis = request.app.state.redis
-
-    results: dict[str, int | None] = {}
-    missing: list[str] = []
-
-    # check redis for each id first
-    for yt_id in youtube_ids:
-        cached = await redis.get(f"dislikes:{yt_id}")
-        if cached is not None:
-            results[yt_id] = int(cached)
-        else:
-            missing.append(yt_id)
-
-    # fetch any uncached ids from the ryd api in parallel
-    if missing:
-        async with httpx.AsyncClient(timeout=8) as client:
-            responses = await asyncio.gather(
-                *[client.get(f"https://returnyoutubedislikeapi.com/votes?videoId={vid}") for vid in missing],
-                return_exceptions=True,
-            )
-            for yt_id, resp in zip(missing, responses):
-                if isinstance(resp, Exception):
-                    results[yt_id] = None
-                    continue
-                try:
-                    count = int(resp.json().get("dislikes", 0))
-                    results[yt_id] = count
-                    await redis.set(f"dislikes:{yt_id}", str(count), ex=86400)  # cache 24h
-                except Exception:
-                    results[yt_id] = None
-
-    return results
+    answered from redis / the prefetched video_dislikes table where possible — only ids
+    the sync prefetch hasn't reached yet go out to the ryd api."""
+    youtube_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))[:100]
+    if not youtube_ids:
+        return {}
+    return await get_dislikes(request.app.state.redis, db, request.app.state.dislikes_client, youtube_ids)
 
 
 @router.get("/{video_id}")
 async def get_video(
     request: Request,
     video_id: UUID,
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=3, le=MAX_POINTS_LIMIT),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """return a single video with its full stats + analytics."""
+    """return a single video with its latest stats + analytics. stats_history covers
+    from/to (default: the whole life of the video) and is downsampled to max_points."""
     video = await db.get(Video, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="video not found")
@@ -210,18 +280,14 @@ async def get_video(
 
     # return from redis if available — avoids three db queries on every page open
     redis = request.app.state.redis
-    cache_key = f"video:{video_id}"
+    cache_key = f"video:{video_id}:{start}:{end}:{max_points}"
     cached = await redis.get(cache_key)
     if cached:
         return json.loads(cached)
 
-    # all stats snapshots, newest first
-    stats_result = await db.execute(
-        select(VideoStats)
-        .where(VideoStats.video_id == video_id)
-        .order_by(VideoStats.fetched_at.desc())
-    )
-    stats_history = stats_result.scalars().all()
+    # latest counters always come from the newest snapshot, whatever range was asked for
+    latest = await latest_stats(db, video_id)
+    history = await stats_history(db, video_id, start=start, end=end, max_points=max_points)
 
     # latest analytics row
     analytics_result = await db.execute(
@@ -232,7 +298,6 @@ async def get_video(
     )
     analytics = analytics_result.scalar_one_or_none()
 
-    latest = stats_history[0] if stats_history else None
     days_live = max((date.today() - video.published_at.date()).days, 1)
 
     result = {
@@ -269,16 +334,8 @@ async def get_video(
         "estimated_ad_revenue": analytics.estimated_ad_revenue if analytics else None,
         "rpm": analytics.rpm if analytics else None,
         "cpm": analytics.cpm if analytics else None,
-        # full history for the table
-        "stats_history": [
-            {
-                "view_count": s.view_count,
-                "like_count": s.like_count,
-                "comment_count": s.comment_count,
-                "fetched_at": s.fetched_at,
-            }
-            for s in stats_history
-        ],
+        # downsampled history, newest first for the table
+        "stats_history": history[::-1],
     }
     await redis.set(cache_key, json.dumps(result, default=str), ex=300)
     return result
@@ -291,9 +348,9 @@ async def get_video_history(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """fetch real daily view/like/comment counts from the youtube analytics api
-    for a single video, from its publish date up to today.
-    cached in redis for 24 hours — analytics data only updates once a day anyway."""
+    """real daily view/like/comment counts for a single video, from its publish date up
+    to the latest day the analytics api has. served from video_daily_analytics — the first
+    open backfills it, later opens only fetch the days since the newest stored one."""
     video = await db.get(Video, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="video not found")
@@ -302,13 +359,6 @@ async def get_video_history(
     if not channel or channel.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="video not found")
 
-    # return cached result if we have one — avoids hitting youtube analytics api every page load
-    redis = request.app.state.redis
-    cache_key = f"history:{video_id}"
-    cached = await redis.get(cache_key)
-    if cached:
-        return {"daily": json.loads(cached)}
-
     access_token = decrypt_token(current_user.access_token, settings.secret_key)
     refresh_token = (
         decrypt_token(current_user.refresh_token, settings.secret_key)
@@ -316,29 +366,53 @@ async def get_video_history(
         else None
     )
 
-    start_date = video.published_at.strftime("%Y-%m-%d")
-
     try:
-        daily = await yt.get_video_daily_history(
-            access_token, refresh_token, video.youtube_video_id, start_date
-        )
+        await refresh_video_history(db, request.app.state.redis, video, access_token, refresh_token)
     except Exception as exc:
-        raise HTTPException(status_code=502, detail=f"analytics api error: {exc}")
+        # a failed top-up still leaves whatever we stored before — only fail if that's nothing
+        await db.rollback()
+        daily = await stored_video_history(db, video)
+        if not daily:
+            raise HTTPException(status_code=502, detail=f"analytics api error: {exc}")
+        print(f"history top-up failed for video {video_id}: {exc}")
+        return {"daily": daily}
 
-    # cache for 24 hours — the analytics api only updates once a day so this is always fresh enough
-    await redis.set(cache_key, json.dumps(daily), ex=86400)
+    return {"daily": await stored_video_history(db, video)}
 
-    return {"daily": daily}
+
+@router.get("/{video_id}/reach")
+async def get_video_reach(
+    video_id: UUID,
+    window: str = Query(default="lifetime", enum=REACH_WINDOWS),
+    start: date | None = None,
+    end: date | None = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """impressions + impressions-weighted ctr for a video over a window (lifetime, its
+    first 7 days, or the last 28), optionally narrowed by start/end, with the daily
+    reach rows it was summed from. answered from video_daily_reach — no api calls."""
+    video = await db.get(Video, video_id)
+    if not video:
+        raise HTTPException(status_code=404, detail="video not found")
+
+    channel = await db.get(Channel, video.channel_id)
+    if not channel or channel.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="video not found")
+
+    return await video_reach(db, video, window, start, end)
 
 
 @router.get("/{video_id}/comments")
 async def get_video_comments(
+    request: Request,
     video_id: UUID,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """return the top 10 comments + all replies for a video.
-    results are cached in the db for 6 hours to avoid burning api quota."""
+    """return the top comments (settings.comment_threads) + all replies for a video.
+    served from the db; once the stored copy is older than 6 hours it's still returned
+    as-is while a background refresh diffs in whatever changed on youtube."""
     video = await db.get(Video, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="video not found")
@@ -347,20 +421,11 @@ async def get_video_comments(
     if not channel or channel.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="video not found")
 
-    # check for cached comments less than 6 hours old
-    fresh_cutoff = datetime.now(UTC) - timedelta(hours=6)
-    cached_result = await db.execute(
-        select(VideoComment)
-        .where(VideoComment.video_id == video_id)
-        .where(VideoComment.fetched_at > fresh_cutoff)
-        .order_by(VideoComment.is_reply, VideoComment.like_count.desc())
-    )
-    cached = cached_result.scalars().all()
-
-    if cached:
+    redis = request.app.state.redis
+    cached = await cached_comments(db, video_id)
+    if await is_fresh(redis, video_id):
         return _format_comments(cached)
 
-    # cache is stale or empty — fetch fresh from youtube api
     access_token = decrypt_token(current_user.access_token, settings.secret_key)
     refresh_token = (
         decrypt_token(current_user.refresh_token, settings.secret_key)
@@ -368,46 +433,20 @@ async def get_video_comments(
         else None
     )
 
-    raw = await yt.get_video_comments(access_token, refresh_token, video.youtube_video_id)
-    print(f"[comments] fetched {len(raw)} comments for {video.youtube_video_id}")
-
-    # wipe old cached rows and store new ones
-    await db.execute(delete(VideoComment).where(VideoComment.video_id == video_id))
-
-    now = datetime.now(UTC)
-    for c in raw:
-        db.add(VideoComment(
-            video_id=video_id,
-            youtube_comment_id=c["youtube_comment_id"],
-            parent_youtube_id=c["parent_youtube_id"],
-            author_name=c["author_name"],
-            author_image_url=c["author_image_url"],
-            author_channel_url=c["author_channel_url"],
-            author_channel_id=c["author_channel_id"],
-            text=c["text"],
-            like_count=c["like_count"],
-            reply_count=c["reply_count"],
-            is_reply=c["is_reply"],
-            published_at=_parse_yt_dt(c["published_at"]),
-            updated_at_youtube=_parse_yt_dt(c["updated_at_youtube"]),
-            fetched_at=now,
-        ))
-    await db.commit()
-
-    # re-query from db to get ids etc
-    result = await db.execute(
-        select(VideoComment)
-        .where(VideoComment.video_id == video_id)
-        .order_by(VideoComment.is_reply, VideoComment.like_count.desc())
-    )
-    return _format_comments(result.scalars().all())
-
+    # stale — serve what we have and refresh behind it
+    if cached:
+        schedule_comments_refresh(redis, video_id, video.youtube_video_id, access_token, refresh_token)
+        return _format_comments(cached)
 
-def _parse_yt_dt(s: str | None) -> datetime | None:
-    """parse youtube's iso 8601 timestamp strings into aware datetimes."""
-    if not s:
-        return None
-    return datetime.fromisoformat(s.replace("Z", "+00:00"))
+    # nothing stored yet — this request has to wait, either on its own refresh or on
+    # the one another request already started
+    try:
+        refreshed = await refresh_comments(redis, video_id, video.youtube_video_id, access_token, refresh_token)
+    except Exception as exc:
+        raise HTTPException(status_code=502, detail=f"youtube api error: {exc}")
+    if not refreshed:
+        await wait_for_refresh(redis, video_id)
+    return _format_comments(await cached_comments(db, video_id))
 
 
 def _format_comments(rows: list[VideoComment]) -> dict:
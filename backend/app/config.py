@@ -31,6 +31,19 @@ class Settings(BaseSettings):
     # YouTube Data API — secondary access for public data lookups without user authentication
     youtube_api_key: str = ""
 
+    # Return YouTube Dislike API — point at a local stand-in server for tests
+    ryd_api_url: str = "https://returnyoutubedislikeapi.com"
+    ryd_max_concurrency: int = 8
+
+    # Comments tab — how many top threads to load, and how many reply pages to fetch at once
+    comment_threads: int = 10
+    comment_reply_concurrency: int = 4
+
+    # GraphQL limits — nesting depth, estimated rows per query, and rows per user per minute
+    graphql_max_depth: int = 8
+    graphql_max_cost: int = 100_000
+    graphql_cost_budget: int = 500_000
+
     model_config = SettingsConfigDict(env_file=str(_env_file), extra="ignore")
 
 
@@ -1,5 +1,6 @@
 from collections.abc import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -11,6 +12,39 @@ engine = create_async_engine(
     echo=settings.debug,  # logs sql queries to console in dev, handy for debugging
 )
 
+# running totals for the connection pool — a leaked session shows up as checked_out
+# creeping up and never coming back down. surfaced on /health
+_pool_counts = {"connects": 0, "checkouts": 0, "checkins": 0, "peak_checked_out": 0}
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    _pool_counts["connects"] += 1
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    _pool_counts["checkouts"] += 1
+    _pool_counts["peak_checked_out"] = max(_pool_counts["peak_checked_out"], engine.sync_engine.pool.checkedout())
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    _pool_counts["checkins"] += 1
+
+
+def pool_metrics() -> dict:
+    """where the pool is right now plus totals since startup."""
+    pool = engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        **_pool_counts,
+    }
+
+
 # each request gets its own db workspace/session from this
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
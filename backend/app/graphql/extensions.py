@@ -0,0 +1,186 @@
+import hashlib
+import time
+from datetime import UTC, datetime, timedelta
+
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    value_from_ast_untyped,
+)
+from strawberry.extensions import SchemaExtension
+
+from app.config import settings
+
+# videos(per_page:) ceiling — same as the rest api's le=500
+MAX_PER_PAGE = 500
+
+# apq query texts stay in redis this long after their last use
+APQ_TTL = 7 * 24 * 3600
+
+# a user's cost budget is spent per window of this many seconds
+BUDGET_WINDOW = 60
+
+# rough row count behind channels — nobody connects more than a handful
+CHANNELS_ESTIMATE = 10
+# rough row count behind dailyStats — a year of days
+DAILY_STATS_ESTIMATE = 365
+# statsHistory reads every snapshot in its range before downsampling, so it's costed
+# by those rows, not by maxPoints. snapshots land once per scheduled sync...
+SNAPSHOT_INTERVAL = timedelta(hours=6)
+# ...and a history with no `from` is costed as a year of them
+STATS_HISTORY_ESTIMATE = 4 * 365
+
+
+def _arg(field: FieldNode, name: str, variables: dict, default):
+    for arg in field.arguments:
+        if arg.name.value == name:
+            value = value_from_ast_untyped(arg.value, variables)
+            return default if value is None else value
+    return default
+
+
+def _datetime_arg(field: FieldNode, name: str, variables: dict) -> datetime | None:
+    value = _arg(field, name, variables, None)
+    try:
+        parsed = datetime.fromisoformat(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+    if parsed is not None and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed
+
+
+def _history_rows(field: FieldNode, variables: dict) -> int:
+    """snapshots a statsHistory will read — its from/to span over the snapshot
+    interval, never more than the unbounded estimate (a video can't have snapshots
+    from before it was synced)."""
+    start = _datetime_arg(field, "from", variables)
+    if start is None:
+        return STATS_HISTORY_ESTIMATE
+    end = _datetime_arg(field, "to", variables) or datetime.now(UTC)
+    return min(max(int((end - start) / SNAPSHOT_INTERVAL) + 1, 1), STATS_HISTORY_ESTIMATE)
+
+
+def _rows(field: FieldNode, variables: dict) -> int:
+    """how many rows one instance of the field fans out into. videos counts its page
+    size here rather than on items — the page envelope is just one object around them."""
+    name = field.name.value
+    if name == "videos":
+        return max(int(_arg(field, "perPage", variables, 50)), 1)
+    if name == "statsHistory":
+        return _history_rows(field, variables)
+    if name == "channels":
+        return CHANNELS_ESTIMATE
+    if name == "dailyStats":
+        return DAILY_STATS_ESTIMATE
+    if name == "autopsy":
+        return max(int(_arg(field, "windowSize", variables, 100)), 1)
+    return 1
+
+
+def query_cost(
+    selection_set: SelectionSetNode | None,
+    fragments: dict[str, FragmentDefinitionNode],
+    variables: dict,
+    multiplier: int = 1,
+) -> int:
+    """estimated rows the selection will load: every field that returns an object
+    costs its fan-out times the fan-out of everything above it. scalars are free —
+    they ride along on rows that are already counted."""
+    if selection_set is None:
+        return 0
+    cost = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            if selection.selection_set is None:
+                continue
+            rows = multiplier * _rows(selection, variables)
+            cost += rows + query_cost(selection.selection_set, fragments, variables, rows)
+        elif isinstance(selection, InlineFragmentNode):
+            cost += query_cost(selection.selection_set, fragments, variables, multiplier)
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                cost += query_cost(fragment.selection_set, fragments, variables, multiplier)
+    return cost
+
+
+class PersistedQueries(SchemaExtension):
+    """automatic persisted queries (the apollo protocol). a client sends just
+    extensions.persistedQuery.sha256Hash; if we've seen the query we look its text up
+    in redis, otherwise we answer PersistedQueryNotFound and the client retries with
+    the full text, which gets stored under its hash. the text then hits the parser +
+    validation caches, so repeat calls skip both."""
+
+    async def on_operation(self):
+        ctx = self.execution_context
+        persisted = (ctx.operation_extensions or {}).get("persistedQuery")
+        if persisted:
+            digest = persisted.get("sha256Hash")
+            if not isinstance(digest, str) or persisted.get("version", 1) != 1:
+                raise GraphQLError("unsupported persistedQuery extension")
+            redis = ctx.context["request"].app.state.redis
+            key = f"apq:{digest}"
+            if ctx.query:
+                if hashlib.sha256(ctx.query.encode()).hexdigest() != digest:
+                    raise GraphQLError("provided sha256Hash does not match query")
+                await redis.set(key, ctx.query, ex=APQ_TTL)
+            else:
+                query = await redis.getex(key, ex=APQ_TTL)
+                if query is None:
+                    raise GraphQLError(
+                        "PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"}
+                    )
+                ctx.query = query
+        yield
+
+
+class QueryCost(SchemaExtension):
+    """rejects a query whose estimated row count is over graphql_max_cost, then charges
+    it against the user's per-minute budget in redis (graphql_cost_budget). runs after
+    validation, so the document is known-good and only costed once it's going to run."""
+
+    async def on_execute(self):
+        ctx = self.execution_context
+        document = ctx.graphql_document
+        fragments = {d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)}
+        operations = [d for d in document.definitions if isinstance(d, OperationDefinitionNode)]
+        operation = next(
+            (o for o in operations if ctx.operation_name is None or (o.name and o.name.value == ctx.operation_name)),
+            None,
+        )
+        if operation is not None:
+            cost = query_cost(operation.selection_set, fragments, ctx.variables or {})
+            if cost > settings.graphql_max_cost:
+                raise GraphQLError(
+                    f"query too expensive: cost {cost} is over the limit of {settings.graphql_max_cost}"
+                    " — ask for fewer items or a shorter history range",
+                    extensions={"code": "QUERY_TOO_EXPENSIVE", "cost": cost},
+                )
+            await self._charge(cost)
+        yield
+
+    async def _charge(self, cost: int) -> None:
+        request = self.execution_context.context["request"]
+        user_id = request.session.get("user_id")
+        if not user_id or not cost:
+            return  # resolvers reject anonymous callers anyway
+
+        redis = request.app.state.redis
+        window = int(time.time()) // BUDGET_WINDOW
+        key = f"gql-budget:{user_id}:{window}"
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.incrby(key, cost)
+            pipe.expire(key, BUDGET_WINDOW)
+            spent, _ = await pipe.execute()
+        if spent > settings.graphql_cost_budget:
+            raise GraphQLError(
+                "graphql cost budget exhausted, try again in a minute",
+                extensions={"code": "BUDGET_EXCEEDED", "cost": cost, "spent": spent},
+            )
+
@@ -0,0 +1,121 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from strawberry.dataloader import DataLoader
+
+from app.models.channels import Channel
+from app.models.stats import ChannelDailyStats, VideoAnalytics, VideoStats
+from app.models.videos import Video
+from app.services.stats_history import stats_history_many
+
+# stats_history is keyed by its arguments too — (video_id, from, to, max_points)
+HistoryKey = tuple[UUID, datetime | None, datetime | None, int]
+# projected loaders are keyed by the columns the query selected — (video_id, columns)
+AnalyticsKey = tuple[UUID, tuple[str, ...]]
+# (channel_id, columns, from, to)
+DailyStatsKey = tuple[UUID, tuple[str, ...], date | None, date | None]
+
+
+@dataclass
+class Loaders:
+    """one set per request — a loader caches what it has loaded, so sharing them across
+    requests would leak rows between users and serve stale data."""
+
+    channels: DataLoader[UUID, Channel | None]
+    videos: DataLoader[UUID, Video | None]
+    latest_stats: DataLoader[UUID, VideoStats | None]
+    latest_analytics: DataLoader[AnalyticsKey, dict | None]
+    stats_history: DataLoader[HistoryKey, list[dict]]
+    channel_daily_stats: DataLoader[DailyStatsKey, list[dict]]
+
+
+def _by_id(rows, key: str) -> dict:
+    return {getattr(r, key): r for r in rows}
+
+
+def create_loaders(db: AsyncSession) -> Loaders:
+    """every loader turns the keys gathered during one tick of resolving into a single
+    IN (...) query, so a page of n videos costs the same few statements as one video."""
+
+    async def load_channels(ids: list[UUID]) -> list[Channel | None]:
+        rows = _by_id((await db.execute(select(Channel).where(Channel.id.in_(ids)))).scalars(), "id")
+        return [rows.get(i) for i in ids]
+
+    async def load_videos(ids: list[UUID]) -> list[Video | None]:
+        rows = _by_id((await db.execute(select(Video).where(Video.id.in_(ids)))).scalars(), "id")
+        return [rows.get(i) for i in ids]
+
+    async def load_latest_stats(ids: list[UUID]) -> list[VideoStats | None]:
+        # distinct on keeps the first row per video — the newest, given the order by
+        result = await db.execute(
+            select(VideoStats)
+            .where(VideoStats.video_id.in_(ids))
+            .order_by(VideoStats.video_id, VideoStats.fetched_at.desc())
+            .distinct(VideoStats.video_id)
+        )
+        rows = _by_id(result.scalars(), "video_id")
+        return [rows.get(i) for i in ids]
+
+    async def load_latest_analytics(keys: list[AnalyticsKey]) -> list[dict | None]:
+        # newest row per video, reading only the selected columns — one query per
+        # distinct column set, which for a page of videos is one query
+        groups: dict[tuple[str, ...], list[UUID]] = defaultdict(list)
+        for video_id, columns in keys:
+            groups[columns].append(video_id)
+        found: dict[AnalyticsKey, dict] = {}
+        for columns, video_ids in groups.items():
+            result = await db.execute(
+                select(VideoAnalytics.video_id, *[getattr(VideoAnalytics, c) for c in columns])
+                .where(VideoAnalytics.video_id.in_(video_ids))
+                .order_by(VideoAnalytics.video_id, VideoAnalytics.date.desc())
+                .distinct(VideoAnalytics.video_id)
+            )
+            for row in result.all():
+                found[(row.video_id, columns)] = {c: row._mapping[c] for c in columns}
+        return [found.get(k) for k in keys]
+
+    async def load_stats_history(keys: list[HistoryKey]) -> list[list[dict]]:
+        # one query per distinct (from, to, max_points) — in practice every video in a
+        # page asks with the same arguments, so that's one query for the whole page
+        groups: dict[tuple, list[UUID]] = defaultdict(list)
+        for video_id, start, end, max_points in keys:
+            groups[(start, end, max_points)].append(video_id)
+        points: dict[HistoryKey, list[dict]] = {}
+        for (start, end, max_points), video_ids in groups.items():
+            history = await stats_history_many(db, video_ids, start=start, end=end, max_points=max_points)
+            for video_id, series in history.items():
+                points[(video_id, start, end, max_points)] = series
+        return [points[k] for k in keys]
+
+    async def load_channel_daily_stats(keys: list[DailyStatsKey]) -> list[list[dict]]:
+        groups: dict[tuple, list[UUID]] = defaultdict(list)
+        for channel_id, columns, start, end in keys:
+            groups[(columns, start, end)].append(channel_id)
+        series: dict[DailyStatsKey, list[dict]] = {k: [] for k in keys}
+        for (columns, start, end), channel_ids in groups.items():
+            d = ChannelDailyStats
+            query = (
+                select(d.channel_id, *[getattr(d, c) for c in columns])
+                .where(d.channel_id.in_(channel_ids))
+                .order_by(d.channel_id, d.date)
+            )
+            if start is not None:
+                query = query.where(d.date >= start)
+            if end is not None:
+                query = query.where(d.date <= end)
+            for row in (await db.execute(query)).all():
+                series[(row.channel_id, columns, start, end)].append({c: row._mapping[c] for c in columns})
+        return [series[k] for k in keys]
+
+    return Loaders(
+        channels=DataLoader(load_fn=load_channels),
+        videos=DataLoader(load_fn=load_videos),
+        latest_stats=DataLoader(load_fn=load_latest_stats),
+        latest_analytics=DataLoader(load_fn=load_latest_analytics),
+        stats_history=DataLoader(load_fn=load_stats_history),
+        channel_daily_stats=DataLoader(load_fn=load_channel_daily_stats),
+    )
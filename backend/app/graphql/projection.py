@@ -0,0 +1,34 @@
+from strawberry.types import Info
+from strawberry.types.nodes import SelectedField
+
+
+def _field_names(selections: list) -> set[str]:
+    names: set[str] = set()
+    for s in selections:
+        if isinstance(s, SelectedField):
+            names.add(s.name)
+        else:  # inline fragment / fragment spread — look through to its fields
+            names |= _field_names(s.selections)
+    return names
+
+
+def selected_fields(info: Info, type_cls: type) -> list[str]:
+    """python names of the fields on `type_cls` the query selected under the field
+    being resolved, in the type's own order. resolvers turn these into the columns they
+    select, so asking for two numbers reads two columns instead of whole orm rows."""
+    selected = set()
+    for field in info.selected_fields:
+        selected |= _field_names(field.selections)
+    converter = info.schema.config.name_converter
+    return [
+        f.python_name
+        for f in type_cls.__strawberry_definition__.fields
+        if converter.get_graphql_name(f) in selected
+    ]
+
+
+def build(type_cls: type, values: dict):
+    """an instance of `type_cls` from a projected row — fields that weren't selected
+    (so weren't loaded) are filled with None; graphql never reads them."""
+    fields = [f.python_name for f in type_cls.__strawberry_definition__.fields if not f.base_resolver]
+    return type_cls(**{name: values.get(name) for name in fields})
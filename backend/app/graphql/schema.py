@@ -1,25 +1,34 @@
 import uuid
+from datetime import datetime
 
 import strawberry
-from sqlalchemy import asc, desc, func, select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from strawberry.extensions import ParserCache, QueryDepthLimiter, ValidationCache
 from strawberry.types import Info
 
+from app.config import settings
 from app.models.channels import Channel
-from app.models.stats import VideoStats
+from app.models.stats import VideoMetrics
 from app.models.users import User
 from app.models.videos import Video
-
-from .types import ChannelType, UserType, VideosPage, VideoStatsType, VideoType
-
-SORT_COLUMNS = {
-    "views": VideoStats.view_count,
-    "likes": VideoStats.like_count,
-    "comments": VideoStats.comment_count,
-    "published_at": Video.published_at,
-    "duration": Video.duration_seconds,
-    "title": Video.title,
-}
+from app.services.autopsy import RANK_METRICS, cached_autopsy
+from app.utils.pagination import TOTAL_MODES, encode_cursor, keyset_after, keyset_order
+from app.utils.video_filters import SORT_COLUMNS, video_filter_clauses
+
+from .extensions import MAX_PER_PAGE, PersistedQueries, QueryCost
+from .loaders import Loaders
+from .types import (
+    AutopsyMetaType,
+    AutopsyMetricType,
+    AutopsyType,
+    AutopsyVideoType,
+    ChannelType,
+    UserType,
+    VideoFilter,
+    VideosPage,
+    VideoType,
+)
 
 
 def _require_user(info: Info) -> uuid.UUID:
@@ -30,8 +39,26 @@ def _require_user(info: Info) -> uuid.UUID:
     return uuid.UUID(user_id)
 
 
-def _map_video(v: Video, s: VideoStats | None, all_stats: list[VideoStats]) -> VideoType:
-    """converts db rows into the strawberry VideoType."""
+def _map_channel(c: Channel) -> ChannelType:
+    """converts a db row into the strawberry ChannelType."""
+    return ChannelType(
+        id=strawberry.ID(str(c.id)),
+        youtube_channel_id=c.youtube_channel_id,
+        title=c.title,
+        description=c.description,
+        custom_url=c.custom_url,
+        thumbnail_url=c.thumbnail_url,
+        subscriber_count=c.subscriber_count,
+        video_count=c.video_count,
+        view_count=c.view_count,
+        published_at=c.published_at,
+        last_synced_at=c.last_synced_at,
+    )
+
+
+def _map_video(v: Video) -> VideoType:
+    """converts a db row into the strawberry VideoType — stats, history and analytics
+    resolve lazily through the loaders."""
     return VideoType(
         id=strawberry.ID(str(v.id)),
         youtube_video_id=v.youtube_video_id,
@@ -44,28 +71,44 @@ def _map_video(v: Video, s: VideoStats | None, all_stats: list[VideoStats]) -> V
         tags=v.tags,
         category_id=v.category_id,
         default_language=v.default_language,
-        latest_stats=(
-            VideoStatsType(
-                view_count=s.view_count,
-                like_count=s.like_count,
-                comment_count=s.comment_count,
-                fetched_at=s.fetched_at,
-            )
-            if s
-            else None
-        ),
-        stats_history=[
-            VideoStatsType(
-                view_count=stat.view_count,
-                like_count=stat.like_count,
-                comment_count=stat.comment_count,
-                fetched_at=stat.fetched_at,
-            )
-            for stat in all_stats
-        ],
     )
 
 
+def _map_autopsy(report: dict) -> AutopsyType:
+    """the autopsy dict (fresh, or back from the json cache) as strawberry types."""
+
+    def video(v: dict) -> AutopsyVideoType:
+        published = v["published_at"]
+        return AutopsyVideoType(**{
+            **v,
+            "id": strawberry.ID(v["id"]),
+            "published_at": datetime.fromisoformat(published) if isinstance(published, str) else published,
+        })
+
+    return AutopsyType(
+        meta=AutopsyMetaType(**report["meta"]),
+        key_metrics=[AutopsyMetricType(metric=name, **m) for name, m in report["key_metrics"].items()],
+        top_videos=[video(v) for v in report["top_videos"]],
+        avg_videos=[video(v) for v in report["avg_videos"]],
+        bottom_videos=[video(v) for v in report["bottom_videos"]],
+        title_analysis=report["title_analysis"],
+        schedule_analysis=report["schedule_analysis"],
+        duration_analysis=report["duration_analysis"],
+        tag_analysis=report["tag_analysis"],
+        category_analysis=report["category_analysis"],
+        quarterly_breakdown=report["quarterly_breakdown"],
+        timeline_videos=report["timeline_videos"],
+    )
+
+
+async def _owned_channel(info: Info, user_id: uuid.UUID, channel_id: uuid.UUID) -> Channel | None:
+    loaders: Loaders = info.context["loaders"]
+    channel = await loaders.channels.load(channel_id)
+    if not channel or channel.user_id != user_id:
+        return None
+    return channel
+
+
 @strawberry.type
 class Query:
     @strawberry.field
@@ -95,47 +138,14 @@ class Query:
             select(Channel).where(Channel.user_id == user_id)
         )
         channels = result.scalars().all()
-
-        return [
-            ChannelType(
-                id=strawberry.ID(str(c.id)),
-                youtube_channel_id=c.youtube_channel_id,
-                title=c.title,
-                description=c.description,
-                custom_url=c.custom_url,
-                thumbnail_url=c.thumbnail_url,
-                subscriber_count=c.subscriber_count,
-                video_count=c.video_count,
-                view_count=c.view_count,
-                published_at=c.published_at,
-                last_synced_at=c.last_synced_at,
-            )
-            for c in channels
-        ]
+        return [_map_channel(c) for c in channels]
 
     @strawberry.field
     async def channel(self, info: Info, id: strawberry.ID) -> ChannelType | None:
         """returns a single channel by id — only if it belongs to the logged-in user."""
         user_id = _require_user(info)
-        db: AsyncSession = info.context["db"]
-
-        c = await db.get(Channel, uuid.UUID(str(id)))
-        if not c or c.user_id != user_id:
-            return None
-
-        return ChannelType(
-            id=strawberry.ID(str(c.id)),
-            youtube_channel_id=c.youtube_channel_id,
-            title=c.title,
-            description=c.description,
-            custom_url=c.custom_url,
-            thumbnail_url=c.thumbnail_url,
-            subscriber_count=c.subscriber_count,
-            video_count=c.video_count,
-            view_count=c.view_count,
-            published_at=c.published_at,
-            last_synced_at=c.last_synced_at,
-        )
+        c = await _owned_channel(info, user_id, uuid.UUID(str(id)))
+        return _map_channel(c) if c else None
 
     @strawberry.field
     async def videos(
@@ -146,87 +156,137 @@ class Query:
         order: str = "desc",
         page: int = 1,
         per_page: int = 50,
+        after: str | None = None,
+        total: str | None = None,
+        filter: VideoFilter | None = None,
     ) -> VideosPage:
-        """returns a paginated list of videos for a channel with their latest stats."""
+        """returns a paginated list of videos for a channel with their latest stats.
+        pass next_cursor back as after to keep scrolling without an offset. total is
+        exact / estimate / none — exact on the first page and none after a cursor by default,
+        and always exact when filtering."""
         user_id = _require_user(info)
         db: AsyncSession = info.context["db"]
 
+        if not 1 <= per_page <= MAX_PER_PAGE:
+            raise ValueError(f"per_page must be between 1 and {MAX_PER_PAGE}")
+        if page < 1:
+            raise ValueError("page must be 1 or more")
+
         # ownership check
         channel_uuid = uuid.UUID(str(channel_id))
-        channel = await db.get(Channel, channel_uuid)
-        if not channel or channel.user_id != user_id:
+        channel = await _owned_channel(info, user_id, channel_uuid)
+        if not channel:
             raise ValueError("channel not found")
 
         if sort_by not in SORT_COLUMNS:
             sort_by = "published_at"
         if order not in ("asc", "desc"):
             order = "desc"
-
-        # subquery to get the latest stats snapshot per video
-        latest_stats_sq = (
-            select(
-                VideoStats.video_id,
-                func.max(VideoStats.fetched_at).label("latest_fetch"),
-            )
-            .group_by(VideoStats.video_id)
-            .subquery()
-        )
-
+        total_mode = total if total in TOTAL_MODES else ("none" if after else "exact")
+        filters = {k: v for k, v in vars(filter).items() if v is not None} if filter else {}
+        if filters and total_mode == "estimate":
+            total_mode = "exact"
+        where = [Video.channel_id == channel_uuid, *video_filter_clauses(**filters)]
+
+        # every video in the channel with its video_metrics row outer-joined, so one
+        # whose metrics aren't computed yet still lists (last on the metric sorts).
+        # latest stats come from the loader for just the page
         sort_col = SORT_COLUMNS[sort_by]
-        direction = desc if order == "desc" else asc
-
+        # a metric column is null for those unjoined videos whatever its own NOT NULL says
+        nullable = None if sort_col.class_ is Video else True
         query = (
-            select(Video, VideoStats)
-            .join(latest_stats_sq, latest_stats_sq.c.video_id == Video.id)
-            .join(
-                VideoStats,
-                (VideoStats.video_id == Video.id)
-                & (VideoStats.fetched_at == latest_stats_sq.c.latest_fetch),
-            )
-            .where(Video.channel_id == channel_uuid)
-            .order_by(direction(sort_col))
-            .offset((page - 1) * per_page)
-            .limit(per_page)
+            select(Video, sort_col.label("sort_key"))
+            .outerjoin(VideoMetrics, VideoMetrics.video_id == Video.id)
+            .where(*where)
+            .order_by(*keyset_order(sort_col, Video.id, order, nullable))
+            # one extra row tells us whether there's a next page
+            .limit(per_page + 1)
         )
+        if after:
+            query = query.where(keyset_after(sort_col, Video.id, after, sort_by, order, filters, nullable))
+        else:
+            query = query.offset((page - 1) * per_page)
 
         rows = (await db.execute(query)).all()
-
-        count_query = select(func.count(Video.id)).where(Video.channel_id == channel_uuid)
-        total = (await db.execute(count_query)).scalar_one()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+
+        if total_mode == "exact":
+            count_query = (
+                select(func.count())
+                .select_from(Video)
+                .outerjoin(VideoMetrics, VideoMetrics.video_id == Video.id)
+                .where(*where)
+            )
+            total_count = (await db.execute(count_query)).scalar_one()
+        elif total_mode == "estimate":
+            total_count = channel.video_count
+        else:
+            total_count = None
 
         return VideosPage(
-            total=total,
+            total=total_count,
             page=page,
             per_page=per_page,
-            items=[_map_video(v, s, []) for v, s in rows],
+            next_cursor=(
+                encode_cursor(rows[-1].sort_key, rows[-1].Video.id, sort_by, order, filters) if has_more else None
+            ),
+            items=[_map_video(v) for v, _ in rows],
         )
 
     @strawberry.field
     async def video(self, info: Info, id: strawberry.ID) -> VideoType | None:
-        """returns a single video with its full stats history."""
+        """returns a single video — ask for stats_history(from, to, max_points) on it
+        for the downsampled history."""
         user_id = _require_user(info)
-        db: AsyncSession = info.context["db"]
+        loaders: Loaders = info.context["loaders"]
 
-        video_uuid = uuid.UUID(str(id))
-        v = await db.get(Video, video_uuid)
+        v = await loaders.videos.load(uuid.UUID(str(id)))
         if not v:
             return None
 
         # verify ownership through the channel
-        channel = await db.get(Channel, v.channel_id)
-        if not channel or channel.user_id != user_id:
+        if not await _owned_channel(info, user_id, v.channel_id):
             return None
+        return _map_video(v)
 
-        # get all stats snapshots ordered oldest → newest
-        stats_result = await db.execute(
-            select(VideoStats)
-            .where(VideoStats.video_id == video_uuid)
-            .order_by(VideoStats.fetched_at)
-        )
-        all_stats = stats_result.scalars().all()
-
-        latest = all_stats[-1] if all_stats else None
-        return _map_video(v, latest, all_stats)
+    @strawberry.field
+    async def autopsy(
+        self,
+        info: Info,
+        channel_id: strawberry.ID,
+        window_size: int = 100,
+        tier_pct: int = 10,
+        rank_by: str = "views",
+    ) -> AutopsyType | None:
+        """top vs bottom performers within the window_size most recent videos — the
+        same report (and the same cache) as the rest /autopsy endpoint."""
+        user_id = _require_user(info)
+        if not 10 <= window_size <= 200:
+            raise ValueError("window_size must be between 10 and 200")
+        if tier_pct not in (5, 10, 20, 25):
+            raise ValueError("tier_pct must be one of 5, 10, 20, 25")
+        if rank_by not in RANK_METRICS:
+            raise ValueError(f"rank_by must be one of {', '.join(RANK_METRICS)}")
 
+        channel_uuid = uuid.UUID(str(channel_id))
+        if not await _owned_channel(info, user_id, channel_uuid):
+            return None
 
-schema = strawberry.Schema(query=Query)
+        redis = info.context["request"].app.state.redis
+        report = await cached_autopsy(info.context["db"], redis, channel_uuid, window_size, tier_pct, rank_by)
+        return _map_autopsy(report)
+
+
+schema = strawberry.Schema(
+    query=Query,
+    extensions=[
+        # apq first so a hash-only request has its query text before anything parses it
+        PersistedQueries,
+        QueryDepthLimiter(max_depth=settings.graphql_max_depth),
+        # both caches live at module level, so every request in the process shares them
+        lambda: ParserCache(maxsize=512),
+        lambda: ValidationCache(maxsize=512),
+        QueryCost,
+    ],
+)
@@ -1,6 +1,15 @@
-from datetime import datetime
+import uuid
+from datetime import date, datetime
+from typing import Annotated
 
 import strawberry
+from strawberry.scalars import JSON
+from strawberry.types import Info
+
+from app.services.charts import GRANULARITIES, channel_series
+from app.services.stats_history import DEFAULT_MAX_POINTS, MAX_POINTS_LIMIT
+
+from .projection import build, selected_fields
 
 
 @strawberry.type
@@ -11,6 +20,42 @@ class UserType:
     picture_url: str | None
 
 
+@strawberry.type
+class ChannelDailyStatsType:
+    """one day of channel-wide analytics."""
+
+    date: date
+    views: int | None
+    estimated_minutes_watched: float | None
+    average_view_duration_seconds: float | None
+    likes: int | None
+    comments: int | None
+    subscribers_gained: int | None
+    subscribers_lost: int | None
+    impressions: int | None
+    click_through_rate: float | None
+    estimated_revenue: float | None
+
+
+@strawberry.type
+class ChartSeriesType:
+    """a channel's chart metrics on one date axis — same values as /charts/channel.
+    only the selected metrics are computed (or read from the cached blocks)."""
+
+    granularity: str
+    dates: list[date]
+    views: list[int | None]
+    likes: list[int | None]
+    comments: list[int | None]
+    subscribers_gained: list[int | None]
+    impressions: list[int | None]
+    watch_time_minutes: list[float | None]
+    revenue: list[float | None]
+    ctr: list[float | None]
+    rpm: list[float | None]
+    avg_view_duration: list[float | None]
+
+
 @strawberry.type
 class ChannelType:
     id: strawberry.ID
@@ -25,6 +70,44 @@ class ChannelType:
     published_at: datetime | None
     last_synced_at: datetime | None
 
+    @strawberry.field
+    async def daily_stats(
+        self,
+        info: Info,
+        start: Annotated[date | None, strawberry.argument(name="from")] = None,
+        end: Annotated[date | None, strawberry.argument(name="to")] = None,
+    ) -> list[ChannelDailyStatsType]:
+        """channel_daily_stats rows over from/to, oldest first — only the selected
+        columns are read."""
+        columns = tuple(selected_fields(info, ChannelDailyStatsType))
+        key = (uuid.UUID(str(self.id)), columns, start, end)
+        rows = await info.context["loaders"].channel_daily_stats.load(key)
+        return [build(ChannelDailyStatsType, r) for r in rows]
+
+    @strawberry.field
+    async def chart(
+        self,
+        info: Info,
+        granularity: str = "daily",
+        start: Annotated[date | None, strawberry.argument(name="from")] = None,
+        end: Annotated[date | None, strawberry.argument(name="to")] = None,
+    ) -> ChartSeriesType:
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        metrics = [f for f in selected_fields(info, ChartSeriesType) if f not in ("granularity", "dates")]
+        redis = info.context["request"].app.state.redis_bytes
+        payload = await channel_series(
+            info.context["db"], redis, uuid.UUID(str(self.id)), granularity, metrics, start, end
+        )
+        return build(
+            ChartSeriesType,
+            {
+                "granularity": granularity,
+                "dates": [date.fromisoformat(d) for d in payload["dates"]],
+                **payload["metrics"],
+            },
+        )
+
 
 @strawberry.type
 class VideoStatsType:
@@ -34,6 +117,30 @@ class VideoStatsType:
     fetched_at: datetime
 
 
+@strawberry.type
+class VideoAnalyticsType:
+    """the newest analytics api row for a video."""
+
+    date: date
+    views: int | None
+    impressions: int | None
+    click_through_rate: float | None
+    average_view_duration_seconds: float | None
+    average_view_percentage: float | None
+    estimated_minutes_watched: float | None
+    likes: int | None
+    comments: int | None
+    shares: int | None
+    subscribers_gained: int | None
+    subscribers_lost: int | None
+    traffic_source: JSON | None
+    # revenue — null when the channel didn't grant the monetary scope
+    estimated_revenue: float | None
+    estimated_ad_revenue: float | None
+    rpm: float | None
+    cpm: float | None
+
+
 @strawberry.type
 class VideoType:
     id: strawberry.ID
@@ -47,13 +154,128 @@ class VideoType:
     tags: list[str] | None
     category_id: str | None
     default_language: str | None
-    latest_stats: VideoStatsType | None
-    stats_history: list[VideoStatsType]
+
+    # the nested fields below only cost anything when they're selected, and they go
+    # through the request's dataloaders so a whole page shares one query per field
+
+    @strawberry.field
+    async def latest_stats(self, info: Info) -> VideoStatsType | None:
+        s = await info.context["loaders"].latest_stats.load(uuid.UUID(str(self.id)))
+        if s is None:
+            return None
+        return VideoStatsType(
+            view_count=s.view_count,
+            like_count=s.like_count,
+            comment_count=s.comment_count,
+            fetched_at=s.fetched_at,
+        )
+
+    @strawberry.field
+    async def stats_history(
+        self,
+        info: Info,
+        start: Annotated[datetime | None, strawberry.argument(name="from")] = None,
+        end: Annotated[datetime | None, strawberry.argument(name="to")] = None,
+        max_points: int = DEFAULT_MAX_POINTS,
+    ) -> list[VideoStatsType]:
+        """snapshots over from/to, oldest first, downsampled to max_points."""
+        max_points = min(max(max_points, 3), MAX_POINTS_LIMIT)
+        key = (uuid.UUID(str(self.id)), start, end, max_points)
+        return [VideoStatsType(**point) for point in await info.context["loaders"].stats_history.load(key)]
+
+    @strawberry.field
+    async def analytics(self, info: Info) -> VideoAnalyticsType | None:
+        """reads only the selected columns of the newest row."""
+        columns = tuple(selected_fields(info, VideoAnalyticsType))
+        a = await info.context["loaders"].latest_analytics.load((uuid.UUID(str(self.id)), columns))
+        return build(VideoAnalyticsType, a) if a is not None else None
+
+
+@strawberry.input
+class VideoFilter:
+    """optional filters for the videos list — unset fields don't filter."""
+
+    is_short: bool | None = None
+    published_after: datetime | None = None
+    published_before: datetime | None = None
+    min_duration: int | None = None  # seconds
+    max_duration: int | None = None  # seconds
+    category_id: str | None = None
+    tags: list[str] | None = None  # videos must have all of them
+    min_views: int | None = None
+    min_revenue: float | None = None
 
 
 @strawberry.type
 class VideosPage:
-    total: int
+    total: int | None  # null when the caller asked for total: "none"
     page: int
     per_page: int
+    next_cursor: str | None  # pass as after to get the next page, null on the last one
     items: list[VideoType]
+
+
+@strawberry.type
+class AutopsyMetaType:
+    window_size: int
+    tier_pct: int
+    tier_count: int
+    shorts_excluded: int
+    junk_excluded: int
+    unranked_excluded: int
+    rank_by: str
+    avg_rank_start: int
+    window_oldest: str | None
+    window_newest: str | None
+
+
+@strawberry.type
+class AutopsyMetricType:
+    """one key metric: top vs bottom tier averages and how far apart they are."""
+
+    metric: str
+    top: float | None
+    bottom: float | None
+    delta_pct: float | None
+    top_available: int
+    bottom_available: int
+
+
+@strawberry.type
+class AutopsyVideoType:
+    id: strawberry.ID
+    youtube_video_id: str
+    title: str
+    thumbnail_url: str | None
+    published_at: datetime
+    view_count: int | None
+    views_per_day: float | None
+    views_last_30d: int | None
+    ctr: float | None
+    ctr_first_7d: float | None
+    ctr_last_28d: float | None
+    avg_view_duration: float | None
+    engagement_rate: float | None
+    duration_seconds: int | None
+    is_short: bool
+    rpm: float | None
+    estimated_revenue: float | None
+
+
+@strawberry.type
+class AutopsyType:
+    """the /autopsy report. the per-video and key metric sections are typed; the
+    breakdown sections keep the rest api's json shape."""
+
+    meta: AutopsyMetaType
+    key_metrics: list[AutopsyMetricType]
+    top_videos: list[AutopsyVideoType]
+    avg_videos: list[AutopsyVideoType]
+    bottom_videos: list[AutopsyVideoType]
+    title_analysis: JSON
+    schedule_analysis: JSON
+    duration_analysis: JSON
+    tag_analysis: JSON
+    category_analysis: JSON
+    quarterly_breakdown: JSON
+    timeline_videos: JSON
@@ -1,17 +1,20 @@
 from contextlib import asynccontextmanager
 
 import redis.asyncio as aioredis
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.middleware.sessions import SessionMiddleware
 from strawberry.fastapi import GraphQLRouter
 
 from app.api.v1 import router as api_router
 from app.config import settings
-from app.database import get_db, engine
+from app.database import engine, get_db, pool_metrics
+from app.graphql.loaders import create_loaders
 from app.graphql.schema import schema
 from app.jobs.scheduler import start_scheduler, stop_scheduler
+from app.services.dislikes import new_client as new_dislikes_client
 
 
 @asynccontextmanager
@@ -19,11 +22,18 @@ async def lifespan(app: FastAPI):
     # connect redis once at startup and store it on app.state so any route can use it
     redis = aioredis.from_url(settings.redis_url, decode_responses=True)
     app.state.redis = redis
+    # second client that leaves values as bytes — for compressed / binary cache entries
+    redis_bytes = aioredis.from_url(settings.redis_url)
+    app.state.redis_bytes = redis_bytes
+    # one pooled http client for the dislikes api, reused across requests
+    app.state.dislikes_client = new_dislikes_client()
     start_scheduler()
     yield
     # clean up on shutdown
     stop_scheduler()
+    await app.state.dislikes_client.aclose()
     await redis.aclose()
+    await redis_bytes.aclose()
 
 
 app = FastAPI(
@@ -44,10 +54,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-async def get_graphql_context(request: Request) -> dict:
-    """injects request + db session into every graphql resolver via info.context."""
-    async for db in get_db():
-        return {"request": request, "db": db}
+async def get_graphql_context(request: Request, db: AsyncSession = Depends(get_db)) -> dict:
+    """injects request + db session + this request's dataloaders into every graphql
+    resolver via info.context. the session comes from the same get_db dependency the
+    rest routes use, so fastapi closes it when the request finishes — returning from
+    inside `async for db in get_db()` left the generator suspended and the connection
+    checked out until it happened to be garbage collected."""
+    return {"request": request, "db": db, "loaders": create_loaders(db)}
 
 
 graphql_router = GraphQLRouter(schema, context_getter=get_graphql_context)
@@ -76,4 +89,4 @@ async def health(request: Request):
         checks["redis"] = f"error: {e}"
 
     overall = "ok" if all(v == "ok" for v in checks.values()) else "degraded"
-    return {"status": overall, **checks}
+    return {"status": overall, **checks, "db_pool": pool_metrics()}
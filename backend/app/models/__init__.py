@@ -3,16 +3,32 @@
 from app.models.alerts import Alert
 from app.models.channels import Channel
 from app.models.ml import Cluster, ClusterMembership, Prediction, VideoEmbedding
-from app.models.stats import VideoAnalytics, VideoStats
+from app.models.stats import (
+    ChannelPeriodStats,
+    ProcessedReport,
+    VideoAnalytics,
+    VideoDailyAnalytics,
+    VideoDailyReach,
+    VideoDislikes,
+    VideoMetrics,
+    VideoStats,
+)
 from app.models.users import User
-from app.models.videos import Video
+from app.models.videos import Video, VideoFeatures
 
 __all__ = [
     "User",
     "Channel",
     "Video",
+    "VideoFeatures",
     "VideoStats",
     "VideoAnalytics",
+    "VideoDailyAnalytics",
+    "VideoMetrics",
+    "ChannelPeriodStats",
+    "VideoDailyReach",
+    "ProcessedReport",
+    "VideoDislikes",
     "VideoEmbedding",
     "Cluster",
     "ClusterMembership",
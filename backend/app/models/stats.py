@@ -89,3 +89,168 @@ class ChannelDailyStats(Base):
     # revenue — requires yt-analytics-monetary.readonly scope
     estimated_revenue: Mapped[float | None] = mapped_column(sa.Float)
     fetched_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), default=utcnow)
+
+
+class VideoDailyAnalytics(Base):
+    """real daily numbers per video. views/likes/comments come from the analytics api
+    (dimensions=day) — backfilled the first time a video's history is opened, then only
+    topped up with the days after the newest stored one. every sync also bulk-loads the
+    whole channel from the reporting api's daily csvs, which fills the rest too.
+    the video page's history reads straight from here."""
+
+    __tablename__ = "video_daily_analytics"
+
+    __table_args__ = (sa.PrimaryKeyConstraint("video_id", "date"),)
+
+    video_id: Mapped[uuid.UUID] = mapped_column(sa.Uuid, sa.ForeignKey("videos.id", ondelete="CASCADE"))
+    date: Mapped[date] = mapped_column(sa.Date)
+    views: Mapped[int] = mapped_column(sa.Integer, default=0)
+    likes: Mapped[int] = mapped_column(sa.Integer, default=0)
+    comments: Mapped[int] = mapped_column(sa.Integer, default=0)
+    # reporting api only — null for days that so far only came from the analytics api
+    watch_time_minutes: Mapped[float | None] = mapped_column(sa.Float)
+    shares: Mapped[int | None] = mapped_column(sa.Integer)
+    subscribers_gained: Mapped[int | None] = mapped_column(sa.Integer)
+    subscribers_lost: Mapped[int | None] = mapped_column(sa.Integer)
+    # from the revenue report, if the channel has one (monetized channels only)
+    estimated_revenue: Mapped[float | None] = mapped_column(sa.Float)
+    fetched_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), default=utcnow)
+
+
+class ChannelPeriodStats(Base):
+    """weekly + monthly rollups of channel_daily_stats for the charts page. stores the
+    summable pieces (totals, impressions×ctr, duration sum + count) rather than finished
+    averages, so weighted ctr / rpm / avg duration come out exactly the same as
+    aggregating the daily rows. sync re-rolls only the periods its upsert touched."""
+
+    __tablename__ = "channel_period_stats"
+
+    __table_args__ = (sa.PrimaryKeyConstraint("channel_id", "granularity", "period_start"),)
+
+    channel_id: Mapped[uuid.UUID] = mapped_column(sa.Uuid, sa.ForeignKey("channels.id", ondelete="CASCADE"))
+    # "weekly" or "monthly" — same names the charts api takes
+    granularity: Mapped[str] = mapped_column(sa.String(10))
+    period_start: Mapped[date] = mapped_column(sa.Date)
+    views: Mapped[int] = mapped_column(sa.BigInteger, default=0)
+    likes: Mapped[int] = mapped_column(sa.BigInteger, default=0)
+    comments: Mapped[int] = mapped_column(sa.BigInteger, default=0)
+    subscribers_gained: Mapped[int] = mapped_column(sa.BigInteger, default=0)
+    impressions: Mapped[int] = mapped_column(sa.BigInteger, default=0)
+    # sum of daily ctr × impressions — divide by impressions for the weighted ctr
+    ctr_weighted: Mapped[float] = mapped_column(sa.Float, default=0.0)
+    watch_time_minutes: Mapped[float] = mapped_column(sa.Float, default=0.0)
+    revenue: Mapped[float] = mapped_column(sa.Float, default=0.0)
+    # sum + count of the daily average view durations that weren't null
+    avg_view_duration_sum: Mapped[float] = mapped_column(sa.Float, default=0.0)
+    avg_view_duration_n: Mapped[int] = mapped_column(sa.Integer, default=0)
+    computed_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), default=utcnow)
+
+
+class VideoDailyReach(Base):
+    """thumbnail impressions + ctr per video per day, from the reporting api's daily reach
+    csvs. ctr is the impressions-weighted average over the report's country /
+    subscribed split, stored as a 0–1 fraction like everywhere else."""
+
+    __tablename__ = "video_daily_reach"
+
+    __table_args__ = (
+        sa.PrimaryKeyConstraint("video_id", "date"),
+        # rows arrive roughly in date order, so a brin index stays tiny and still lets
+        # "last n days" across a channel skip everything older
+        sa.Index("ix_video_daily_reach_date_brin", "date", postgresql_using="brin"),
+    )
+
+    video_id: Mapped[uuid.UUID] = mapped_column(sa.Uuid, sa.ForeignKey("videos.id", ondelete="CASCADE"))
+    date: Mapped[date] = mapped_column(sa.Date)
+    impressions: Mapped[int] = mapped_column(sa.Integer, default=0)
+    click_through_rate: Mapped[float | None] = mapped_column(sa.Float)
+
+
+class ProcessedReport(Base):
+    """ledger of reporting api csv files already ingested, by report id, so a sync only
+    downloads the ones that aren't in it yet — including any that failed last time. a
+    report google re-issues for the same day comes with a new id + create time and gets
+    ingested over the old one."""
+
+    __tablename__ = "processed_reports"
+
+    __table_args__ = (sa.Index("ix_processed_reports_job_created", "job_id", "create_time"),)
+
+    report_id: Mapped[str] = mapped_column(sa.String(255), primary_key=True)
+    job_id: Mapped[str] = mapped_column(sa.String(255))
+    channel_id: Mapped[uuid.UUID] = mapped_column(sa.Uuid, sa.ForeignKey("channels.id", ondelete="CASCADE"))
+    create_time: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True))
+    processed_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), default=utcnow)
+
+
+class VideoMetrics(Base):
+    """one row per video holding its latest counters plus the derived metrics we rank by.
+    recomputed in a single upsert at the end of every sync so ranking by any of them is an
+    indexed read instead of a latest-snapshot join + python recompute."""
+
+    __tablename__ = "video_metrics"
+
+    __table_args__ = (
+        sa.Index("ix_video_metrics_channel_views", "channel_id", "view_count"),
+        sa.Index("ix_video_metrics_channel_views_per_day", "channel_id", "views_per_day"),
+        sa.Index("ix_video_metrics_channel_views_last_30d", "channel_id", "views_last_30d"),
+        sa.Index("ix_video_metrics_channel_watch_time", "channel_id", "estimated_minutes_watched"),
+        sa.Index("ix_video_metrics_channel_revenue", "channel_id", "estimated_revenue"),
+        sa.Index("ix_video_metrics_channel_rpm", "channel_id", "rpm"),
+        sa.Index("ix_video_metrics_channel_ctr", "channel_id", "click_through_rate"),
+        sa.Index("ix_video_metrics_channel_engagement", "channel_id", "engagement_rate"),
+        sa.Index("ix_video_metrics_channel_comment_rate", "channel_id", "comment_rate"),
+        sa.Index("ix_video_metrics_channel_avg_view_pct", "channel_id", "average_view_percentage"),
+        sa.Index("ix_video_metrics_channel_ctr_last_28d", "channel_id", "ctr_last_28d"),
+        # desc nulls last for the nullable sorts — the asc indexes walked backwards put nulls first
+        sa.Index("ix_video_metrics_channel_revenue_desc", "channel_id", sa.text("estimated_revenue DESC NULLS LAST")),
+        sa.Index("ix_video_metrics_channel_rpm_desc", "channel_id", sa.text("rpm DESC NULLS LAST")),
+        sa.Index(
+            "ix_video_metrics_channel_avg_view_pct_desc", "channel_id", sa.text("average_view_percentage DESC NULLS LAST")
+        ),
+        sa.Index("ix_video_metrics_channel_ctr_last_28d_desc", "channel_id", sa.text("ctr_last_28d DESC NULLS LAST")),
+    )
+
+    video_id: Mapped[uuid.UUID] = mapped_column(
+        sa.Uuid, sa.ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True
+    )
+    channel_id: Mapped[uuid.UUID] = mapped_column(sa.Uuid, sa.ForeignKey("channels.id", ondelete="CASCADE"))
+    # latest public counters (from the newest video_stats snapshot)
+    view_count: Mapped[int] = mapped_column(sa.BigInteger)
+    like_count: Mapped[int] = mapped_column(sa.BigInteger)
+    comment_count: Mapped[int] = mapped_column(sa.BigInteger)
+    # lifetime average — views / days since publish
+    views_per_day: Mapped[float] = mapped_column(sa.Float)
+    # likes / comments per 100 views, 0 for videos with no views yet
+    engagement_rate: Mapped[float] = mapped_column(sa.Float, default=0.0)
+    comment_rate: Mapped[float] = mapped_column(sa.Float, default=0.0)
+    # rolling 30-day total from the analytics api, null if that call failed
+    views_last_30d: Mapped[int | None] = mapped_column(sa.BigInteger)
+    # copied from the newest video_analytics row
+    estimated_minutes_watched: Mapped[float | None] = mapped_column(sa.Float)
+    estimated_revenue: Mapped[float | None] = mapped_column(sa.Float)
+    rpm: Mapped[float | None] = mapped_column(sa.Float)
+    click_through_rate: Mapped[float | None] = mapped_column(sa.Float)
+    impressions: Mapped[int | None] = mapped_column(sa.Integer)
+    # windowed reach from video_daily_reach — null until the video has reach days there
+    ctr_first_7d: Mapped[float | None] = mapped_column(sa.Float)
+    ctr_last_28d: Mapped[float | None] = mapped_column(sa.Float)
+    impressions_last_28d: Mapped[int | None] = mapped_column(sa.BigInteger)
+    average_view_duration_seconds: Mapped[float | None] = mapped_column(sa.Float)
+    # api value, or watch time / duration when the api doesn't give us one
+    average_view_percentage: Mapped[float | None] = mapped_column(sa.Float)
+    computed_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), default=utcnow)
+
+
+class VideoDislikes(Base):
+    """latest vote counts from the return youtube dislike api, keyed by youtube id.
+    filled in the background after every sync so the dislikes endpoint can answer
+    from postgres instead of waiting on a third-party api."""
+
+    __tablename__ = "video_dislikes"
+
+    # no fk — the endpoint will look up (and remember) any id it's asked about
+    youtube_video_id: Mapped[str] = mapped_column(sa.String(255), primary_key=True)
+    dislikes: Mapped[int] = mapped_column(sa.BigInteger)
+    likes: Mapped[int | None] = mapped_column(sa.BigInteger)
+    fetched_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), default=utcnow)
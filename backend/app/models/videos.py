@@ -15,6 +15,13 @@ def utcnow() -> datetime:
 class Video(Base):
     __tablename__ = "videos"
 
+    __table_args__ = (
+        # the video list's date-range filter + the autopsy window both walk this
+        sa.Index("ix_videos_channel_published", "channel_id", "published_at"),
+        # tag containment filters (tags @> array[...])
+        sa.Index("ix_videos_tags", "tags", postgresql_using="gin"),
+    )
+
     id: Mapped[uuid.UUID] = mapped_column(sa.Uuid, primary_key=True, default=uuid.uuid4)
     channel_id: Mapped[uuid.UUID] = mapped_column(sa.Uuid, sa.ForeignKey("channels.id", ondelete="CASCADE"))
     youtube_video_id: Mapped[str] = mapped_column(sa.String(255), unique=True)
@@ -52,3 +59,28 @@ class VideoComment(Base):
     published_at: Mapped[datetime | None] = mapped_column(sa.DateTime(timezone=True))
     updated_at_youtube: Mapped[datetime | None] = mapped_column(sa.DateTime(timezone=True))
     fetched_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), default=utcnow)
+
+
+class VideoFeatures(Base):
+    """title + metadata features extracted once per video at sync time (see
+    app.utils.title_features). title_hash lets sync skip titles that haven't changed, and
+    autopsy / the title lab aggregate these columns instead of re-parsing text."""
+
+    __tablename__ = "video_features"
+
+    video_id: Mapped[uuid.UUID] = mapped_column(
+        sa.Uuid, sa.ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True
+    )
+    title_hash: Mapped[str] = mapped_column(sa.String(40))
+    title_length: Mapped[int] = mapped_column(sa.Integer)
+    word_count: Mapped[int] = mapped_column(sa.Integer)
+    has_number: Mapped[bool] = mapped_column(sa.Boolean)
+    has_question: Mapped[bool] = mapped_column(sa.Boolean)
+    has_exclamation: Mapped[bool] = mapped_column(sa.Boolean)
+    has_all_caps: Mapped[bool] = mapped_column(sa.Boolean)
+    has_colon: Mapped[bool] = mapped_column(sa.Boolean)
+    has_brackets: Mapped[bool] = mapped_column(sa.Boolean)
+    # lowercased meaningful words (stopwords + < 3 char words already dropped)
+    title_tokens: Mapped[list] = mapped_column(ARRAY(sa.Text))
+    duration_bucket: Mapped[str] = mapped_column(sa.String(20))
+    computed_at: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), default=utcnow)
@@ -0,0 +1,800 @@
+import json
+from decimal import Decimal
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stats import VideoMetrics
+from app.models.videos import Video, VideoFeatures
+from app.utils.title_features import DURATION_BUCKETS, extract_title_features
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+CATEGORY_NAMES = {
+    "1": "Film & Animation", "2": "Autos & Vehicles", "10": "Music",
+    "15": "Pets & Animals", "17": "Sports", "19": "Travel & Events",
+    "20": "Gaming", "22": "People & Blogs", "23": "Comedy",
+    "24": "Entertainment", "25": "News & Politics", "26": "Howto & Style",
+    "27": "Education", "28": "Science & Technology", "29": "Nonprofits & Activism",
+}
+
+# rank_by option → window column it ranks on. each one is a precomputed, indexed
+# column on video_metrics so switching metric never means recomputing anything
+RANK_METRICS = {
+    "views": "view_count",
+    "views_per_day": "lifetime_views_per_day",
+    "recent_views": "views_last_30d",
+    "watch_time": "estimated_minutes_watched",
+    "revenue": "estimated_revenue",
+    "rpm": "rpm",
+    "ctr": "ctr",
+    "ctr_first_7d": "ctr_first_7d",
+    "ctr_last_28d": "ctr_last_28d",
+}
+
+# key metric → multiplier applied before averaging (ctr is stored as 0–1, shown as %)
+KEY_METRICS = {
+    "views_per_day": 1,
+    "view_count": 1,
+    "ctr": 100,
+    "ctr_first_7d": 100,
+    "ctr_last_28d": 100,
+    "avg_view_duration": 1,
+    "avg_view_pct": 1,
+    "engagement_rate": 1,
+    "comment_rate": 1,
+    "impressions": 1,
+    "estimated_minutes_watched": 1,
+    "rpm": 1,
+    "estimated_revenue": 1,
+    "duration_seconds": 1,
+}
+
+TITLE_FLAGS = ["has_number", "has_question", "has_exclamation", "has_all_caps", "has_colon", "has_brackets"]
+
+# bump this whenever the shape of the stored state changes so old entries get rebuilt
+STATE_VERSION = 2
+# the aggregate state outlives the 30 min result cache — it's what makes the
+# recompute after a sync cheap, so it has to survive the cache bust
+STATE_TTL = 7 * 24 * 3600
+
+
+def _build_timeline(ranked: list, tier_count: int) -> list:
+    """tag every video in the window with its rank percentile (0.0 = best, 1.0 = worst)
+    so the frontend can render a smooth color spectrum instead of fixed tier colors.
+    rank_pct comes straight from postgres' percent_rank()."""
+    n = len(ranked)
+    return [
+        {
+            "id": str(r.id),
+            "title": r.title,
+            "published_at": r.published_at.date().isoformat(),
+            "group": "top" if i < tier_count else "bottom" if i >= n - tier_count else "mid",
+            "rank_pct": float(r.rank_pct),
+        }
+        for i, r in enumerate(ranked)  # already ordered best→worst by the query
+    ]
+
+
+def _f(val) -> float | None:
+    """postgres hands numeric aggregates back as Decimal — normalize to float."""
+    return float(val) if val is not None else None
+
+
+def _member(row) -> dict:
+    """turn a tier member row from the ranked cte into the dict the sections work on.
+    it gets stored in the aggregate state as json, so everything is made json-safe here."""
+    v = {k: _f(val) if isinstance(val, Decimal) else val for k, val in row._mapping.items()}
+    v["id"] = str(v["id"])
+    v["published_at"] = v["published_at"].isoformat()
+    v["tags"] = v["tags"] or []
+    v.pop("fingerprint", None)
+    v.pop("tier", None)
+    # precomputed at sync — extract on the spot if this video slipped in before its features did
+    if v["title_length"] is None:
+        v.update(extract_title_features(v["title"]))
+    return v
+
+
+def _contribution(row) -> dict:
+    """the handful of values one eligible video adds to the window-wide breakdowns."""
+    return {
+        "fp": row.fingerprint,
+        "vpd": _f(row.views_per_day),
+        "views": row.view_count,
+        "revenue": _f(row.estimated_revenue),
+        "dow": row.dow,
+        "bucket": row.duration_bucket,
+        "quarter": f"{row.pub_year}-{row.pub_quarter}",
+    }
+
+
+def _delta_pct(top: float | None, bottom: float | None) -> float | None:
+    """how much better top is vs bottom as a percentage. positive = top winning."""
+    if top is None or bottom is None or bottom == 0:
+        return None
+    return round((top - bottom) / abs(bottom) * 100, 1)
+
+
+def _tier_bounds(n: int, tier_pct: int) -> tuple[int, int, int]:
+    """work out how many videos go in each tier and which 1-based ranks make up the
+    centered "average" sample. returns (tier_count, avg_rank_start, avg_rank_end) —
+    the avg range is empty (start > end) when there's no middle group."""
+    tier_count = max(2, round(n * tier_pct / 100))
+
+    # middle group = everyone who isn't top or bottom
+    middle_len = n - 2 * tier_count if n > 2 * tier_count else 0
+    if not middle_len:
+        return tier_count, tier_count + 1, tier_count
+
+    # take a centered sample the same size as tier_count so the card stays consistent
+    center = middle_len // 2
+    n_sample = min(max(1, tier_count // 2), middle_len)
+    half = n_sample // 2
+    m_start = max(0, center - half)
+    m_end = m_start + n_sample
+    if m_end > middle_len:
+        m_end = middle_len
+        m_start = max(0, m_end - n_sample)
+    return tier_count, tier_count + m_start + 1, tier_count + m_end
+
+
+def _tier_of(rank: int, n: int, tier_count: int, avg_start: int, avg_end: int) -> str:
+    """python twin of _tier_expr for a 1-based rank."""
+    if rank <= tier_count:
+        return "top"
+    if rank > n - tier_count:
+        return "bottom"
+    if avg_start <= rank <= avg_end:
+        return "avg"
+    return "mid"
+
+
+def _window_cte(channel_id: UUID, window_size: int) -> sa.CTE:
+    """the N most recent videos with their precomputed metrics and title features (see
+    VideoMetrics / VideoFeatures, both refreshed every sync) plus the few derived fields
+    the autopsy shows on top of them."""
+    m = VideoMetrics
+
+    return (
+        select(
+            Video.id,
+            Video.youtube_video_id,
+            Video.title,
+            Video.thumbnail_url,
+            Video.published_at,
+            Video.duration_seconds,
+            Video.is_short,
+            Video.category_id,
+            Video.tags,
+            m.view_count,
+            m.like_count,
+            m.comment_count,
+            # use 30-day rolling total if available, fall back to lifetime average
+            func.coalesce(m.views_last_30d / 30.0, m.views_per_day).label("views_per_day"),
+            m.views_per_day.label("lifetime_views_per_day"),
+            m.views_last_30d,  # null if the analytics api call failed during sync
+            m.engagement_rate,
+            m.comment_rate,
+            # analytics may be null if the analytics api hasn't synced yet
+            m.click_through_rate.label("ctr"),
+            # impressions-weighted over the video's launch week / the last 28 days, from
+            # the daily reach rows — null until reach reports cover the video
+            m.ctr_first_7d,
+            m.ctr_last_28d,
+            m.average_view_duration_seconds.label("avg_view_duration"),
+            m.average_view_percentage.label("avg_view_pct"),
+            m.impressions,
+            m.estimated_minutes_watched,
+            m.rpm,
+            m.estimated_revenue,
+            # precomputed at sync — null only if a video slipped in before its features did
+            func.coalesce(VideoFeatures.duration_bucket, "Unknown").label("duration_bucket"),
+            VideoFeatures.title_length,
+            VideoFeatures.word_count,
+            VideoFeatures.has_number,
+            VideoFeatures.has_question,
+            VideoFeatures.has_exclamation,
+            VideoFeatures.has_all_caps,
+            VideoFeatures.has_colon,
+            VideoFeatures.has_brackets,
+            VideoFeatures.title_tokens,
+        )
+        .join(m, m.video_id == Video.id)
+        .outerjoin(VideoFeatures, VideoFeatures.video_id == Video.id)
+        .where(Video.channel_id == channel_id)
+        .order_by(Video.published_at.desc())
+        .limit(window_size)
+        .cte("autopsy_window")
+    )
+
+
+def _ranked_cte(window: sa.CTE, rank_by: str) -> sa.CTE:
+    """drop shorts and junk, then rank what's left by the chosen metric (total view count
+    by default — this is what actually defines a video's impact). videos with no value for
+    the metric yet (e.g. no revenue data) can't be ranked and are left out. ties go to the
+    newer video. each row also gets a fingerprint over everything the autopsy reads from
+    it, which is how the incremental path spots the videos that changed."""
+    metric = window.c[RANK_METRICS[rank_by]]
+    order = (metric.desc(), window.c.published_at.desc(), window.c.id)
+    eligible = (
+        # exclude shorts — they perform completely differently and would skew all metrics
+        window.c.is_short.is_(False)
+        # exclude livestreams (duration 0 or None — youtube returns "P0D" for live broadcasts)
+        & (func.coalesce(window.c.duration_seconds, 0) > 0)
+        # and videos with ≤1 total view (unpublished drafts, accidental uploads, etc.)
+        & (window.c.view_count > 1)
+        & metric.is_not(None)
+    )
+    published_utc = func.timezone("UTC", window.c.published_at)
+    return (
+        select(
+            window,
+            func.row_number().over(order_by=order).label("rn"),
+            func.percent_rank().over(order_by=order).label("rank_pct"),
+            sa.cast(sa.extract("isodow", published_utc) - 1, sa.Integer).label("dow"),
+            sa.cast(sa.extract("year", published_utc), sa.Integer).label("pub_year"),
+            sa.cast(sa.extract("quarter", published_utc), sa.Integer).label("pub_quarter"),
+            func.md5(func.concat_ws("|", *window.c)).label("fingerprint"),
+        )
+        .where(eligible)
+        .cte("autopsy_ranked")
+    )
+
+
+def _tier_expr(ranked: sa.CTE, n: int, tier_count: int, avg_start: int, avg_end: int) -> sa.Case:
+    """label each ranked row top / bottom / avg (the shown middle sample) / mid."""
+    return sa.case(
+        (ranked.c.rn <= tier_count, "top"),
+        (ranked.c.rn > n - tier_count, "bottom"),
+        (ranked.c.rn.between(avg_start, avg_end), "avg"),
+        else_="mid",
+    )
+
+
+# ── mergeable aggregates ──────────────────────────────────────────────────────
+#
+# everything the sections show is derived from sums, counts and counters, so a
+# video can be taken out of (sign=-1) or put back into (sign=+1) the aggregates
+# without touching any other video. the full recompute seeds them from postgres,
+# the incremental path only applies the videos whose fingerprint moved.
+
+
+def _bump(counter: dict, key, delta: int) -> None:
+    """add delta to a counter entry, dropping it once it hits zero so that key
+    membership (e.g. "tag appears in this tier") stays accurate."""
+    count = counter.get(key, 0) + delta
+    if count:
+        counter[key] = count
+    else:
+        counter.pop(key, None)
+
+
+def _empty_window() -> dict:
+    # day → [count, sum_vpd], bucket → [count, sum_vpd, sum_views],
+    # "year-quarter" → [count, sum_vpd, sum_views, sum_revenue, revenue_count]
+    return {"day": {}, "bucket": {}, "quarter": {}}
+
+
+def _empty_group() -> dict:
+    return {
+        "n": 0,
+        "metrics": {field: [0.0, 0] for field in KEY_METRICS},
+        "tag_total": 0,
+        "title_length": 0,
+        "word_count": 0,
+        "flags": dict.fromkeys(TITLE_FLAGS, 0),
+        "tokens": {},
+        "tags": {},
+        "categories": {},  # name → [count, sum_vpd]
+        "days": {},
+        "buckets": {},
+    }
+
+
+def _apply_window(window: dict, c: dict, sign: int) -> None:
+    """add (sign=1) or remove (sign=-1) one eligible video's window-wide contribution."""
+
+    def add(group: dict, key: str, values: list) -> None:
+        acc = group.setdefault(key, [0] * len(values))
+        for i, val in enumerate(values):
+            acc[i] += sign * val
+        if not acc[0]:
+            del group[key]
+
+    has_rev = c["revenue"] is not None
+    add(window["day"], str(c["dow"]), [1, c["vpd"]])
+    if c["bucket"] != "Unknown":
+        add(window["bucket"], c["bucket"], [1, c["vpd"], c["views"]])
+    add(window["quarter"], c["quarter"], [1, c["vpd"], c["views"], c["revenue"] if has_rev else 0.0, int(has_rev)])
+
+
+def _apply_member(group: dict, v: dict, sign: int) -> None:
+    """add (sign=1) or remove (sign=-1) one tier member from its tier's aggregates."""
+    group["n"] += sign
+    for field, multiplier in KEY_METRICS.items():
+        if v[field] is not None:
+            acc = group["metrics"][field]
+            acc[0] += sign * v[field] * multiplier
+            acc[1] += sign
+
+    group["tag_total"] += sign * len(v["tags"])
+    for tag in v["tags"]:
+        _bump(group["tags"], tag.lower().strip(), sign)
+
+    group["title_length"] += sign * v["title_length"]
+    group["word_count"] += sign * v["word_count"]
+    for flag in TITLE_FLAGS:
+        group["flags"][flag] += sign * int(v[flag])
+    for token in v["title_tokens"]:
+        _bump(group["tokens"], token, sign)
+
+    name = CATEGORY_NAMES.get(v["category_id"], "Unknown") if v["category_id"] else "Unknown"
+    cat = group["categories"].setdefault(name, [0, 0.0])
+    cat[0] += sign
+    cat[1] += sign * v["views_per_day"]
+    if not cat[0]:
+        del group["categories"][name]
+
+    _bump(group["days"], str(v["dow"]), sign)
+    _bump(group["buckets"], v["duration_bucket"], sign)
+
+
+def _seed_window(agg_rows: list) -> dict:
+    """load the window-wide grouping-sets rows from the full recompute into the
+    same structure _apply_window maintains."""
+    window = _empty_window()
+    for r in agg_rows:
+        if r.dow is not None:
+            window["day"][str(r.dow)] = [r.count, _f(r.sum_vpd)]
+        elif r.bucket is not None and r.bucket != "Unknown":
+            window["bucket"][r.bucket] = [r.count, _f(r.sum_vpd), int(r.sum_views)]
+        elif r.pub_year is not None:
+            window["quarter"][f"{r.pub_year}-{r.pub_quarter}"] = [
+                r.count, _f(r.sum_vpd), int(r.sum_views), _f(r.sum_revenue) or 0.0, r.revenue_n,
+            ]
+    return window
+
+
+def _seed_group(agg_row, members: list[dict]) -> dict:
+    """tier aggregates for the full recompute — metric sums come from postgres, the
+    counters from the member rows we had to fetch anyway."""
+    group = _empty_group()
+    for v in members:
+        _apply_member(group, v, 1)
+    if agg_row is not None:
+        # postgres' sums replace the python ones so the seed matches the sql exactly
+        group["metrics"] = {
+            field: [_f(getattr(agg_row, f"{field}_sum")) or 0.0, getattr(agg_row, f"{field}_n")]
+            for field in KEY_METRICS
+        }
+    return group
+
+
+# ── sections ──────────────────────────────────────────────────────────────────
+
+
+def _ranked_items(counter: dict, limit: int) -> list[tuple[str, int]]:
+    # ties broken alphabetically so the full and incremental paths agree on order
+    return sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+
+
+def _avg(total: float, count: int) -> float | None:
+    return total / count if count else None
+
+
+def _key_metrics(groups: dict) -> dict:
+    top, bottom = groups["top"], groups["bottom"]
+
+    def compare(field: str) -> dict:
+        """avg for top and bottom groups and the delta between them."""
+        top_avg = _avg(*top["metrics"][field])
+        bot_avg = _avg(*bottom["metrics"][field])
+        return {
+            "top": round(top_avg, 3) if top_avg is not None else None,
+            "bottom": round(bot_avg, 3) if bot_avg is not None else None,
+            "delta_pct": _delta_pct(top_avg, bot_avg),
+            "top_available": top["metrics"][field][1],
+            "bottom_available": bottom["metrics"][field][1],
+        }
+
+    top_tag_avg = _avg(top["tag_total"], top["n"])
+    bot_tag_avg = _avg(bottom["tag_total"], bottom["n"])
+
+    key_metrics = {field: compare(field) for field in KEY_METRICS}
+    key_metrics["tag_count"] = {
+        "top": round(top_tag_avg, 1) if top_tag_avg is not None else None,
+        "bottom": round(bot_tag_avg, 1) if bot_tag_avg is not None else None,
+        "delta_pct": _delta_pct(top_tag_avg, bot_tag_avg),
+        "top_available": top["n"],
+        "bottom_available": bottom["n"],
+    }
+    return key_metrics
+
+
+def _title_analysis(group: dict) -> dict:
+    """the structural + linguistic title features of a tier, from its counters."""
+    n = group["n"]
+    if not n:
+        return {}
+    return {
+        "avg_length": round(group["title_length"] / n, 1),
+        "avg_word_count": round(group["word_count"] / n, 1),
+        **{f"{flag}_pct": round(group["flags"][flag] / n * 100) for flag in TITLE_FLAGS},
+        "top_words": [{"word": w, "count": c} for w, c in _ranked_items(group["tokens"], 10)],
+    }
+
+
+def _schedule_analysis(groups: dict, window: dict) -> dict:
+    def day_breakdown(group: dict) -> dict:
+        return {DAYS[i]: group["days"].get(str(i), 0) for i in range(7)}
+
+    # average views/day by publish day across all window videos (not just top/bottom)
+    day_avg_vpd = {int(d): round(s / c, 1) for d, (c, s) in sorted(window["day"].items())}
+
+    best_day_idx = max(day_avg_vpd, key=day_avg_vpd.get) if day_avg_vpd else None
+    worst_day_idx = min(day_avg_vpd, key=day_avg_vpd.get) if day_avg_vpd else None
+
+    return {
+        "top": day_breakdown(groups["top"]),
+        "bottom": day_breakdown(groups["bottom"]),
+        # avg views/day for each publish day across all window videos
+        "avg_vpd_by_day": {DAYS[d]: v for d, v in day_avg_vpd.items()},
+        "best_day": DAYS[best_day_idx] if best_day_idx is not None else None,
+        "worst_day": DAYS[worst_day_idx] if worst_day_idx is not None else None,
+    }
+
+
+def _duration_analysis(groups: dict, window: dict, top: list, bottom: list) -> dict:
+    def bucket_breakdown(group: dict) -> dict:
+        return {b: group["buckets"].get(b, 0) for b in DURATION_BUCKETS + ["Unknown"]}
+
+    buckets = [(b, window["bucket"][b]) for b in DURATION_BUCKETS if b in window["bucket"]]
+    bucket_avg_vpd = {b: round(s / c, 1) for b, (c, s, _) in buckets}
+    bucket_total_views = {b: int(views) for b, (_, _, views) in buckets}
+
+    # star goes to whichever bucket has the best top:bottom ratio
+    top_bucket_counts = bucket_breakdown(groups["top"])
+    bottom_bucket_counts = bucket_breakdown(groups["bottom"])
+    bucket_ratio = {
+        b: top_bucket_counts.get(b, 0) / max(bottom_bucket_counts.get(b, 0), 1)
+        for b in DURATION_BUCKETS
+        if top_bucket_counts.get(b, 0) > 0 or bottom_bucket_counts.get(b, 0) > 0
+    }
+    best_bucket = max(bucket_ratio, key=bucket_ratio.get) if bucket_ratio else None
+
+    return {
+        "top": top_bucket_counts,
+        "bottom": bottom_bucket_counts,
+        "avg_vpd_by_bucket": bucket_avg_vpd,
+        "total_views_by_bucket": bucket_total_views,
+        "best_bucket": best_bucket,
+        "shorts_pct_top": round(sum(1 for v in top if v["is_short"]) / len(top) * 100),
+        "shorts_pct_bottom": round(sum(1 for v in bottom if v["is_short"]) / len(bottom) * 100),
+    }
+
+
+def _tag_analysis(groups: dict) -> dict:
+    # find tags that appear in both groups — these don't tell us anything useful
+    # since they're equally common in top and bottom performers
+    shared_tags = groups["top"]["tags"].keys() & groups["bottom"]["tags"].keys()
+
+    def tag_stats(group: dict) -> dict:
+        avg_val = _avg(group["tag_total"], group["n"])
+        # only keep tags unique to this group
+        exclusive = [(t, c) for t, c in _ranked_items(group["tags"], 20) if t not in shared_tags]
+        return {
+            "avg_count": round(avg_val, 1) if avg_val is not None else 0.0,
+            "top_tags": [{"tag": t, "count": c} for t, c in exclusive[:12]],
+        }
+
+    return {
+        "top": tag_stats(groups["top"]),
+        "bottom": tag_stats(groups["bottom"]),
+        "shared_count": len(shared_tags),
+    }
+
+
+def _category_breakdown(group: dict) -> list:
+    return sorted(
+        [
+            {"name": name, "count": count, "avg_vpd": round(vpd / count, 1)}
+            for name, (count, vpd) in group["categories"].items()
+        ],
+        key=lambda x: (-x["count"], x["name"]),
+    )
+
+
+def _quarterly_breakdown(window: dict) -> list:
+    quarters = sorted(
+        ((tuple(map(int, key.split("-"))), vals) for key, vals in window["quarter"].items()),
+        key=lambda kv: kv[0],
+    )
+    return [
+        {
+            "label": f"Q{q_num} {year}",
+            "year": year,
+            "quarter": q_num,
+            "count": count,
+            "avg_views_per_day": round(sum_vpd / count, 1),
+            "total_views": int(sum_views),
+            "avg_revenue": round(sum_rev / rev_n, 2) if rev_n else None,
+        }
+        for (year, q_num), (count, sum_vpd, sum_views, sum_rev, rev_n) in quarters
+    ]
+
+
+def _video_summary(v: dict) -> dict:
+    return {
+        "id": v["id"],
+        "youtube_video_id": v["youtube_video_id"],
+        "title": v["title"],
+        "thumbnail_url": v["thumbnail_url"],
+        "published_at": v["published_at"],
+        "view_count": v["view_count"],
+        "views_per_day": round(v["views_per_day"], 1),
+        "views_last_30d": v["views_last_30d"],
+        "ctr": round(v["ctr"] * 100, 2) if v["ctr"] is not None else None,
+        "ctr_first_7d": round(v["ctr_first_7d"] * 100, 2) if v["ctr_first_7d"] is not None else None,
+        "ctr_last_28d": round(v["ctr_last_28d"] * 100, 2) if v["ctr_last_28d"] is not None else None,
+        "avg_view_duration": v["avg_view_duration"],
+        "engagement_rate": round(v["engagement_rate"], 2),
+        "duration_seconds": v["duration_seconds"],
+        "is_short": v["is_short"],
+        "rpm": round(v["rpm"], 2) if v["rpm"] is not None else None,
+        "estimated_revenue": round(v["estimated_revenue"], 2) if v["estimated_revenue"] is not None else None,
+    }
+
+
+def _render(state: dict, ranked_rows: list, meta: dict) -> dict:
+    """build the response from the aggregate state — no per-video work beyond the
+    tier members themselves."""
+    groups, window = state["groups"], state["window"]
+    members, tiers = state["members"], state["tiers"]
+
+    # members come back in current rank order, which can shuffle inside a tier
+    by_tier: dict[str, list[dict]] = {"top": [], "avg": [], "bottom": []}
+    for row in ranked_rows:
+        video_id = str(row.id)
+        if video_id in members:
+            by_tier[tiers[video_id]].append(members[video_id])
+    top, avg_sample, bottom = by_tier["top"], by_tier["avg"], by_tier["bottom"]
+
+    published_dates = [row.published_at for row in ranked_rows]
+    window_oldest = min(published_dates).date().isoformat() if published_dates else None
+    window_newest = max(published_dates).date().isoformat() if published_dates else None
+
+    return {
+        "meta": {**meta, "window_oldest": window_oldest, "window_newest": window_newest},
+        "key_metrics": _key_metrics(groups),
+        "title_analysis": {"top": _title_analysis(groups["top"]), "bottom": _title_analysis(groups["bottom"])},
+        "schedule_analysis": _schedule_analysis(groups, window),
+        "duration_analysis": _duration_analysis(groups, window, top, bottom),
+        "tag_analysis": _tag_analysis(groups),
+        "category_analysis": {
+            "top": _category_breakdown(groups["top"]),
+            "bottom": _category_breakdown(groups["bottom"]),
+        },
+        "quarterly_breakdown": _quarterly_breakdown(window),
+        "timeline_videos": _build_timeline(ranked_rows, meta["tier_count"]),
+        "top_videos": [_video_summary(v) for v in top],
+        "avg_videos": [_video_summary(v) for v in avg_sample],
+        "bottom_videos": [_video_summary(v) for v in bottom],
+    }
+
+
+# ── engine ────────────────────────────────────────────────────────────────────
+
+
+async def _full_state(db: AsyncSession, ranked: sa.CTE, tier: sa.Case, ranked_rows: list, tiers: dict) -> dict:
+    """rebuild the aggregate state from scratch: tier members plus one grouping-sets
+    pass for the per-tier metric sums and the window-wide breakdowns. none of the
+    grouping columns can be null on their own, so whichever one is set tells us which
+    group a row belongs to."""
+    # full rows, but only for the tier members that actually get shown
+    member_rows = (
+        await db.execute(select(ranked, tier).where(tier != "mid").order_by(ranked.c.rn))
+    ).all()
+    members = {m["id"]: m for m in map(_member, member_rows)}
+
+    metric_aggs = []
+    for field, multiplier in KEY_METRICS.items():
+        col = ranked.c[field] * multiplier if multiplier != 1 else ranked.c[field]
+        metric_aggs += [func.sum(col).label(f"{field}_sum"), func.count(col).label(f"{field}_n")]
+
+    bucket = ranked.c.duration_bucket.label("bucket")
+    agg_rows = (
+        await db.execute(
+            select(
+                tier,
+                ranked.c.dow,
+                bucket,
+                ranked.c.pub_year,
+                ranked.c.pub_quarter,
+                func.count().label("count"),
+                func.sum(ranked.c.views_per_day).label("sum_vpd"),
+                func.sum(ranked.c.view_count).label("sum_views"),
+                func.sum(ranked.c.estimated_revenue).label("sum_revenue"),
+                func.count(ranked.c.estimated_revenue).label("revenue_n"),
+                *metric_aggs,
+            ).group_by(
+                func.grouping_sets(
+                    sa.tuple_(tier),
+                    sa.tuple_(ranked.c.dow),
+                    sa.tuple_(bucket),
+                    sa.tuple_(ranked.c.pub_year, ranked.c.pub_quarter),
+                )
+            )
+        )
+    ).all()
+    tier_aggs = {r.tier: r for r in agg_rows if r.tier is not None}
+
+    return {
+        "version": STATE_VERSION,
+        "eligible": {str(r.id): _contribution(r) for r in ranked_rows},
+        "tiers": tiers,
+        "members": members,
+        "window": _seed_window([r for r in agg_rows if r.tier is None]),
+        "groups": {
+            t: _seed_group(tier_aggs.get(t), [m for m in members.values() if tiers[m["id"]] == t])
+            for t in ("top", "bottom")
+        },
+    }
+
+
+async def _apply_changes(db: AsyncSession, state: dict, ranked: sa.CTE, ranked_rows: list) -> int:
+    """move only the videos whose fingerprint changed through the aggregates. tier
+    membership is known to be unchanged here, so every video stays in the same groups
+    and removing its old values + adding its new ones is exact. returns how many
+    videos were re-applied."""
+    changed = []
+    for row in ranked_rows:
+        video_id = str(row.id)
+        old = state["eligible"][video_id]
+        if old["fp"] == row.fingerprint:
+            continue
+        new = _contribution(row)
+        _apply_window(state["window"], old, -1)
+        _apply_window(state["window"], new, 1)
+        state["eligible"][video_id] = new
+        changed.append(row.id)
+
+    # only tier members carry per-video detail — refetch just the ones that moved
+    changed_members = [vid for vid in changed if str(vid) in state["members"]]
+    if changed_members:
+        rows = (await db.execute(select(ranked).where(ranked.c.id.in_(changed_members)))).all()
+        for row in rows:
+            new = _member(row)
+            tier = state["tiers"][new["id"]]
+            if tier in state["groups"]:
+                _apply_member(state["groups"][tier], state["members"][new["id"]], -1)
+                _apply_member(state["groups"][tier], new, 1)
+            state["members"][new["id"]] = new
+    return len(changed)
+
+
+async def build_autopsy(
+    db: AsyncSession,
+    redis,
+    channel_id: UUID,
+    window_size: int,
+    tier_pct: int,
+    rank_by: str,
+) -> dict:
+    """compare the top vs bottom performers within the N most recent videos.
+
+    ranking and tier assignment run in postgres with window functions. the sections are
+    rendered from mergeable per-tier / per-group aggregates kept in redis: when tier
+    membership hasn't moved since they were built, only the videos that changed get
+    applied as deltas; otherwise everything is rebuilt from postgres.
+    raises ValueError when there aren't enough videos to compare."""
+    window = _window_cte(channel_id, window_size)
+    ranked = _ranked_cte(window, rank_by)
+
+    # how many videos are in the window and how many the shorts / junk filters drop
+    is_junk = ~window.c.is_short & (
+        (func.coalesce(window.c.duration_seconds, 0) == 0) | (window.c.view_count <= 1)
+    )
+    window_count, shorts_excluded, junk_excluded = (
+        await db.execute(
+            select(
+                func.count(),
+                func.count().filter(window.c.is_short),
+                func.count().filter(is_junk),
+            ).select_from(window)
+        )
+    ).one()
+
+    if window_count < 4:
+        raise ValueError("not enough videos to compare — need at least 4 in the window")
+
+    # rank, percentile and fingerprint for every eligible video, plus the few values each
+    # one adds to the window-wide breakdowns. the heavy columns stay in postgres
+    ranked_rows = (
+        await db.execute(
+            select(
+                ranked.c.id,
+                ranked.c.title,
+                ranked.c.published_at,
+                ranked.c.rank_pct,
+                ranked.c.fingerprint,
+                ranked.c.views_per_day,
+                ranked.c.view_count,
+                ranked.c.estimated_revenue,
+                ranked.c.duration_bucket,
+                ranked.c.dow,
+                ranked.c.pub_year,
+                ranked.c.pub_quarter,
+            ).order_by(ranked.c.rn)
+        )
+    ).all()
+    n = len(ranked_rows)
+
+    if n < 4:
+        raise ValueError(f"not enough non-short videos with {rank_by} data to compare — need at least 4")
+
+    tier_count, avg_rank_start, avg_rank_end = _tier_bounds(n, tier_pct)
+    tiers = {}
+    for rank, row in enumerate(ranked_rows, start=1):
+        t = _tier_of(rank, n, tier_count, avg_rank_start, avg_rank_end)
+        if t != "mid":
+            tiers[str(row.id)] = t
+
+    state_key = f"autopsy-state:{channel_id}:{window_size}:{tier_pct}:{rank_by}"
+    cached_state = await redis.get(state_key)
+    state = json.loads(cached_state) if cached_state else None
+
+    if (
+        state is not None
+        and state.get("version") == STATE_VERSION
+        and state["tiers"] == tiers
+        and state["eligible"].keys() == {str(r.id) for r in ranked_rows}
+    ):
+        # no video moved — what's stored is already this state, so leave it be
+        dirty = await _apply_changes(db, state, ranked, ranked_rows) > 0
+    else:
+        tier = _tier_expr(ranked, n, tier_count, avg_rank_start, avg_rank_end).label("tier")
+        state = await _full_state(db, ranked, tier, ranked_rows, tiers)
+        dirty = True
+
+    if dirty:
+        await redis.set(state_key, json.dumps(state, default=str), ex=STATE_TTL)
+
+    meta = {
+        "window_size": n,
+        "tier_pct": tier_pct,
+        "tier_count": tier_count,
+        "shorts_excluded": shorts_excluded,
+        "junk_excluded": junk_excluded,
+        "rank_by": rank_by,
+        # eligible videos that have no value for the rank_by metric yet
+        "unranked_excluded": window_count - shorts_excluded - junk_excluded - n,
+        "avg_rank_start": avg_rank_start,
+    }
+    return _render(state, ranked_rows, meta)
+
+
+# finished reports are cached this long — sync busts the key, so it's only a backstop
+RESULT_TTL = 1800
+
+
+async def cached_autopsy(
+    db: AsyncSession,
+    redis,
+    channel_id: UUID,
+    window_size: int,
+    tier_pct: int,
+    rank_by: str,
+) -> dict:
+    """build_autopsy behind the finished-report cache the rest + graphql apis share.
+    raises ValueError like build_autopsy."""
+    cache_key = f"autopsy:{channel_id}:{window_size}:{tier_pct}:{rank_by}"
+    cached = await redis.get(cache_key)
+    if cached:
+        return json.loads(cached)
+
+    result = await build_autopsy(db, redis, channel_id, window_size, tier_pct, rank_by)
+    await redis.set(cache_key, json.dumps(result, default=str), ex=RESULT_TTL)
+    return result
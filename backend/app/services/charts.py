@@ -0,0 +1,309 @@
+import json
+import zlib
+from datetime import date, timedelta
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stats import ChannelDailyStats, ChannelPeriodStats
+from app.services.rollups import ROLLUP_UNITS, daily_components
+
+GRANULARITIES = ["daily", "weekly", "monthly"]
+
+# cached period blocks live this long — the data only changes when a sync runs,
+# and sync busts every charts:{channel_id}:* key anyway
+BLOCK_TTL = 1800
+
+# metrics that are always whole numbers — everything else is a nullable float
+INT_METRICS = {"views", "likes", "comments", "subscribers_gained", "impressions"}
+
+
+def _ctr(r) -> float | None:
+    # weighted by impressions so high-impression days count more, 0–1 → 0–100
+    # (float() throughout — sums of bigint columns come back as Decimal)
+    return round(float(r["ctr_weighted"]) / float(r["impressions"]) * 100, 3) if r["impressions"] else None
+
+
+def _rpm(r) -> float | None:
+    return round(float(r["revenue"]) / float(r["views"]) * 1000, 2) if r["views"] else None
+
+
+def _avg_view_duration(r) -> float | None:
+    # mean of the daily averages in the period
+    n = r["avg_view_duration_n"]
+    return round(float(r["avg_view_duration_sum"]) / float(n), 1) if n else None
+
+
+# metric → (summable components it's built from, how to finish one period's value).
+# ctr / rpm / avg duration come out null for periods with nothing to divide by, so the
+# frontend renders a gap instead of a fake 0
+CHART_METRICS = {
+    "views": (["views"], lambda r: int(r["views"])),
+    "likes": (["likes"], lambda r: int(r["likes"])),
+    "comments": (["comments"], lambda r: int(r["comments"])),
+    "subscribers_gained": (["subscribers_gained"], lambda r: int(r["subscribers_gained"])),
+    "impressions": (["impressions"], lambda r: int(r["impressions"])),
+    "watch_time_minutes": (["watch_time_minutes"], lambda r: round(float(r["watch_time_minutes"]), 1)),
+    "revenue": (["revenue"], lambda r: round(float(r["revenue"]), 2)),
+    "ctr": (["ctr_weighted", "impressions"], _ctr),
+    "rpm": (["revenue", "views"], _rpm),
+    "avg_view_duration": (["avg_view_duration_sum", "avg_view_duration_n"], _avg_view_duration),
+}
+
+
+def parse_metrics(raw: str | None) -> list[str]:
+    """comma-separated metrics param → list, every metric when it's empty.
+    raises ValueError on a name we don't know."""
+    if not raw:
+        return list(CHART_METRICS)
+    metrics = list(dict.fromkeys(m.strip() for m in raw.split(",") if m.strip()))
+    unknown = [m for m in metrics if m not in CHART_METRICS]
+    if unknown:
+        raise ValueError(f"unknown metrics: {', '.join(unknown)}")
+    return metrics
+
+
+def period_start(day: date, granularity: str) -> date:
+    """the first day of the period `day` falls in — same as postgres date_trunc."""
+    if granularity == "weekly":
+        return day - timedelta(days=day.weekday())
+    if granularity == "monthly":
+        return day.replace(day=1)
+    return day
+
+
+def _block_key(channel_id: UUID, granularity: str, year: int) -> str:
+    return f"charts:{channel_id}:{granularity}:{year}"
+
+
+def _pack(values: list) -> bytes:
+    # long runs of similar numbers — zlib gets a year of daily values down to a fraction
+    return zlib.compress(json.dumps(values, separators=(",", ":")).encode())
+
+
+def _unpack(raw: bytes) -> list:
+    return json.loads(zlib.decompress(raw))
+
+
+def _source(granularity: str) -> tuple:
+    """(period column, {component: expression}, channel column, extra where clauses) —
+    the rollup table for weekly / monthly, the daily rows themselves for daily."""
+    if granularity in ROLLUP_UNITS:
+        p = ChannelPeriodStats
+        components = {
+            name: getattr(p, name)
+            for name in {c for comps, _ in CHART_METRICS.values() for c in comps}
+        }
+        return p.period_start, components, p.channel_id, [p.granularity == granularity]
+    return ChannelDailyStats.date, daily_components(), ChannelDailyStats.channel_id, []
+
+
+async def _compute_blocks(
+    db: AsyncSession,
+    channel_id: UUID,
+    granularity: str,
+    years: list[int],
+    metrics: list[str],
+) -> dict[int, dict]:
+    """finished values for `metrics` over whole calendar-year blocks, reading only the
+    components those metrics need. returns {year: {"dates": [...], metric: [...]}}."""
+    period_col, components, channel_col, extra = _source(granularity)
+    needed = list(dict.fromkeys(c for m in metrics for c in CHART_METRICS[m][0]))
+
+    stmt = (
+        select(period_col.label("period"), *[components[c].label(c) for c in needed])
+        .where(
+            channel_col == channel_id,
+            *extra,
+            period_col >= date(min(years), 1, 1),
+            period_col <= date(max(years), 12, 31),
+        )
+        .order_by(period_col)
+    )
+    blocks = {y: {"dates": [], **{m: [] for m in metrics}} for y in years}
+    for row in (await db.execute(stmt)).all():
+        block = blocks.get(row.period.year)
+        if block is None:
+            continue  # a year between two missing blocks that's already cached
+        r = row._mapping
+        block["dates"].append(row.period.isoformat())
+        for m in metrics:
+            block[m].append(CHART_METRICS[m][1](r))
+    return blocks
+
+
+async def channel_series(
+    db: AsyncSession,
+    redis,
+    channel_id: UUID,
+    granularity: str,
+    metrics: list[str],
+    start: date | None = None,
+    end: date | None = None,
+) -> dict:
+    """the charts payload for one channel: `metrics` over [start, end] (default: the
+    channel's whole history). values are cached per channel + granularity + calendar
+    year as a redis hash with one field per metric, so any range or metric subset is
+    assembled from the same blocks — only missing (block, metric) pairs get queried.
+    fields are stored zlib-compressed, so `redis` has to be the bytes-mode client."""
+    empty = {"dates": [], "metrics": {m: [] for m in metrics}, "date_range": None, "granularity": granularity}
+
+    first, last = (
+        await db.execute(
+            select(func.min(ChannelDailyStats.date), func.max(ChannelDailyStats.date))
+            .where(ChannelDailyStats.channel_id == channel_id)
+        )
+    ).one()
+    if first is None:
+        return empty
+    lo = period_start(max(start or first, first), granularity)
+    hi = min(end or last, last)
+    if lo > hi:
+        return empty
+
+    years = list(range(lo.year, hi.year + 1))
+    fields = ["dates", *metrics]
+    async with redis.pipeline(transaction=False) as pipe:
+        for y in years:
+            pipe.hmget(_block_key(channel_id, granularity, y), fields)
+        cached = await pipe.execute()
+
+    blocks: dict[int, dict] = {}
+    missing_years, missing_metrics = [], set()
+    for y, values in zip(years, cached):
+        if values[0] is None:
+            missing_years.append(y)
+            missing_metrics.update(metrics)
+            continue
+        blocks[y] = {f: _unpack(v) for f, v in zip(fields, values) if v is not None}
+        gaps = [m for m in metrics if m not in blocks[y]]
+        if gaps:
+            missing_years.append(y)
+            missing_metrics.update(gaps)
+
+    if missing_years:
+        todo = [m for m in metrics if m in missing_metrics]
+        computed = await _compute_blocks(db, channel_id, granularity, missing_years, todo)
+        async with redis.pipeline(transaction=False) as pipe:
+            for y, block in computed.items():
+                key = _block_key(channel_id, granularity, y)
+                pipe.hset(key, mapping={f: _pack(v) for f, v in block.items()})
+                pipe.expire(key, BLOCK_TTL)
+                blocks[y] = {**blocks.get(y, {}), **block}
+            await pipe.execute()
+
+    # stitch the blocks together and trim to the requested range
+    lo_s, hi_s = lo.isoformat(), hi.isoformat()
+    dates: list[str] = []
+    series: dict[str, list] = {m: [] for m in metrics}
+    for y in years:
+        block = blocks[y]
+        for i, d in enumerate(block["dates"]):
+            if lo_s <= d <= hi_s:
+                dates.append(d)
+                for m in metrics:
+                    series[m].append(block[m][i])
+
+    if not dates:
+        return empty
+    return {
+        "dates": dates,
+        "metrics": series,
+        "date_range": {"min": dates[0], "max": dates[-1]},
+        "granularity": granularity,
+    }
+
+
+# most channels one compare request may cover
+COMPARE_MAX_CHANNELS = 10
+
+# how compare can rescale each channel's series:
+#   index — every series rebased to 100 at its first non-zero period (growth side by side)
+#   share — each channel's % of the summed total per period (additive metrics only)
+NORMALIZE_MODES = ["none", "index", "share"]
+
+# metrics that are plain sums — the only ones a "share of total" makes sense for
+ADDITIVE_METRICS = INT_METRICS | {"watch_time_minutes", "revenue"}
+
+
+def _rebase(values: list) -> list:
+    base = next((v for v in values if v), None)
+    return [round(v / base * 100, 2) if base and v is not None else None for v in values]
+
+
+def _share(values: list, totals: list) -> list:
+    return [round(v / t * 100, 2) if t and v is not None else None for v, t in zip(values, totals)]
+
+
+async def compare_series(
+    db: AsyncSession,
+    channel_ids: list[UUID],
+    granularity: str,
+    metrics: list[str],
+    start: date | None = None,
+    end: date | None = None,
+    total: bool = False,
+    normalize: str = "none",
+) -> dict:
+    """`metrics` for several channels on one shared period axis, from a single grouped
+    query. components are summed per (channel, period) and — via a grouping set — per
+    period across every channel, so the summed series has exactly-weighted ctr / rpm
+    too. periods a channel has no data for come back null."""
+    period_col, components, channel_col, extra = _source(granularity)
+    needed = list(dict.fromkeys(c for m in metrics for c in CHART_METRICS[m][0]))
+    # share needs the totals even when the caller didn't ask to see them
+    with_total = total or normalize == "share"
+
+    group_by = (
+        [func.grouping_sets(sa.tuple_(channel_col, period_col), sa.tuple_(period_col))]
+        if with_total
+        else [channel_col, period_col]
+    )
+    stmt = (
+        select(
+            channel_col.label("channel_id"),
+            period_col.label("period"),
+            *[func.sum(components[c]).label(c) for c in needed],
+        )
+        .where(channel_col.in_(channel_ids), *extra)
+        .group_by(*group_by)
+        .order_by(period_col)
+    )
+    if start is not None:
+        stmt = stmt.where(period_col >= period_start(start, granularity))
+    if end is not None:
+        stmt = stmt.where(period_col <= end)
+    rows = (await db.execute(stmt)).all()
+
+    # the aligned axis: every period any of the channels has
+    dates = sorted({r.period.isoformat() for r in rows})
+    index = {d: i for i, d in enumerate(dates)}
+
+    def blank() -> dict[str, list]:
+        return {m: [None] * len(dates) for m in metrics}
+
+    by_channel = {cid: blank() for cid in channel_ids}
+    totals = blank()
+    for r in rows:
+        target = totals if r.channel_id is None else by_channel[r.channel_id]
+        i = index[r.period.isoformat()]
+        for m in metrics:
+            target[m][i] = CHART_METRICS[m][1](r._mapping)
+
+    if normalize == "index":
+        by_channel = {cid: {m: _rebase(v) for m, v in s.items()} for cid, s in by_channel.items()}
+    elif normalize == "share":
+        by_channel = {
+            cid: {m: _share(v, totals[m]) if m in ADDITIVE_METRICS else v for m, v in s.items()}
+            for cid, s in by_channel.items()
+        }
+
+    return {
+        "dates": dates,
+        "granularity": granularity,
+        "normalize": normalize,
+        "series": [{"channel_id": str(cid), "metrics": by_channel[cid]} for cid in channel_ids],
+        "total": {"metrics": totals} if total else None,
+    }
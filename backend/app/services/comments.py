@@ -0,0 +1,194 @@
+import asyncio
+import uuid
+from datetime import UTC, datetime
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models.videos import VideoComment
+from app.services import youtube as yt
+
+# how long a refresh counts as fresh — comments don't move fast enough to burn api
+# quota on every page open
+FRESH_TTL = 6 * 3600
+# the per-video refresh lock expires on its own in case a worker dies mid-refresh
+LOCK_TTL = 120
+# how long a request with nothing cached waits on someone else's in-flight refresh
+LOCK_WAIT_SECONDS = 15
+# rows per bulk upsert — at 14 columns a row this stays under postgres' 32k bind
+# parameter limit, however many comments a video has
+COMMENT_UPSERT_BATCH = 2_000
+
+# deletes the lock only if it still holds our token — if a slow refresh outlived
+# LOCK_TTL and someone else took the lock since, it's theirs and stays put
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# columns a refresh may change on an existing row — everything youtube can edit
+UPDATABLE = [
+    "video_id",
+    "parent_youtube_id",
+    "author_name",
+    "author_image_url",
+    "author_channel_url",
+    "author_channel_id",
+    "text",
+    "like_count",
+    "reply_count",
+    "is_reply",
+    "published_at",
+    "updated_at_youtube",
+]
+
+# keeps strong refs to fire-and-forget refresh tasks so they aren't gc'd mid-run
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _fresh_key(video_id: UUID) -> str:
+    return f"comments-fresh:{video_id}"
+
+
+def _lock_key(video_id: UUID) -> str:
+    return f"comments-lock:{video_id}"
+
+
+def _parse_yt_dt(s: str | None) -> datetime | None:
+    """parse youtube's iso 8601 timestamp strings into aware datetimes."""
+    if not s:
+        return None
+    return datetime.fromisoformat(s.replace("Z", "+00:00"))
+
+
+async def cached_comments(db: AsyncSession, video_id: UUID) -> list[VideoComment]:
+    """every stored comment for the video, top-level first then by likes."""
+    result = await db.execute(
+        select(VideoComment)
+        .where(VideoComment.video_id == video_id)
+        .order_by(VideoComment.is_reply, VideoComment.like_count.desc())
+    )
+    return list(result.scalars().all())
+
+
+async def is_fresh(redis, video_id: UUID) -> bool:
+    return bool(await redis.exists(_fresh_key(video_id)))
+
+
+async def _apply_diff(db: AsyncSession, video_id: UUID, raw: list[dict], drop_missing: bool = True) -> int:
+    """upsert the fetched comments keyed by youtube_comment_id and, if drop_missing,
+    drop the ones that are gone — only pass that for a complete fetch. rows whose
+    content didn't change aren't rewritten at all — the update only fires where some
+    column IS DISTINCT FROM what's stored. returns rows written."""
+    # a reply can come back twice (bundled + paged); one insert can't touch a row twice
+    by_id = {c["youtube_comment_id"]: c for c in raw}
+    now = datetime.now(UTC)
+    rows = [
+        {
+            "video_id": video_id,
+            "youtube_comment_id": c["youtube_comment_id"],
+            "parent_youtube_id": c["parent_youtube_id"],
+            "author_name": c["author_name"],
+            "author_image_url": c["author_image_url"],
+            "author_channel_url": c["author_channel_url"],
+            "author_channel_id": c["author_channel_id"],
+            "text": c["text"],
+            "like_count": c["like_count"],
+            "reply_count": c["reply_count"],
+            "is_reply": c["is_reply"],
+            "published_at": _parse_yt_dt(c["published_at"]),
+            "updated_at_youtube": _parse_yt_dt(c["updated_at_youtube"]),
+            "fetched_at": now,
+        }
+        for c in by_id.values()
+    ]
+    written = 0
+    for i in range(0, len(rows), COMMENT_UPSERT_BATCH):
+        stmt = pg_insert(VideoComment).values(rows[i : i + COMMENT_UPSERT_BATCH])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VideoComment.youtube_comment_id],
+            set_={**{col: stmt.excluded[col] for col in UPDATABLE}, "fetched_at": stmt.excluded.fetched_at},
+            where=or_(*[
+                getattr(VideoComment, col).is_distinct_from(stmt.excluded[col]) for col in UPDATABLE
+            ]),
+        )
+        written += (await db.execute(stmt)).rowcount
+
+    # whatever youtube no longer returns (deleted, or fell out of the top threads).
+    # the ids we keep go over as one array parameter and get unnested server-side — a
+    # NOT IN list would bind one parameter per comment
+    if drop_missing:
+        keep = sa.bindparam("keep_ids", list(by_id), type_=ARRAY(sa.String))
+        await db.execute(
+            delete(VideoComment)
+            .where(VideoComment.video_id == video_id)
+            .where(VideoComment.youtube_comment_id.not_in(select(func.unnest(keep))))
+        )
+    await db.commit()
+    return written
+
+
+async def refresh_comments(
+    redis,
+    video_id: UUID,
+    youtube_video_id: str,
+    access_token: str,
+    refresh_token: str | None,
+) -> bool:
+    """fetch the video's comments from youtube and diff them into video_comments. holds
+    a per-video redis lock so concurrent requests never refresh the same video twice;
+    returns False without doing anything if someone else already holds it. the lock
+    holds a token unique to this call and is only released if it still holds it. uses
+    its own session so it can outlive the request that kicked it off."""
+    token = uuid.uuid4().hex
+    if not await redis.set(_lock_key(video_id), token, nx=True, ex=LOCK_TTL):
+        return False
+    try:
+        # a failed fetch raises before anything is touched — what's stored keeps being
+        # served and the next open tries again
+        raw, complete = await yt.get_video_comments(access_token, refresh_token, youtube_video_id)
+        async with AsyncSessionLocal() as db:
+            written = await _apply_diff(db, video_id, raw, drop_missing=complete)
+        # a partial fetch only adds what it got — it isn't marked fresh, so the
+        # missing replies are picked up on the next open
+        if complete:
+            await redis.set(_fresh_key(video_id), "1", ex=FRESH_TTL)
+        print(f"[comments] fetched {len(raw)} comments for {youtube_video_id}, {written} changed")
+        return True
+    finally:
+        await redis.eval(_RELEASE_LOCK, 1, _lock_key(video_id), token)
+
+
+async def wait_for_refresh(redis, video_id: UUID) -> None:
+    """block until no refresh holds the video's lock (or LOCK_WAIT_SECONDS pass)."""
+    for _ in range(LOCK_WAIT_SECONDS * 4):
+        if not await redis.exists(_lock_key(video_id)):
+            return
+        await asyncio.sleep(0.25)
+
+
+def schedule_comments_refresh(
+    redis,
+    video_id: UUID,
+    youtube_video_id: str,
+    access_token: str,
+    refresh_token: str | None,
+) -> None:
+    """kick off refresh_comments without making the caller wait for it."""
+
+    async def run() -> None:
+        try:
+            await refresh_comments(redis, video_id, youtube_video_id, access_token, refresh_token)
+        except Exception as exc:
+            print(f"[comments] background refresh failed for video {video_id}: {exc}")
+
+    task = asyncio.create_task(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
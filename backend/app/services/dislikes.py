@@ -0,0 +1,162 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.stats import VideoDislikes
+from app.models.videos import Video
+
+# redis ttls — hits live a day, failures only a few minutes so a flaky api gets
+# retried soon but a page full of broken ids doesn't hammer it on every load
+DISLIKES_TTL = 86400
+NEGATIVE_TTL = 600
+# stored in place of a count when the lookup failed
+NEGATIVE = "-"
+
+# the prefetch skips videos whose stored count is younger than this
+PREFETCH_MAX_AGE = timedelta(hours=24)
+# ids fetched + stored per round during the prefetch, so a big channel makes steady
+# progress instead of holding every result until the very end
+PREFETCH_CHUNK = 500
+
+# keeps strong refs to fire-and-forget prefetch tasks so they aren't gc'd mid-run
+_background_tasks: set[asyncio.Task] = set()
+
+
+def new_client() -> httpx.AsyncClient:
+    """pooled client for the return youtube dislike api. the app keeps one on
+    app.state for its whole life; the sync prefetch makes its own."""
+    return httpx.AsyncClient(
+        base_url=settings.ryd_api_url,
+        timeout=8,
+        limits=httpx.Limits(max_connections=settings.ryd_max_concurrency),
+    )
+
+
+async def _fetch_one(client: httpx.AsyncClient, sem: asyncio.Semaphore, yt_id: str) -> dict | None:
+    """votes for one video, or None if the api failed / doesn't know it."""
+    async with sem:
+        try:
+            resp = await client.get("/votes", params={"videoId": yt_id})
+            resp.raise_for_status()
+            data = resp.json()
+            return {"dislikes": int(data.get("dislikes", 0)), "likes": data.get("likes")}
+        except Exception:
+            return None
+
+
+async def fetch_votes(client: httpx.AsyncClient, youtube_ids: list[str]) -> dict[str, dict | None]:
+    """hit the api for every id, never more than ryd_max_concurrency at once."""
+    sem = asyncio.Semaphore(settings.ryd_max_concurrency)
+    results = await asyncio.gather(*[_fetch_one(client, sem, yt_id) for yt_id in youtube_ids])
+    return dict(zip(youtube_ids, results))
+
+
+async def _store(db: AsyncSession, votes: dict[str, dict]) -> None:
+    """upsert fetched counts into video_dislikes."""
+    if not votes:
+        return
+    now = datetime.now(UTC)
+    stmt = pg_insert(VideoDislikes).values([
+        {"youtube_video_id": yt_id, "dislikes": v["dislikes"], "likes": v["likes"], "fetched_at": now}
+        for yt_id, v in votes.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VideoDislikes.youtube_video_id],
+        set_={"dislikes": stmt.excluded.dislikes, "likes": stmt.excluded.likes, "fetched_at": stmt.excluded.fetched_at},
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+async def get_dislikes(
+    redis,
+    db: AsyncSession,
+    client: httpx.AsyncClient,
+    youtube_ids: list[str],
+) -> dict[str, int | None]:
+    """dislike counts for a list of youtube ids. redis first (one MGET), then the
+    video_dislikes table the sync prefetch keeps filled, and only what's left goes to
+    the api. everything learned is written back to redis in one pipeline."""
+    results: dict[str, int | None] = {}
+    to_cache: dict[str, str] = {}
+
+    cached = await redis.mget([f"dislikes:{yt_id}" for yt_id in youtube_ids])
+    missing = []
+    for yt_id, val in zip(youtube_ids, cached):
+        if val is None:
+            missing.append(yt_id)
+        else:
+            results[yt_id] = None if val == NEGATIVE else int(val)
+
+    # anything the prefetch already stored never has to wait on the api
+    if missing:
+        rows = await db.execute(
+            select(VideoDislikes.youtube_video_id, VideoDislikes.dislikes)
+            .where(VideoDislikes.youtube_video_id.in_(missing))
+        )
+        for yt_id, count in rows.all():
+            results[yt_id] = count
+            to_cache[yt_id] = str(count)
+        missing = [yt_id for yt_id in missing if yt_id not in results]
+
+    # fallback for videos the prefetch hasn't reached yet (e.g. synced minutes ago)
+    if missing:
+        votes = await fetch_votes(client, missing)
+        for yt_id, v in votes.items():
+            results[yt_id] = v["dislikes"] if v else None
+            to_cache[yt_id] = str(v["dislikes"]) if v else NEGATIVE
+        await _store(db, {yt_id: v for yt_id, v in votes.items() if v})
+
+    if to_cache:
+        async with redis.pipeline(transaction=False) as pipe:
+            for yt_id, val in to_cache.items():
+                pipe.set(f"dislikes:{yt_id}", val, ex=NEGATIVE_TTL if val == NEGATIVE else DISLIKES_TTL)
+            await pipe.execute()
+
+    return results
+
+
+async def prefetch_channel_dislikes(channel_id: UUID) -> None:
+    """refresh stored dislike counts for every video in a channel that's missing one or
+    has a stale one. runs in the background after a sync with its own session + client."""
+    async with AsyncSessionLocal() as db:
+        fresh_cutoff = datetime.now(UTC) - PREFETCH_MAX_AGE
+        result = await db.execute(
+            select(Video.youtube_video_id)
+            .outerjoin(VideoDislikes, VideoDislikes.youtube_video_id == Video.youtube_video_id)
+            .where(Video.channel_id == channel_id)
+            .where((VideoDislikes.fetched_at.is_(None)) | (VideoDislikes.fetched_at < fresh_cutoff))
+        )
+        youtube_ids = list(result.scalars().all())
+        if not youtube_ids:
+            return
+
+        stored = 0
+        async with new_client() as client:
+            for i in range(0, len(youtube_ids), PREFETCH_CHUNK):
+                votes = await fetch_votes(client, youtube_ids[i : i + PREFETCH_CHUNK])
+                found = {yt_id: v for yt_id, v in votes.items() if v}
+                await _store(db, found)
+                stored += len(found)
+        print(f"dislikes prefetch: stored {stored}/{len(youtube_ids)} videos")
+
+
+def schedule_dislikes_prefetch(channel_id: UUID) -> None:
+    """kick off prefetch_channel_dislikes without making the caller wait for it."""
+
+    async def run() -> None:
+        try:
+            await prefetch_channel_dislikes(channel_id)
+        except Exception as exc:
+            print(f"dislikes prefetch failed for channel {channel_id}: {exc}")
+
+    task = asyncio.create_task(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
@@ -0,0 +1,205 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models.stats import VideoAnalytics, VideoStats
+from app.models.videos import Video
+
+# rows pulled from the server-side cursor per round trip — also the size of each
+# parquet row group / arrow record batch
+BATCH_SIZE = 2_000
+
+# format → (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+# (column name, arrow type) — pinned up front so a batch that happens to be all-null
+# in some column still writes the same schema as every other batch
+EXPORT_COLUMNS = [
+    ("id", "string"),
+    ("youtube_video_id", "string"),
+    ("title", "string"),
+    ("published_at", "timestamp"),
+    ("duration_seconds", "int64"),
+    ("is_short", "bool"),
+    ("category_id", "string"),
+    ("default_language", "string"),
+    ("tags", "list<string>"),
+    ("view_count", "int64"),
+    ("like_count", "int64"),
+    ("comment_count", "int64"),
+    ("stats_fetched_at", "timestamp"),
+    ("analytics_date", "date"),
+    ("analytics_views", "int64"),
+    ("estimated_minutes_watched", "float64"),
+    ("average_view_duration_seconds", "float64"),
+    ("average_view_percentage", "float64"),
+    ("click_through_rate", "float64"),
+    ("impressions", "int64"),
+    ("shares", "int64"),
+    ("subscribers_gained", "int64"),
+    ("subscribers_lost", "int64"),
+    ("estimated_revenue", "float64"),
+    ("estimated_ad_revenue", "float64"),
+    ("rpm", "float64"),
+    ("cpm", "float64"),
+]
+
+
+def _export_query(channel_id: UUID) -> sa.Select:
+    """every video in the channel with its latest stats snapshot and latest analytics
+    row. both are lateral lookups that ride the (video_id, fetched_at) and
+    (video_id, date) indexes, so each row costs two index probes instead of a
+    group-by over the whole stats history."""
+    stats = (
+        select(VideoStats.view_count, VideoStats.like_count, VideoStats.comment_count, VideoStats.fetched_at)
+        .where(VideoStats.video_id == Video.id)
+        .order_by(VideoStats.fetched_at.desc())
+        .limit(1)
+        .lateral("latest_stats")
+    )
+    analytics = (
+        select(VideoAnalytics)
+        .where(VideoAnalytics.video_id == Video.id)
+        .order_by(VideoAnalytics.date.desc())
+        .limit(1)
+        .lateral("latest_analytics")
+    )
+    return (
+        select(
+            sa.cast(Video.id, sa.Text).label("id"),
+            Video.youtube_video_id,
+            Video.title,
+            Video.published_at,
+            Video.duration_seconds,
+            Video.is_short,
+            Video.category_id,
+            Video.default_language,
+            Video.tags,
+            stats.c.view_count,
+            stats.c.like_count,
+            stats.c.comment_count,
+            stats.c.fetched_at.label("stats_fetched_at"),
+            analytics.c.date.label("analytics_date"),
+            analytics.c.views.label("analytics_views"),
+            analytics.c.estimated_minutes_watched,
+            analytics.c.average_view_duration_seconds,
+            analytics.c.average_view_percentage,
+            analytics.c.click_through_rate,
+            analytics.c.impressions,
+            analytics.c.shares,
+            analytics.c.subscribers_gained,
+            analytics.c.subscribers_lost,
+            analytics.c.estimated_revenue,
+            analytics.c.estimated_ad_revenue,
+            analytics.c.rpm,
+            analytics.c.cpm,
+        )
+        .select_from(Video)
+        .outerjoin(stats, sa.true())
+        .outerjoin(analytics, sa.true())
+        .where(Video.channel_id == channel_id)
+        .order_by(Video.published_at.desc(), Video.id)
+    )
+
+
+async def _batches(channel_id: UUID) -> AsyncIterator[list]:
+    """stream the export query through a server-side cursor, BATCH_SIZE rows at a time.
+    uses its own session — the response body is still being produced after the
+    request's get_db session has been handed back."""
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            _export_query(channel_id).execution_options(yield_per=BATCH_SIZE)
+        )
+        async for partition in result.partitions():
+            yield partition
+
+
+async def _ndjson(channel_id: UUID) -> AsyncIterator[bytes]:
+    async for rows in _batches(channel_id):
+        yield "".join(json.dumps(dict(r._mapping), default=str) + "\n" for r in rows).encode()
+
+
+async def _csv(channel_id: UUID) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(name for name, _ in EXPORT_COLUMNS)
+    async for rows in _batches(channel_id):
+        for r in rows:
+            # tags as one ;-joined cell — a python list repr isn't useful in a spreadsheet
+            writer.writerow(";".join(v) if isinstance(v, list) else v for v in r)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def _arrow_schema(pa):
+    types = {
+        "string": pa.string(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "date": pa.date32(),
+        "list<string>": pa.list_(pa.string()),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in EXPORT_COLUMNS])
+
+
+async def _columnar(channel_id: UUID, fmt: str) -> AsyncIterator[bytes]:
+    """one record batch (parquet: one row group) per cursor partition. the writer
+    targets an in-memory sink that gets drained after every batch, so memory stays at
+    roughly one batch no matter how big the channel is."""
+    # pyarrow is heavy to import and only these two formats touch it, so it's loaded
+    # on the first columnar export rather than at startup
+    import pyarrow as pa
+
+    schema = _arrow_schema(pa)
+    sink = io.BytesIO()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    try:
+        async for rows in _batches(channel_id):
+            columns = list(zip(*rows))
+            batch = pa.record_batch(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                schema=schema,
+            )
+            writer.write_batch(batch)
+            yield drain()
+    finally:
+        # parquet writes its footer here, arrow its end-of-stream marker
+        writer.close()
+    yield drain()
+
+
+def stream_export(channel_id: UUID, fmt: str) -> AsyncIterator[bytes]:
+    """the response body for GET /videos/export in the requested format."""
+    if fmt == "ndjson":
+        return _ndjson(channel_id)
+    if fmt == "csv":
+        return _csv(channel_id)
+    return _columnar(channel_id, fmt)
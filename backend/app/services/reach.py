@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stats import VideoDailyReach
+from app.models.videos import Video
+
+# named windows the reach api + video_metrics understand
+#   lifetime  — every stored day
+#   first_7d  — publish day + the 6 after it (how the packaging did at launch)
+#   last_28d  — the 28 days up to today (how it's doing now)
+REACH_WINDOWS = ["lifetime", "first_7d", "last_28d"]
+
+
+def reach_window(
+    window: str = "lifetime",
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    channel_id: UUID | None = None,
+    video_ids: list[UUID] | None = None,
+) -> sa.Subquery:
+    """impressions + impressions-weighted ctr per video over a window of days, as a
+    subquery of (video_id, impressions, click_through_rate). start/end narrow any
+    window further. per-video ranges ride the (video_id, date) primary key; channel-wide
+    "last n days" scans ride the brin index on date."""
+    r = VideoDailyReach
+    impressions = func.sum(r.impressions)
+    query = (
+        select(
+            r.video_id,
+            impressions.label("impressions"),
+            sa.cast(
+                func.sum(r.impressions * func.coalesce(r.click_through_rate, 0.0)) / func.nullif(impressions, 0),
+                sa.Float,
+            ).label("click_through_rate"),
+        )
+        .join(Video, Video.id == r.video_id)
+        .group_by(r.video_id)
+    )
+    if window == "first_7d":
+        published = sa.cast(Video.published_at, sa.Date)
+        query = query.where(r.date >= published, r.date < published + 7)
+    elif window == "last_28d":
+        query = query.where(r.date > func.current_date() - 28)
+    if start is not None:
+        query = query.where(r.date >= start)
+    if end is not None:
+        query = query.where(r.date <= end)
+    if channel_id is not None:
+        query = query.where(Video.channel_id == channel_id)
+    if video_ids is not None:
+        query = query.where(r.video_id.in_(video_ids))
+    return query.subquery(f"reach_{window}")
+
+
+async def reach_for_videos(
+    db: AsyncSession,
+    video_ids: list[UUID],
+    window: str = "lifetime",
+    start: date | None = None,
+    end: date | None = None,
+) -> dict[UUID, dict]:
+    """{video_id: {impressions, click_through_rate}} over the window. videos with no
+    stored reach days are simply missing from the result."""
+    if not video_ids:
+        return {}
+    sub = reach_window(window, start=start, end=end, video_ids=video_ids)
+    rows = (await db.execute(select(sub))).all()
+    return {
+        r.video_id: {"impressions": int(r.impressions), "click_through_rate": r.click_through_rate}
+        for r in rows
+    }
+
+
+def window_bounds(window: str, published_at) -> tuple[date | None, date | None]:
+    """the (first, last) day a named window covers for one video — the python side of
+    the same ranges reach_window filters on."""
+    if window == "first_7d":
+        day = published_at.date()
+        return day, day + timedelta(days=6)
+    if window == "last_28d":
+        today = date.today()
+        return today - timedelta(days=27), today
+    return None, None
+
+
+async def video_reach(
+    db: AsyncSession,
+    video: Video,
+    window: str = "lifetime",
+    start: date | None = None,
+    end: date | None = None,
+) -> dict:
+    """one video's impressions + weighted ctr over a window, plus the daily rows behind
+    it. a single range scan on the (video_id, date) primary key — the totals are summed
+    from the same rows rather than asking postgres twice."""
+    lo, hi = window_bounds(window, video.published_at)
+    if start is not None:
+        lo = max(lo, start) if lo else start
+    if end is not None:
+        hi = min(hi, end) if hi else end
+
+    r = VideoDailyReach
+    query = select(r.date, r.impressions, r.click_through_rate).where(r.video_id == video.id).order_by(r.date)
+    if lo is not None:
+        query = query.where(r.date >= lo)
+    if hi is not None:
+        query = query.where(r.date <= hi)
+    rows = (await db.execute(query)).all()
+
+    impressions = sum(row.impressions for row in rows)
+    clicks = sum(row.impressions * (row.click_through_rate or 0) for row in rows)
+    return {
+        "window": window,
+        "start": lo,
+        "end": hi,
+        "impressions": impressions,
+        "click_through_rate": clicks / impressions if impressions else None,
+        "daily": [
+            {"date": row.date, "impressions": row.impressions, "click_through_rate": row.click_through_rate}
+            for row in rows
+        ],
+    }
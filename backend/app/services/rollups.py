@@ -0,0 +1,68 @@
+from datetime import date
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stats import ChannelDailyStats, ChannelPeriodStats
+
+# charts granularity → postgres date_trunc unit
+ROLLUP_UNITS = {"weekly": "week", "monthly": "month"}
+
+
+def daily_components() -> dict:
+    """the summable pieces of one channel_daily_stats row, named like the
+    channel_period_stats columns. summing these over any set of days gives exactly
+    what the rollup table stores for that set."""
+    d = ChannelDailyStats
+    return {
+        "views": func.coalesce(d.views, 0),
+        "likes": func.coalesce(d.likes, 0),
+        "comments": func.coalesce(d.comments, 0),
+        "subscribers_gained": func.coalesce(d.subscribers_gained, 0),
+        "impressions": func.coalesce(d.impressions, 0),
+        "ctr_weighted": func.coalesce(d.click_through_rate, 0) * func.coalesce(d.impressions, 0),
+        "watch_time_minutes": func.coalesce(d.estimated_minutes_watched, 0),
+        "revenue": func.coalesce(d.estimated_revenue, 0),
+        "avg_view_duration_sum": func.coalesce(d.average_view_duration_seconds, 0),
+        "avg_view_duration_n": sa.case((d.average_view_duration_seconds.is_not(None), 1), else_=0),
+    }
+
+
+async def refresh_channel_rollups(db: AsyncSession, channel_id: UUID, since: date | None = None) -> None:
+    """re-roll the weekly + monthly rows for every period that contains a day on or
+    after `since` (all of them when since is None). each period is recomputed from its
+    full set of daily rows, so a period the sync only partly touched still comes out
+    right. one INSERT ... SELECT per granularity."""
+    for granularity, unit in ROLLUP_UNITS.items():
+        period = func.date_trunc(unit, ChannelDailyStats.date).cast(sa.Date)
+        components = daily_components()
+        query = (
+            select(
+                ChannelDailyStats.channel_id,
+                sa.literal(granularity).label("granularity"),
+                period.label("period_start"),
+                *[func.sum(expr).label(name) for name, expr in components.items()],
+                func.now().label("computed_at"),
+            )
+            .where(ChannelDailyStats.channel_id == channel_id)
+            .group_by(ChannelDailyStats.channel_id, period)
+        )
+        if since is not None:
+            # start of the period `since` falls in, so that period is rebuilt whole
+            period_of_since = func.date_trunc(unit, sa.literal(since, sa.Date)).cast(sa.Date)
+            query = query.where(ChannelDailyStats.date >= period_of_since)
+
+        columns = ["channel_id", "granularity", "period_start", *components, "computed_at"]
+        stmt = pg_insert(ChannelPeriodStats).from_select(columns, query)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                ChannelPeriodStats.channel_id,
+                ChannelPeriodStats.granularity,
+                ChannelPeriodStats.period_start,
+            ],
+            set_={col: stmt.excluded[col] for col in [*components, "computed_at"]},
+        )
+        await db.execute(stmt)
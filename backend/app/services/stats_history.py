@@ -0,0 +1,98 @@
+from datetime import datetime
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stats import VideoStats
+from app.utils.downsample import lttb_indices
+
+# default + ceiling for max_points — enough for any chart width, small enough that a
+# years-old video's detail page stays a few kb
+DEFAULT_MAX_POINTS = 500
+MAX_POINTS_LIMIT = 5_000
+
+
+async def latest_stats(db: AsyncSession, video_id: UUID) -> VideoStats | None:
+    """newest snapshot — one index probe on (video_id, fetched_at)."""
+    result = await db.execute(
+        select(VideoStats)
+        .where(VideoStats.video_id == video_id)
+        .order_by(VideoStats.fetched_at.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+def _downsample(rows: list, max_points: int) -> list[dict]:
+    if len(rows) > max_points:
+        x = np.fromiter((r.fetched_at.timestamp() for r in rows), dtype=np.float64, count=len(rows))
+        y = np.fromiter((r.view_count for r in rows), dtype=np.float64, count=len(rows))
+        rows = [rows[i] for i in lttb_indices(x, y, max_points)]
+    return [
+        {
+            "view_count": r.view_count,
+            "like_count": r.like_count,
+            "comment_count": r.comment_count,
+            "fetched_at": r.fetched_at,
+        }
+        for r in rows
+    ]
+
+
+async def stats_history_many(
+    db: AsyncSession,
+    video_ids: list[UUID],
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> dict[UUID, list[dict]]:
+    """stats_history for several videos in one query — {video_id: points}, every id
+    present (an empty list when it has no snapshots in range). each video is
+    downsampled on its own."""
+    query = (
+        select(
+            VideoStats.video_id,
+            VideoStats.fetched_at,
+            VideoStats.view_count,
+            VideoStats.like_count,
+            VideoStats.comment_count,
+        )
+        .where(VideoStats.video_id.in_(video_ids))
+        .order_by(VideoStats.video_id, VideoStats.fetched_at)
+    )
+    if start is not None:
+        query = query.where(VideoStats.fetched_at >= start)
+    if end is not None:
+        query = query.where(VideoStats.fetched_at <= end)
+
+    by_video: dict[UUID, list] = {vid: [] for vid in video_ids}
+    for r in (await db.execute(query)).all():
+        by_video[r.video_id].append(r)
+    return {vid: _downsample(rows, max_points) for vid, rows in by_video.items()}
+
+
+async def stats_history(
+    db: AsyncSession,
+    video_id: UUID,
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> list[dict]:
+    """snapshots in [start, end], oldest → newest, downsampled to at most max_points
+    with lttb on view_count. only the four plain columns are read (no orm objects), and
+    likes/comments come from the same snapshots the view curve keeps, so every point is
+    a real row rather than an interpolated one."""
+    query = (
+        select(VideoStats.fetched_at, VideoStats.view_count, VideoStats.like_count, VideoStats.comment_count)
+        .where(VideoStats.video_id == video_id)
+        .order_by(VideoStats.fetched_at)
+    )
+    if start is not None:
+        query = query.where(VideoStats.fetched_at >= start)
+    if end is not None:
+        query = query.where(VideoStats.fetched_at <= end)
+    return _downsample((await db.execute(query)).all(), max_points)
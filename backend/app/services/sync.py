@@ -2,17 +2,32 @@ import uuid
 from collections import defaultdict
 from datetime import UTC, date, datetime, timedelta
 
+import httpx
+import sqlalchemy as sa
 from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.models.channels import Channel
-from app.models.stats import ChannelDailyStats, VideoAnalytics, VideoStats
+from app.models.stats import (
+    ChannelDailyStats,
+    ProcessedReport,
+    VideoAnalytics,
+    VideoDailyAnalytics,
+    VideoDailyReach,
+    VideoMetrics,
+    VideoStats,
+)
 from app.models.users import User
-from app.models.videos import Video
+from app.models.videos import Video, VideoFeatures
 from app.services import youtube as yt
+from app.services.dislikes import schedule_dislikes_prefetch
+from app.services.reach import reach_window
+from app.services.rollups import refresh_channel_rollups
 from app.utils.security import decrypt_token
+from app.utils.title_features import duration_bucket, extract_title_features, title_hash
 from app.utils.youtube_parser import best_thumbnail, parse_duration
 
 
@@ -38,6 +53,39 @@ def _safe_float(val) -> float | None:
         return None
 
 
+async def _sync_video_features(db: AsyncSession, videos: list[Video]) -> None:
+    """extract title + metadata features for a batch of videos and upsert them.
+    only videos whose title hash or duration bucket changed get re-extracted."""
+    result = await db.execute(
+        select(VideoFeatures.video_id, VideoFeatures.title_hash, VideoFeatures.duration_bucket)
+        .where(VideoFeatures.video_id.in_([v.id for v in videos]))
+    )
+    existing = {row.video_id: (row.title_hash, row.duration_bucket) for row in result.all()}
+
+    rows = []
+    for video in videos:
+        fingerprint = (title_hash(video.title), duration_bucket(video.duration_seconds))
+        if existing.get(video.id) == fingerprint:
+            continue
+        rows.append({
+            "video_id": video.id,
+            "title_hash": fingerprint[0],
+            "duration_bucket": fingerprint[1],
+            **extract_title_features(video.title),
+            "computed_at": _utcnow(),
+        })
+
+    if not rows:
+        return
+
+    stmt = pg_insert(VideoFeatures).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VideoFeatures.video_id],
+        set_={col: stmt.excluded[col] for col in rows[0] if col != "video_id"},
+    )
+    await db.execute(stmt)
+
+
 async def _sync_analytics(
     db: AsyncSession,
     access_token: str,
@@ -148,55 +196,343 @@ async def _sync_analytics(
     # ── step c: reporting api (impressions + ctr from daily csv reports) ──────
     # impressions/ctr aren't available in the analytics api — they come from
     # a separate "reporting api" that generates daily csv files we download.
-    # we sum up all available daily rows to get per-video totals, then
-    # store them alongside the analytics data we just saved above.
+    # only reports we haven't ingested yet are fetched; their per-day numbers go
+    # into video_daily_reach and the lifetime totals are re-summed from there
     try:
-        job_id = await yt.ensure_reach_job(access_token, refresh_token)
-        reach_rows = await yt.download_reach_reports(access_token, refresh_token, job_id)
-
-        if reach_rows:
-            # aggregate all daily rows into per-video totals
-            # weighted avg ctr = sum(impressions × ctr) / total impressions
-            total_impressions: dict = defaultdict(int)
-            weighted_ctr: dict = defaultdict(float)
-
-            for row in reach_rows:
-                vid = row["video_id"]
-                total_impressions[vid] += row["impressions"]
-                weighted_ctr[vid] += row["impressions"] * row["ctr"]
-
-            # upsert impressions + ctr into the same row we created in step a
-            # (or create a new row if step a didn't run for this video)
-            for yt_vid_id, imp_total in total_impressions.items():
-                db_vid_id = yt_to_db.get(yt_vid_id)
-                if not db_vid_id:
+        await _sync_reach_reports(db, access_token, refresh_token, channel, yt_to_db, today)
+    except Exception as exc:
+        print(f"reach reports step skipped: {exc}")
+
+    # ── step d: reporting api (per-video daily history for the whole channel) ─
+    # the channel_basic (+ revenue, if offered) csvs carry every video's numbers for
+    # a day, so the whole channel's daily history lands in a handful of downloads
+    # instead of one filtered analytics query per video
+    try:
+        await _sync_video_daily_reports(db, access_token, refresh_token, channel, yt_to_db)
+    except Exception as exc:
+        print(f"daily video reports step skipped: {exc}")
+
+
+async def _sync_reach_reports(
+    db: AsyncSession,
+    access_token: str,
+    refresh_token: str | None,
+    channel: Channel,
+    yt_to_db: dict,
+    today: date,
+) -> None:
+    """ingest the reach reports not in the processed_reports ledger yet into
+    video_daily_reach, then write every video's lifetime impressions + weighted ctr onto
+    today's analytics row. the ledger is the only filter — a report that failed to
+    download last time simply isn't in it, so it's retried."""
+    job_id = await yt.ensure_reach_job(access_token, refresh_token)
+
+    # the ledger: reports we've already ingested for this job
+    done = set(
+        (await db.execute(select(ProcessedReport.report_id).where(ProcessedReport.job_id == job_id))).scalars()
+    )
+    downloaded = await yt.download_reach_reports(access_token, refresh_token, job_id, skip_ids=done)
+    if not downloaded and not done:
+        print("reach reports: no csv data available yet (job may be newly created — try again tomorrow)")
+        return
+
+    # oldest first, so a re-issued report for a day lands on top of the original
+    downloaded.sort(key=lambda pair: pair[0].get("createTime", ""))
+    for report, totals in downloaded:
+        rows = [
+            {
+                "video_id": yt_to_db[yt_vid_id],
+                "date": day,
+                "impressions": impressions,
+                "click_through_rate": weighted / impressions if impressions else None,
+            }
+            for (yt_vid_id, day), (impressions, weighted) in totals.items()
+            if yt_vid_id in yt_to_db
+        ]
+        for i in range(0, len(rows), DAILY_UPSERT_BATCH):
+            stmt = pg_insert(VideoDailyReach).values(rows[i : i + DAILY_UPSERT_BATCH])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[VideoDailyReach.video_id, VideoDailyReach.date],
+                set_={"impressions": stmt.excluded.impressions, "click_through_rate": stmt.excluded.click_through_rate},
+            )
+            await db.execute(stmt)
+        await db.execute(
+            pg_insert(ProcessedReport)
+            .values(
+                report_id=report["id"],
+                job_id=job_id,
+                channel_id=channel.id,
+                create_time=datetime.fromisoformat(report["createTime"].replace("Z", "+00:00")),
+                processed_at=_utcnow(),
+            )
+            .on_conflict_do_nothing()
+        )
+    if downloaded:
+        print(f"reach reports: ingested {len(downloaded)} new report(s)")
+
+    # lifetime totals per video, summed in postgres from the stored days — upsert
+    # impressions + ctr into the same row step a created (or create it if step a didn't run)
+    impressions = func.sum(VideoDailyReach.impressions)
+    totals = (
+        select(
+            VideoDailyReach.video_id,
+            impressions.label("impressions"),
+            (
+                func.sum(VideoDailyReach.impressions * func.coalesce(VideoDailyReach.click_through_rate, 0))
+                / func.nullif(impressions, 0)
+            ).label("click_through_rate"),
+        )
+        .join(Video, Video.id == VideoDailyReach.video_id)
+        .where(Video.channel_id == channel.id)
+        .group_by(VideoDailyReach.video_id)
+    )
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "video_id": r.video_id,
+            "date": today,
+            "impressions": int(r.impressions),
+            "click_through_rate": r.click_through_rate,
+            "fetched_at": _utcnow(),
+        }
+        for r in (await db.execute(totals)).all()
+    ]
+    for i in range(0, len(rows), DAILY_UPSERT_BATCH):
+        stmt = pg_insert(VideoAnalytics).values(rows[i : i + DAILY_UPSERT_BATCH])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_video_analytics_video_date",
+            set_={
+                "impressions": stmt.excluded.impressions,
+                "click_through_rate": stmt.excluded.click_through_rate,
+                "fetched_at": stmt.excluded.fetched_at,
+            },
+        )
+        await db.execute(stmt)
+    print(f"reach reports: saved impressions/ctr for {len(rows)} videos")
+
+
+# rows per bulk upsert into video_daily_analytics — stays well under postgres' 32k
+# bind parameter limit at ~10 columns a row
+DAILY_UPSERT_BATCH = 2_000
+
+# video_daily_analytics column → csv column(s) it's read from (first one present wins).
+# every one is a plain count, so summing over the report's country / subscribed /
+# live split is exact
+BASIC_REPORT_COLUMNS = {
+    "views": ("views",),
+    "likes": ("likes",),
+    "comments": ("comments",),
+    "shares": ("shares",),
+    "watch_time_minutes": ("watch_time_minutes",),
+    "subscribers_gained": ("subscribers_gained",),
+    "subscribers_lost": ("subscribers_lost",),
+}
+# channel revenue csvs have used both spellings
+REVENUE_REPORT_COLUMNS = {
+    "estimated_revenue": ("estimated_partner_revenue", "estimated_revenue"),
+}
+# the float-valued columns — everything else the reports fill is a whole count
+FLOAT_DAILY_COLUMNS = {"watch_time_minutes", "estimated_revenue"}
+
+
+async def _ingest_daily_report(
+    db: AsyncSession,
+    access_token: str,
+    refresh_token: str | None,
+    channel: Channel,
+    yt_to_db: dict,
+    report_type: str,
+    columns: dict[str, tuple[str, ...]],
+) -> int:
+    """download one report type's csvs that aren't in the processed_reports ledger and
+    bulk-upsert each into video_daily_analytics, summed per (video, day). a report is
+    summed in full before anything is written, then its rows + ledger entry are
+    written together in a savepoint — a download that fails halfway writes nothing and
+    isn't recorded, so the next sync fetches it again. nothing is committed here; it
+    all lands with the rest of the sync. returns the number of video-days written."""
+    job_id = await yt.ensure_report_job(access_token, refresh_token, report_type, f"viewpilot {report_type}")
+    done = set(
+        (await db.execute(select(ProcessedReport.report_id).where(ProcessedReport.job_id == job_id))).scalars()
+    )
+
+    saved = 0
+    # oldest first, so a re-issued report for a day lands on top of the original
+    async for report, report_rows in yt.iter_reports(access_token, refresh_token, job_id, skip_ids=done):
+        totals: dict[tuple, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        try:
+            async for row in report_rows:
+                db_vid_id = yt_to_db.get(row.get("video_id", "").strip())
+                if not db_vid_id or not row.get("date"):
                     continue
-                avg_ctr = weighted_ctr[yt_vid_id] / imp_total if imp_total > 0 else None
-                stmt = (
-                    pg_insert(VideoAnalytics)
-                    .values(
-                        id=uuid.uuid4(),
-                        video_id=db_vid_id,
-                        date=today,
-                        impressions=imp_total,
-                        click_through_rate=avg_ctr,
-                        fetched_at=_utcnow(),
-                    )
-                    .on_conflict_do_update(
-                        constraint="uq_video_analytics_video_date",
-                        set_={
-                            "impressions": imp_total,
-                            "click_through_rate": avg_ctr,
-                            "fetched_at": _utcnow(),
-                        },
-                    )
+                bucket = totals[(db_vid_id, datetime.strptime(row["date"], "%Y%m%d").date())]
+                for col, csv_cols in columns.items():
+                    csv_col = next((c for c in csv_cols if c in row), None)
+                    bucket[col] += (_safe_float(row.get(csv_col)) or 0.0) if csv_col else 0.0
+        except httpx.HTTPError as e:
+            print(f"daily video reports: csv download failed for report {report['id']}, retrying next sync: {e}")
+            continue
+
+        now = _utcnow()
+        rows = [
+            {
+                "video_id": vid,
+                "date": day,
+                **{col: (v if col in FLOAT_DAILY_COLUMNS else int(v)) for col, v in vals.items()},
+                "fetched_at": now,
+            }
+            for (vid, day), vals in totals.items()
+        ]
+        # savepoint per report — its rows and its ledger entry go in together or not at
+        # all, and the commit stays with the end of the sync like every other step
+        async with db.begin_nested():
+            for i in range(0, len(rows), DAILY_UPSERT_BATCH):
+                stmt = pg_insert(VideoDailyAnalytics).values(rows[i : i + DAILY_UPSERT_BATCH])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[VideoDailyAnalytics.video_id, VideoDailyAnalytics.date],
+                    set_={col: stmt.excluded[col] for col in [*columns, "fetched_at"]},
                 )
                 await db.execute(stmt)
-            print(f"reach reports: saved impressions/ctr for {len(total_impressions)} videos")
-        else:
-            print("reach reports: no csv data available yet (job may be newly created — try again tomorrow)")
+            await db.execute(
+                pg_insert(ProcessedReport)
+                .values(
+                    report_id=report["id"],
+                    job_id=job_id,
+                    channel_id=channel.id,
+                    create_time=datetime.fromisoformat(report["createTime"].replace("Z", "+00:00")),
+                    processed_at=now,
+                )
+                .on_conflict_do_nothing()
+            )
+        saved += len(rows)
+    return saved
+
+
+async def _sync_video_daily_reports(
+    db: AsyncSession,
+    access_token: str,
+    refresh_token: str | None,
+    channel: Channel,
+    yt_to_db: dict,
+) -> None:
+    """bulk-load per-video daily history from the reporting api. the basic report is
+    always there; the revenue report is only offered to monetized channels, so we check
+    the channel's report types for it and skip it if it isn't there."""
+    saved = await _ingest_daily_report(
+        db, access_token, refresh_token, channel, yt_to_db,
+        yt.BASIC_REPORT_TYPE, BASIC_REPORT_COLUMNS,
+    )
+    print(f"daily video reports: saved {saved} video-days from {yt.BASIC_REPORT_TYPE}")
+
+    if yt.REVENUE_REPORT_TYPE not in await yt.list_report_types(access_token, refresh_token):
+        print(f"daily video reports: {yt.REVENUE_REPORT_TYPE} not offered for this channel, skipping revenue")
+        return
+
+    saved = await _ingest_daily_report(
+        db, access_token, refresh_token, channel, yt_to_db,
+        yt.REVENUE_REPORT_TYPE, REVENUE_REPORT_COLUMNS,
+    )
+    print(f"daily video reports: saved {saved} video-days from {yt.REVENUE_REPORT_TYPE}")
+
+
+async def _sync_video_metrics(
+    db: AsyncSession,
+    access_token: str,
+    refresh_token: str | None,
+    channel: Channel,
+) -> None:
+    """recompute every video's row in video_metrics from its newest stats snapshot and
+    analytics row, plus the rolling 30-day views from the analytics api. done as one
+    INSERT ... SELECT so the whole channel is refreshed in a single statement."""
+
+    # 30-day views per video — gives current velocity instead of lifetime average.
+    # if the call fails we still refresh everything else and leave views_last_30d null
+    recent_views: dict[str, int] = {}
+    try:
+        recent_views = await yt.get_recent_channel_views(access_token, refresh_token, days=30)
     except Exception as exc:
-        print(f"reach reports step skipped: {exc}")
+        print(f"video metrics: recent views fetch failed, leaving views_last_30d empty: {exc}")
+
+    # make sure this sync's stats snapshots are visible to the select below
+    await db.flush()
+
+    # newest snapshot / analytics row per video — distinct on rides the (video_id, ...) indexes
+    channel_videos = select(Video.id).where(Video.channel_id == channel.id)
+    latest_stats = (
+        select(VideoStats)
+        .where(VideoStats.video_id.in_(channel_videos))
+        .distinct(VideoStats.video_id)
+        .order_by(VideoStats.video_id, VideoStats.fetched_at.desc())
+        .subquery()
+    )
+    latest_analytics = (
+        select(VideoAnalytics)
+        .where(VideoAnalytics.video_id.in_(channel_videos))
+        .distinct(VideoAnalytics.video_id)
+        .order_by(VideoAnalytics.video_id, VideoAnalytics.date.desc())
+        .subquery()
+    )
+    recent = (
+        func.unnest(
+            sa.bindparam("recent_ids", list(recent_views), type_=ARRAY(sa.Text)),
+            sa.bindparam("recent_views", list(recent_views.values()), type_=ARRAY(sa.BigInteger)),
+        )
+        .table_valued(sa.column("youtube_video_id", sa.Text), sa.column("views", sa.BigInteger))
+        .render_derived(name="recent")
+    )
+
+    # windowed reach straight from the stored reach days — no csv re-download
+    first_7d = reach_window("first_7d", channel_id=channel.id)
+    last_28d = reach_window("last_28d", channel_id=channel.id)
+
+    days_live = func.greatest(func.current_date() - sa.cast(Video.published_at, sa.Date), 1)
+    s, a = latest_stats.c, latest_analytics.c
+    views = sa.cast(s.view_count, sa.Float)
+
+    columns = {
+        "video_id": Video.id,
+        "channel_id": Video.channel_id,
+        "view_count": s.view_count,
+        "like_count": s.like_count,
+        "comment_count": s.comment_count,
+        "views_per_day": views / days_live,
+        "engagement_rate": sa.case((s.view_count > 0, s.like_count / views * 100), else_=0.0),
+        "comment_rate": sa.case((s.view_count > 0, s.comment_count / views * 100), else_=0.0),
+        "views_last_30d": recent.c.views,
+        "estimated_minutes_watched": a.estimated_minutes_watched,
+        "estimated_revenue": a.estimated_revenue,
+        "rpm": a.rpm,
+        "click_through_rate": a.click_through_rate,
+        "impressions": a.impressions,
+        "ctr_first_7d": first_7d.c.click_through_rate,
+        "ctr_last_28d": last_28d.c.click_through_rate,
+        "impressions_last_28d": last_28d.c.impressions,
+        "average_view_duration_seconds": a.average_view_duration_seconds,
+        # fall back to watch time / duration when the api doesn't give us a percentage
+        "average_view_percentage": func.coalesce(
+            a.average_view_percentage,
+            func.nullif(a.average_view_duration_seconds, 0) / func.nullif(Video.duration_seconds, 0) * 100,
+        ),
+        "computed_at": func.now(),
+    }
+    source = (
+        select(*columns.values())
+        .join(latest_stats, s.video_id == Video.id)
+        .outerjoin(latest_analytics, a.video_id == Video.id)
+        .outerjoin(recent, recent.c.youtube_video_id == Video.youtube_video_id)
+        .outerjoin(first_7d, first_7d.c.video_id == Video.id)
+        .outerjoin(last_28d, last_28d.c.video_id == Video.id)
+        .where(Video.channel_id == channel.id)
+    )
+
+    stmt = pg_insert(VideoMetrics).from_select(list(columns), source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VideoMetrics.video_id],
+        set_={name: stmt.excluded[name] for name in columns if name != "video_id"},
+    )
+    # savepoint so a failure here can't poison the rest of the sync's transaction
+    async with db.begin_nested():
+        result = await db.execute(stmt)
+    print(f"video metrics: refreshed {result.rowcount} videos ({len(recent_views)} with 30-day views)")
 
 
 async def _sync_channel_history(
@@ -301,6 +637,10 @@ async def _sync_channel_history(
         )
         await db.execute(stmt)
 
+    # re-roll just the weeks / months this upsert could have changed
+    await db.flush()
+    await refresh_channel_rollups(db, channel.id, start)
+
     print(f"channel history: saved {len(daily_rows)} daily rows")
 
 
@@ -368,6 +708,7 @@ async def sync_channel(db: AsyncSession, user: User) -> Channel:
     for i in range(0, len(video_ids), 50):
         batch_ids = video_ids[i : i + 50]
         items = await yt.get_videos_batch(access_token, refresh_token, batch_ids)
+        batch_videos: list[Video] = []
 
         for item in items:
             s = item["snippet"]
@@ -423,6 +764,11 @@ async def sync_channel(db: AsyncSession, user: User) -> Channel:
                 fetched_at=_utcnow(),
             )
             db.add(snapshot)
+            batch_videos.append(video)
+
+        # title features only get re-extracted when the title (or duration) changed
+        if batch_videos:
+            await _sync_video_features(db, batch_videos)
 
     # ── step 4: fetch per-video analytics api data ───────────────────────────
     # wrapped in try/except — if analytics fail, the video sync still succeeds
@@ -431,7 +777,14 @@ async def sync_channel(db: AsyncSession, user: User) -> Channel:
     except Exception as exc:
         print(f"analytics sync skipped: {exc}")
 
-    # ── step 5: fetch daily channel history for the charts page ──────────────
+    # ── step 5: recompute per-video ranking metrics ──────────────────────────
+    # runs after analytics so revenue/ctr/watch time are as fresh as this sync
+    try:
+        await _sync_video_metrics(db, access_token, refresh_token, channel)
+    except Exception as exc:
+        print(f"video metrics sync skipped: {exc}")
+
+    # ── step 6: fetch daily channel history for the charts page ──────────────
     # on first run this pulls the full channel history back to launch date.
     # on subsequent runs it only refreshes the last 60 days.
     try:
@@ -441,4 +794,9 @@ async def sync_channel(db: AsyncSession, user: User) -> Channel:
 
     await db.commit()
     await db.refresh(channel)
+
+    # ── step 7: prefetch dislike counts in the background ────────────────────
+    # fills video_dislikes so the dislikes endpoint never waits on the ryd api.
+    # not awaited — the sync is done as far as the caller is concerned
+    schedule_dislikes_prefetch(channel.id)
     return channel
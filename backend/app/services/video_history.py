@@ -0,0 +1,116 @@
+from datetime import UTC, date, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stats import VideoDailyAnalytics
+from app.models.videos import Video
+from app.services import youtube as yt
+
+# a top-up re-fetches the last few stored days too — the analytics api keeps revising
+# the most recent days for a little while after first reporting them
+REFRESH_OVERLAP_DAYS = 3
+# don't touch the api again if we asked it about this video this recently — analytics
+# data only updates about once a day anyway
+REFRESH_INTERVAL = timedelta(hours=12)
+
+
+def _attempt_key(video_id: UUID) -> str:
+    return f"video-history-attempt:{video_id}"
+
+
+async def _store_days(db: AsyncSession, video: Video, rows: list[dict]) -> None:
+    """upsert {day, views, likes, comments} rows into video_daily_analytics."""
+    if not rows:
+        return
+    now = datetime.now(UTC)
+    stmt = pg_insert(VideoDailyAnalytics).values([
+        {
+            "video_id": video.id,
+            "date": date.fromisoformat(r["day"]),
+            "views": int(r.get("views") or 0),
+            "likes": int(r.get("likes") or 0),
+            "comments": int(r.get("comments") or 0),
+            "fetched_at": now,
+        }
+        for r in rows
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VideoDailyAnalytics.video_id, VideoDailyAnalytics.date],
+        set_={
+            "views": stmt.excluded.views,
+            "likes": stmt.excluded.likes,
+            "comments": stmt.excluded.comments,
+            "fetched_at": stmt.excluded.fetched_at,
+        },
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+async def refresh_video_history(
+    db: AsyncSession,
+    redis,
+    video: Video,
+    access_token: str,
+    refresh_token: str | None,
+) -> None:
+    """bring video_daily_analytics up to date for one video. the first call backfills
+    from the publish date (chunks fetched in parallel); after that only the days since
+    the newest stored one are fetched, and nothing at all if we asked recently."""
+    # the attempt marker goes down before the api call, whatever it returns — a video
+    # with no new days never moves fetched_at, so that can't be what throttles us.
+    # SET NX also means two opens at once only fetch once
+    key = _attempt_key(video.id)
+    if not await redis.set(key, datetime.now(UTC).isoformat(), ex=REFRESH_INTERVAL, nx=True):
+        return
+
+    try:
+        await _fetch_and_store(db, video, access_token, refresh_token)
+    except Exception:
+        # a failed call didn't get us anything — let the next open try again
+        await redis.delete(key)
+        raise
+
+
+async def _fetch_and_store(
+    db: AsyncSession,
+    video: Video,
+    access_token: str,
+    refresh_token: str | None,
+) -> None:
+    last_date = (
+        await db.execute(
+            select(func.max(VideoDailyAnalytics.date)).where(VideoDailyAnalytics.video_id == video.id)
+        )
+    ).scalar()
+
+    if last_date is None:
+        start = video.published_at.date()
+    else:
+        start = max(last_date - timedelta(days=REFRESH_OVERLAP_DAYS), video.published_at.date())
+
+    rows = await yt.get_video_daily_history(
+        access_token, refresh_token, video.youtube_video_id, start.isoformat()
+    )
+    await _store_days(db, video, rows)
+
+
+async def stored_video_history(db: AsyncSession, video: Video) -> list[dict]:
+    """the stored daily rows for a video, oldest → newest, in the api's {day, ...} shape."""
+    result = await db.execute(
+        select(
+            VideoDailyAnalytics.date,
+            VideoDailyAnalytics.views,
+            VideoDailyAnalytics.likes,
+            VideoDailyAnalytics.comments,
+        )
+        .where(VideoDailyAnalytics.video_id == video.id)
+        .order_by(VideoDailyAnalytics.date)
+    )
+    return [
+        {"day": d.isoformat(), "views": views, "likes": likes, "comments": comments}
+        for d, views, likes, comments in result.all()
+    ]
@@ -1,6 +1,6 @@
 import asyncio
 import csv
-import io
+from collections.abc import AsyncIterator
 from datetime import date, timedelta
 from functools import partial
 
@@ -156,47 +156,58 @@ async def get_channel_analytics(
     return results
 
 
+# analytics reports run at once during a history backfill — each on its own client,
+# since the google client (httplib2 underneath) isn't safe to share across threads
+HISTORY_CONCURRENCY = 4
+
+
 async def get_video_daily_history(
     access_token: str,
     refresh_token: str | None,
     youtube_video_id: str,
     start_date: str,
+    end_date: str | None = None,
 ) -> list[dict]:
-    """fetch real daily views/likes/comments for a single video from its publish date to today.
-    returns a list of dicts like {day, views, likes, comments} sorted oldest → newest."""
-    analytics = _build_analytics_client(access_token, refresh_token)
-    today = date.today()
-
-    all_rows: list[dict] = []
-    chunk_start = date.fromisoformat(start_date)
+    """fetch real daily views/likes/comments for a single video between two dates
+    (end defaults to today). returns a list of dicts like {day, views, likes, comments}
+    sorted oldest → newest."""
+    end = date.fromisoformat(end_date) if end_date else date.today()
 
     # fetch in 180-day chunks — the api caps at 200 rows per call and may not paginate
     # reliably, so splitting by date range guarantees we get every day from publish to now
-    while chunk_start <= today:
-        chunk_end = min(chunk_start + timedelta(days=179), today)
+    chunks = []
+    chunk_start = date.fromisoformat(start_date)
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=179), end)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
 
-        response = await _run(
-            analytics.reports().query(
-                ids="channel==MINE",
-                startDate=chunk_start.isoformat(),
-                endDate=chunk_end.isoformat(),
-                dimensions="day",
-                metrics="views,likes,comments",
-                filters=f"video=={youtube_video_id}",
-                sort="day",
-                maxResults=200,
-            ).execute
-        )
+    sem = asyncio.Semaphore(HISTORY_CONCURRENCY)
 
+    async def fetch_chunk(chunk_start: date, chunk_end: date) -> list[dict]:
+        async with sem:
+            analytics = _build_analytics_client(access_token, refresh_token)
+            response = await _run(
+                analytics.reports().query(
+                    ids="channel==MINE",
+                    startDate=chunk_start.isoformat(),
+                    endDate=chunk_end.isoformat(),
+                    dimensions="day",
+                    metrics="views,likes,comments",
+                    filters=f"video=={youtube_video_id}",
+                    sort="day",
+                    maxResults=200,
+                ).execute
+            )
         rows = response.get("rows") or []
-        if rows:
-            headers = [h["name"] for h in response["columnHeaders"]]
-            for row in rows:
-                all_rows.append(dict(zip(headers, row)))
-
-        chunk_start = chunk_end + timedelta(days=1)
+        if not rows:
+            return []
+        headers = [h["name"] for h in response["columnHeaders"]]
+        return [dict(zip(headers, row)) for row in rows]
 
-    return all_rows
+    # chunks are independent, so an old video's backfill takes about as long as one call
+    results = await asyncio.gather(*[fetch_chunk(a, b) for a, b in chunks])
+    return [row for chunk in results for row in chunk]
 
 
 async def get_recent_channel_views(
@@ -289,10 +300,17 @@ async def get_channel_revenue(
 
 
 async def get_video_comments(
-    access_token: str, refresh_token: str | None, youtube_video_id: str
-) -> list[dict]:
-    """fetch the top 10 most-liked comments for a video plus all their replies.
-    returns a flat list — top-level comments and replies mixed, distinguished by is_reply."""
+    access_token: str,
+    refresh_token: str | None,
+    youtube_video_id: str,
+    max_threads: int | None = None,
+) -> tuple[list[dict], bool]:
+    """fetch the top comment threads for a video (settings.comment_threads by default)
+    plus all their replies. returns a flat list — top-level comments and replies mixed,
+    distinguished by is_reply — and whether it's complete (False when some thread's
+    reply pages failed and only its bundled replies made it in). a failed thread listing
+    raises; only a video with comments turned off comes back as ([], True)."""
+    max_threads = max_threads or settings.comment_threads
     youtube = _build_client(access_token, refresh_token)
 
     def parse_comment_snippet(item: dict, is_reply: bool, parent_id: str | None) -> dict:
@@ -312,24 +330,63 @@ async def get_video_comments(
             "updated_at_youtube": s.get("updatedAt"),
         }
 
-    # fetch top 10 comment threads sorted by relevance (youtube's own top-comments ranking)
+    # fetch the top comment threads sorted by relevance (youtube's own top-comments
+    # ranking) — 100 per page is the api max, so only big max_threads need a second page
+    threads: list[dict] = []
+    page_token = None
     try:
-        threads_resp = await _run(
-            youtube.commentThreads().list(
-                part="snippet,replies",
-                videoId=youtube_video_id,
-                maxResults=10,
-                order="relevance",
-                textFormat="plainText",
-            ).execute
-        )
+        while len(threads) < max_threads:
+            threads_resp = await _run(
+                youtube.commentThreads().list(
+                    part="snippet,replies",
+                    videoId=youtube_video_id,
+                    maxResults=min(max_threads - len(threads), 100),
+                    order="relevance",
+                    textFormat="plainText",
+                    pageToken=page_token,
+                ).execute
+            )
+            threads.extend(threads_resp.get("items", []))
+            page_token = threads_resp.get("nextPageToken")
+            if not page_token:
+                break
     except Exception as e:
-        print(f"[comments] commentThreads.list failed for {youtube_video_id}: {e}")
-        return []  # comments may be disabled on the video
+        # commentsDisabled is a real answer — there's nothing to show. anything else
+        # means we don't know what the video has, and an empty list would read as
+        # "every comment was deleted"
+        if not threads and "commentsDisabled" in str(getattr(e, "content", e)):
+            return [], True
+        raise
+
+    sem = asyncio.Semaphore(settings.comment_reply_concurrency)
+
+    async def fetch_replies(thread_id: str) -> list[dict]:
+        """every reply to one thread, following nextPageToken to the end. each call gets
+        its own client — the google client isn't safe to share across threads."""
+        async with sem:
+            client = _build_client(access_token, refresh_token)
+            items: list[dict] = []
+            token = None
+            while True:
+                resp = await _run(
+                    client.comments().list(
+                        part="snippet",
+                        parentId=thread_id,
+                        maxResults=100,
+                        textFormat="plainText",
+                        pageToken=token,
+                    ).execute
+                )
+                items.extend(resp.get("items", []))
+                token = resp.get("nextPageToken")
+                if not token:
+                    return items
 
     all_comments: list[dict] = []
+    # threads whose replies don't all fit in the 5 bundled with the thread response
+    to_fetch: dict[str, list[dict]] = {}
 
-    for thread in threads_resp.get("items", []):
+    for thread in threads:
         top_comment_item = thread["snippet"]["topLevelComment"]
         top_comment = parse_comment_snippet(top_comment_item, is_reply=False, parent_id=None)
         top_comment["reply_count"] = thread["snippet"].get("totalReplyCount", 0)
@@ -347,24 +404,20 @@ async def get_video_comments(
             for reply in bundled:
                 all_comments.append(parse_comment_snippet(reply, is_reply=True, parent_id=thread_id))
         else:
-            # more replies exist than the bundled 5 — fetch them all with a separate call
-            try:
-                replies_resp = await _run(
-                    youtube.comments().list(
-                        part="snippet",
-                        parentId=thread_id,
-                        maxResults=100,
-                        textFormat="plainText",
-                    ).execute
-                )
-                for reply in replies_resp.get("items", []):
-                    all_comments.append(parse_comment_snippet(reply, is_reply=True, parent_id=thread_id))
-            except Exception:
-                # fall back to the bundled ones if the extra call fails
-                for reply in bundled:
-                    all_comments.append(parse_comment_snippet(reply, is_reply=True, parent_id=thread_id))
+            to_fetch[thread_id] = bundled
+
+    # every thread's reply pages in parallel, so the whole tab costs about one round trip
+    results = await asyncio.gather(*[fetch_replies(t) for t in to_fetch], return_exceptions=True)
+    complete = True
+    for (thread_id, bundled), replies in zip(to_fetch.items(), results):
+        if isinstance(replies, BaseException):
+            # fall back to the bundled ones if the extra calls fail
+            replies = bundled
+            complete = False
+        for reply in replies:
+            all_comments.append(parse_comment_snippet(reply, is_reply=True, parent_id=thread_id))
 
-    return all_comments
+    return all_comments, complete
 
 
 async def get_channel_daily_stats(
@@ -468,8 +521,34 @@ async def get_channel_daily_revenue(
     return results
 
 
-async def ensure_reach_job(access_token: str, refresh_token: str | None) -> str:
-    """find an existing reach reporting job or create one if none exists.
+# reporting api report types we schedule jobs for
+REACH_REPORT_TYPE = "channel_reach_basic_a1"
+# per-video daily views / watch time / likes / comments / shares / subs, split by
+# country + subscribed status + live/on-demand (we sum those back up per video-day)
+BASIC_REPORT_TYPE = "channel_basic_a2"
+# per-video daily estimated revenue — only listed for monetized channels, so check
+# list_report_types before scheduling a job for it
+REVENUE_REPORT_TYPE = "channel_estimated_revenue_a1"
+
+
+async def list_report_types(access_token: str, refresh_token: str | None) -> list[str]:
+    """report type ids this channel can schedule jobs for — revenue ones only show up
+    for monetized channels, so callers check here before asking for them."""
+    reporting = _build_reporting_client(access_token, refresh_token)
+    types: list[str] = []
+    page_token = None
+    while True:
+        resp = await _run(reporting.reportTypes().list(pageToken=page_token).execute)
+        types.extend(t["id"] for t in resp.get("reportTypes", []))
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return types
+
+
+async def ensure_report_job(
+    access_token: str, refresh_token: str | None, report_type_id: str, name: str
+) -> str:
+    """find an existing reporting job for this report type or create one if none exists.
     this only needs to happen once ever — after that google keeps generating
     daily csv reports automatically and we just download them on each sync."""
     reporting = _build_reporting_client(access_token, refresh_token)
@@ -477,25 +556,30 @@ async def ensure_reach_job(access_token: str, refresh_token: str | None) -> str:
     # check if we already have a job running for this report type
     jobs_resp = await _run(reporting.jobs().list().execute)
     for job in jobs_resp.get("jobs", []):
-        if job.get("reportTypeId") == "channel_reach_basic_a1":
+        if job.get("reportTypeId") == report_type_id:
             return job["id"]
 
     # no job found — create one (google will start generating daily csvs from now on,
     # plus backfill up to ~60 days of historical data)
     new_job = await _run(
-        reporting.jobs().create(
-            body={"reportTypeId": "channel_reach_basic_a1", "name": "viewpilot reach"}
-        ).execute
+        reporting.jobs().create(body={"reportTypeId": report_type_id, "name": name}).execute
     )
     return new_job["id"]
 
 
-async def download_reach_reports(
-    access_token: str, refresh_token: str | None, job_id: str
-) -> list[dict]:
-    """download all available reach report csv files for the job and return parsed rows.
-    each row is a dict with video_id, impressions, and ctr for a single day.
-    we aggregate these in sync.py to get per-video totals."""
+async def ensure_reach_job(access_token: str, refresh_token: str | None) -> str:
+    """the reach (impressions + ctr) job — see ensure_report_job."""
+    return await ensure_report_job(access_token, refresh_token, REACH_REPORT_TYPE, "viewpilot reach")
+
+
+async def list_reports(
+    access_token: str,
+    refresh_token: str | None,
+    job_id: str,
+) -> tuple[list[dict], str]:
+    """every report file the job has (google generates one per day) — callers skip the
+    ones already in the processed_reports ledger. returns the reports plus the access
+    token to download them with."""
 
     # build creds directly so we can read back the token after any auto-refresh
     creds = Credentials(
@@ -507,47 +591,112 @@ async def download_reach_reports(
     )
     reporting = build("youtubereporting", "v1", credentials=creds)
 
-    # get the list of available report files (google generates one per day)
-    reports_resp = await _run(
-        reporting.jobs().reports().list(jobId=job_id).execute
-    )
-    reports = reports_resp.get("reports", [])
-    if not reports:
-        return []
+    reports = []
+    page_token = None
+    while True:
+        reports_resp = await _run(
+            reporting.jobs().reports().list(
+                jobId=job_id,
+                pageToken=page_token,
+            ).execute
+        )
+        reports.extend(reports_resp.get("reports", []))
+        page_token = reports_resp.get("nextPageToken")
+        if not page_token:
+            break
 
-    all_rows = []
-    # use creds.token here — the api call above may have silently refreshed it,
+    # hand back creds.token — the api calls above may have silently refreshed it,
     # so the original access_token variable could already be expired and wrong
-    auth_headers = {"Authorization": f"Bearer {creds.token}"}
+    return reports, creds.token
+
+
+async def stream_report_rows(client: httpx.AsyncClient, download_url: str, token: str) -> AsyncIterator[dict]:
+    """parse one report csv as it downloads, a line at a time, so the file is never held
+    in memory whole. report csvs are plain comma-separated values with no quoted
+    newlines, so every line is exactly one record. raises on a failed download."""
+    async with client.stream("GET", download_url, headers={"Authorization": f"Bearer {token}"}) as resp:
+        resp.raise_for_status()
+        header = None
+        async for line in resp.aiter_lines():
+            if not line:
+                continue
+            values = next(csv.reader([line]))
+            if header is None:
+                # strip utf-8 bom if present
+                header = [values[0].lstrip("\ufeff"), *values[1:]]
+                continue
+            yield dict(zip(header, values))
+
+
+async def iter_reports(
+    access_token: str,
+    refresh_token: str | None,
+    job_id: str,
+    skip_ids: set[str] | frozenset = frozenset(),
+) -> AsyncIterator[tuple[dict, AsyncIterator[dict]]]:
+    """every report file the job has that isn't in skip_ids, oldest first, each paired
+    with an iterator streaming its csv rows — one file at a time, so a big channel's
+    reports never sit in memory. a failed download raises httpx.HTTPError out of that
+    report's rows; the caller skips it without recording it, so it comes back next sync."""
+    reports, token = await list_reports(access_token, refresh_token, job_id)
+    reports = sorted(
+        (r for r in reports if r.get("downloadUrl") and r["id"] not in skip_ids),
+        key=lambda r: r.get("createTime", ""),
+    )
+    if not reports:
+        return
 
     async with httpx.AsyncClient(timeout=30) as client:
         for report in reports:
-            download_url = report.get("downloadUrl")
-            if not download_url:
-                continue
+            yield report, stream_report_rows(client, report["downloadUrl"], token)
 
-            resp = await client.get(download_url, headers=auth_headers)
-            if resp.status_code != 200:
-                print(f"reach reports: csv download failed with status {resp.status_code}")
-                continue
 
-            # strip utf-8 bom if present, then parse csv
-            text = resp.text.lstrip("\ufeff")
-            reader = csv.DictReader(io.StringIO(text))
-
-            for row in reader:
-                video_id = row.get("video_id", "").strip()
-                if not video_id:
-                    continue  # skip channel-level aggregate rows
-                try:
-                    impressions = int(float(row.get("video_thumbnail_impressions") or 0))
-                    ctr = float(row.get("video_thumbnail_impressions_ctr") or 0)
-                    all_rows.append({
-                        "video_id": video_id,
-                        "impressions": impressions,
-                        "ctr": ctr,
-                    })
-                except (ValueError, TypeError):
-                    continue
+# reach report csvs downloaded at once during an ingest
+REPORT_DOWNLOAD_CONCURRENCY = 4
 
-    return all_rows
+
+async def download_reach_reports(
+    access_token: str,
+    refresh_token: str | None,
+    job_id: str,
+    skip_ids: set[str] | frozenset = frozenset(),
+) -> list[tuple[dict, dict]]:
+    """download every reach report the job has that isn't in skip_ids (the ones
+    already ingested), a few at a time, each one summed while it streams. returns
+    (report, totals) pairs, where totals maps (youtube video id, day) →
+    [impressions, impressions × ctr] — the ctr-weighted form, so rows for the same
+    video-day add up exactly. the listing is deliberately not narrowed by create time:
+    a report whose download failed is left out here and, since it never makes it into
+    skip_ids, gets listed and downloaded again next sync even when newer ones succeeded."""
+    reports, token = await list_reports(access_token, refresh_token, job_id)
+    reports = [r for r in reports if r.get("downloadUrl") and r["id"] not in skip_ids]
+    if not reports:
+        return []
+
+    sem = asyncio.Semaphore(REPORT_DOWNLOAD_CONCURRENCY)
+
+    async def fetch(client: httpx.AsyncClient, report: dict) -> tuple[dict, dict] | None:
+        totals: dict[tuple[str, date], list] = {}
+        async with sem:
+            try:
+                async for row in stream_report_rows(client, report["downloadUrl"], token):
+                    video_id = row.get("video_id", "").strip()
+                    if not video_id or not row.get("date"):
+                        continue  # skip channel-level aggregate rows
+                    try:
+                        impressions = int(float(row.get("video_thumbnail_impressions") or 0))
+                        ctr = float(row.get("video_thumbnail_impressions_ctr") or 0)
+                        day = date(int(row["date"][:4]), int(row["date"][4:6]), int(row["date"][6:8]))
+                    except (ValueError, TypeError):
+                        continue
+                    bucket = totals.setdefault((video_id, day), [0, 0.0])
+                    bucket[0] += impressions
+                    bucket[1] += impressions * ctr
+            except httpx.HTTPError as e:
+                print(f"reach reports: csv download failed for report {report['id']}: {e}")
+                return None
+        return report, totals
+
+    async with httpx.AsyncClient(timeout=30) as client:
+        results = await asyncio.gather(*[fetch(client, r) for r in reports])
+    return [r for r in results if r is not None]
@@ -0,0 +1,64 @@
+from datetime import date
+
+import numpy as np
+
+# binary media types the charts api can answer with, picked from the Accept header
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def negotiate(accept: str | None) -> str:
+    """"arrow", "msgpack" or "json" — the first binary type the client lists wins,
+    anything else (including */*) keeps the plain json response."""
+    for part in (accept or "").split(","):
+        media = part.split(";")[0].strip().lower()
+        if media == ARROW_MEDIA_TYPE:
+            return "arrow"
+        if media in (MSGPACK_MEDIA_TYPE, "application/x-msgpack"):
+            return "msgpack"
+    return "json"
+
+
+def _column(values: list, is_int: bool) -> np.ndarray:
+    # ints are never null; floats carry null as NaN so the client can use a Float64Array
+    if is_int:
+        return np.asarray(values, dtype="<i8")
+    return np.asarray([np.nan if v is None else v for v in values], dtype="<f8")
+
+
+def to_msgpack(payload: dict, int_metrics: set[str]) -> bytes:
+    """the charts payload as messagepack: dates become a start day plus day deltas
+    (1 for daily, 7 for weekly — each packs into a single byte), and each metric
+    is a little-endian int64 / float64 buffer the client wraps without parsing."""
+    import msgpack
+
+    days = [date.fromisoformat(d) for d in payload["dates"]]
+    deltas = [0] + [(b - a).days for a, b in zip(days, days[1:])]
+    return msgpack.packb({
+        "granularity": payload["granularity"],
+        "start": payload["dates"][0] if days else None,
+        "date_deltas": deltas if days else [],
+        "metrics": {
+            m: {
+                "dtype": "<i8" if m in int_metrics else "<f8",
+                "data": _column(values, m in int_metrics).tobytes(),
+            }
+            for m, values in payload["metrics"].items()
+        },
+    })
+
+
+def to_arrow(payload: dict, int_metrics: set[str]) -> bytes:
+    """the charts payload as one arrow ipc stream: a date32 column plus one int64 /
+    float64 column per metric (nulls stay real nulls), granularity in the metadata."""
+    import pyarrow as pa
+
+    columns = {"date": pa.array([date.fromisoformat(d) for d in payload["dates"]], type=pa.date32())}
+    for m, values in payload["metrics"].items():
+        columns[m] = pa.array(values, type=pa.int64() if m in int_metrics else pa.float64())
+    table = pa.table(columns, metadata={"granularity": payload["granularity"]})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
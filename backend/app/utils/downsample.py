@@ -0,0 +1,34 @@
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """largest-triangle-three-buckets: pick n_out indices out of the (x, y) series that
+    keep its visual shape. the first and last points are always kept; every bucket in
+    between keeps the point that makes the biggest triangle with the previously kept
+    point and the average of the next bucket. x has to be sorted ascending.
+
+    the walk over buckets is inherently sequential (each pick depends on the last one)
+    but it's only n_out steps — the per-point area math inside a bucket is vectorized."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # bucket edges over the interior points (index 1 .. n-2)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0] = 0
+    picked[-1] = n - 1
+
+    prev = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # average of the next bucket (the last bucket looks at the final point)
+        nlo, nhi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        prev = lo + int(area.argmax())
+        picked[b + 1] = prev
+    return picked
@@ -0,0 +1,97 @@
+import base64
+import hashlib
+import json
+import operator
+import uuid
+from datetime import datetime
+
+import sqlalchemy as sa
+
+# how a page reports its total:
+#   exact    — count(*) over the channel (scans the channel's videos)
+#   estimate — the channel's video_count from the youtube api, no query at all
+#   none     — skip it, for infinite scroll where only next_cursor matters
+TOTAL_MODES = ["exact", "estimate", "none"]
+
+
+def filters_hash(filters: dict) -> str:
+    """short stable fingerprint of the active filters, so a cursor can tell whether it's
+    being replayed against the list it came from."""
+    raw = json.dumps(filters, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def encode_cursor(sort_value, row_id: uuid.UUID, sort_by: str, order: str, filters: dict) -> str:
+    """opaque cursor pointing just past a row — its sort key plus its id as the
+    tie-breaker, and the sort + filters it belongs to. datetimes are tagged so they come
+    back as datetimes, not strings."""
+    if isinstance(sort_value, datetime):
+        sort_value = {"dt": sort_value.isoformat()}
+    raw = json.dumps(
+        {"k": [sort_value, str(row_id)], "s": sort_by, "o": order, "f": filters_hash(filters)},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str, filters: dict) -> tuple:
+    """inverse of encode_cursor. raises ValueError on anything we didn't hand out, and on
+    a cursor from a list with a different sort, order or filters — its key wouldn't
+    mean anything in this one."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        sort_value, row_id = data["k"]
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["dt"])
+        row_id = uuid.UUID(row_id)
+        scope = (data["s"], data["o"], data["f"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("invalid cursor") from e
+    if scope != (sort_by, order, filters_hash(filters)):
+        raise ValueError("cursor belongs to a different sort or filters — start again without it")
+    return sort_value, row_id
+
+
+def _nullable(col, nullable: bool | None) -> bool:
+    if nullable is not None:
+        return nullable
+    return getattr(getattr(col, "expression", col), "nullable", True)
+
+
+def keyset_order(sort_col, id_col, order: str, nullable: bool | None = None) -> list:
+    """ORDER BY for keyset paging — the id breaks ties so the order is total, and nulls
+    always sort last so "after the cursor" has one meaning in both directions. a NOT NULL
+    column gets a plain asc / desc, which a (channel_id, column) index serves walking
+    either way; nullable ones need their own index for desc nulls last. nullable
+    defaults to the column's own — pass True for a column off an outer join, where a
+    NOT NULL column still comes back null for the rows with nothing to join."""
+    if not _nullable(sort_col, nullable):
+        return [sort_col.desc(), id_col.desc()] if order == "desc" else [sort_col.asc(), id_col.asc()]
+    if order == "desc":
+        return [sort_col.desc().nulls_last(), id_col.desc()]
+    return [sort_col.asc().nulls_last(), id_col.asc()]
+
+
+def keyset_after(
+    sort_col, id_col, cursor: str, sort_by: str, order: str, filters: dict, nullable: bool | None = None
+):
+    """WHERE clause for the rows that come strictly after the cursor in keyset_order.
+    non-null keys use a row comparison so postgres can seek straight to the spot — on a
+    NOT NULL column that's the whole clause. a nullable one also lets the null tail
+    through, and once we're into it only the id is left to compare. the key's type is
+    checked against the column's, so a doctored cursor is a ValueError rather than a
+    postgres error."""
+    sort_value, row_id = decode_cursor(cursor, sort_by, order, filters)
+    nullable = _nullable(sort_col, nullable)
+    expected = sort_col.type.python_type
+    if sort_value is None:
+        if not nullable:
+            raise ValueError("invalid cursor")
+    elif isinstance(sort_value, bool) or not isinstance(sort_value, (int, float) if expected is float else expected):
+        raise ValueError("invalid cursor")
+    past = operator.lt if order == "desc" else operator.gt
+    if sort_value is None:
+        return sort_col.is_(None) & past(id_col, row_id)
+    seek = past(sa.tuple_(sort_col, id_col), (sort_value, row_id))
+    return seek if not nullable else seek | sort_col.is_(None)
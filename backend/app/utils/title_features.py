@@ -0,0 +1,80 @@
+import hashlib
+import re
+
+# (exclusive upper bound in seconds, label) — anything past the last bound is "15+ min"
+DURATION_BUCKET_BOUNDS = [
+    (180, "< 3 min"), (480, "3–7 min"), (600, "8–9 min"), (720, "10–11 min"), (900, "12–14 min"),
+]
+DURATION_BUCKETS = [label for _, label in DURATION_BUCKET_BOUNDS] + ["15+ min"]
+
+# common words that don't tell us anything useful about title patterns
+STOP_WORDS = {
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for",
+    "of", "with", "by", "is", "it", "this", "that", "i", "my", "you",
+    "your", "we", "me", "be", "do", "did", "was", "are", "has", "have",
+    "had", "not", "no", "so", "if", "as", "from", "up", "out", "am",
+    "what", "when", "how", "who", "all", "get", "got", "its", "im",
+    "just", "more", "about", "than", "into", "they", "them", "will",
+    "can", "her", "his", "him", "she", "he", "us", "vs", "was", "were",
+}
+
+# one scanner for everything we care about in a title: words (letters, digits,
+# apostrophes) and the handful of punctuation marks we flag
+_TITLE_SCANNER = re.compile(r"(?P<word>[\w']+)|(?P<mark>[?!:(\[{])")
+_ASCII_CAPS = re.compile(r"[A-Z]{2,}")
+_ASCII_TOKEN = re.compile(r"[a-z']{3,}")
+
+
+def title_hash(title: str) -> str:
+    """stable fingerprint of a title — lets sync skip re-extracting unchanged titles."""
+    return hashlib.sha1(title.encode()).hexdigest()
+
+
+def duration_bucket(secs: int | None) -> str:
+    """which duration bucket a video falls into for the autopsy breakdown."""
+    if not secs:
+        return "Unknown"
+    for upper, label in DURATION_BUCKET_BOUNDS:
+        if secs < upper:
+            return label
+    return DURATION_BUCKETS[-1]
+
+
+def extract_title_features(title: str) -> dict:
+    """pull every structural + linguistic feature out of a title in a single scan.
+    keys line up with the VideoFeatures columns so the result can be upserted as-is."""
+    has_number = has_all_caps = False
+    marks: set[str] = set()
+    tokens: list[str] = []
+
+    for match in _TITLE_SCANNER.finditer(title):
+        mark = match.group("mark")
+        if mark:
+            marks.add(mark)
+            continue
+
+        word = match.group("word")
+        if not has_number and any(c.isdigit() for c in word):
+            has_number = True
+        # any word in ALL CAPS (at least 2 letters) — signals emphasis/urgency.
+        # apostrophes split words the same way a \b boundary would ("DON'T" → "DON")
+        if not has_all_caps and any(_ASCII_CAPS.fullmatch(part) for part in word.split("'")):
+            has_all_caps = True
+        # meaningful words for the top-words list (skip stopwords, min 3 chars)
+        lowered = word.lower().strip("'")
+        if _ASCII_TOKEN.fullmatch(lowered) and lowered not in STOP_WORDS:
+            tokens.append(lowered)
+
+    return {
+        "title_length": len(title),
+        "word_count": len(title.split()),
+        "has_number": has_number,
+        "has_question": "?" in marks,
+        "has_exclamation": "!" in marks,
+        "has_all_caps": has_all_caps,
+        # colon-style titles like "Valorant: Why I Quit" or "Tips: How To Win"
+        "has_colon": ":" in marks,
+        # brackets/parens like "[LIVE]", "(Explained)", "(ft. Someone)"
+        "has_brackets": bool(marks & {"(", "[", "{"}),
+        "title_tokens": tokens,
+    }
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from app.models.stats import VideoMetrics
+from app.models.videos import Video
+
+# sort_by → column, for the rest and graphql video lists alike (one map, so a sort —
+# and the keyset cursor it hands out — means the same thing in both). video_metrics
+# holds the latest counters + revenue as well as the derived metrics, precomputed +
+# indexed at sync
+SORT_COLUMNS = {
+    "views": VideoMetrics.view_count,
+    "likes": VideoMetrics.like_count,
+    "comments": VideoMetrics.comment_count,
+    "published_at": Video.published_at,
+    "duration": Video.duration_seconds,
+    "title": Video.title,
+    "revenue": VideoMetrics.estimated_revenue,
+    "rpm": VideoMetrics.rpm,
+    "views_per_day": VideoMetrics.views_per_day,
+    "engagement_rate": VideoMetrics.engagement_rate,
+    "comment_rate": VideoMetrics.comment_rate,
+    "avg_view_pct": VideoMetrics.average_view_percentage,
+    "ctr_first_7d": VideoMetrics.ctr_first_7d,
+    "ctr_last_28d": VideoMetrics.ctr_last_28d,
+}
+
+
+def video_filter_clauses(
+    *,
+    is_short: bool | None = None,
+    published_after: datetime | None = None,
+    published_before: datetime | None = None,
+    min_duration: int | None = None,
+    max_duration: int | None = None,
+    category_id: str | None = None,
+    tags: list[str] | None = None,
+    min_views: int | None = None,
+    min_revenue: float | None = None,
+) -> list:
+    """WHERE clauses for the video list filters, shared by the rest and graphql lists,
+    which both select videos outer-joined to video_metrics. None means "don't filter on
+    this". each one lines up with an index: published range → (channel_id,
+    published_at), tags → the gin index on videos.tags (@> containment, so every listed
+    tag must be present), views / revenue → the (channel_id, view_count) /
+    (channel_id, estimated_revenue) indexes on video_metrics — a filter on the joined
+    side turns the outer join back into an inner one, so postgres can start from them."""
+    clauses = []
+    if is_short is not None:
+        clauses.append(Video.is_short.is_(is_short))
+    if published_after is not None:
+        clauses.append(Video.published_at >= published_after)
+    if published_before is not None:
+        clauses.append(Video.published_at < published_before)
+    if min_duration is not None:
+        clauses.append(Video.duration_seconds >= min_duration)
+    if max_duration is not None:
+        clauses.append(Video.duration_seconds <= max_duration)
+    if category_id is not None:
+        clauses.append(Video.category_id == category_id)
+    if tags:
+        clauses.append(Video.tags.contains(tags))
+
+    # views + revenue come from video_metrics (refreshed every sync) — the lists
+    # outer-join it onto videos, so these filter the joined row directly and a video
+    # without metrics yet just doesn't pass them
+    if min_views is not None:
+        clauses.append(VideoMetrics.view_count >= min_views)
+    if min_revenue is not None:
+        clauses.append(VideoMetrics.estimated_revenue >= min_revenue)
+    return clauses
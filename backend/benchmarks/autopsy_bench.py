@@ -0,0 +1,356 @@
+"""benchmark for the autopsy endpoint against synthetic channels.
+
+seeds postgres (whatever DATABASE_URL points at — use a throwaway db, never prod) with
+one fake channel per size, then hits GET /api/v1/autopsy end to end through the asgi
+app and reports p50/p95 for the whole request and for each phase:
+
+    sql        time spent inside postgres round trips (cursor execute events)
+    enrich     turning rows into member dicts / window contributions
+    sections   rendering every analysis section from the aggregates
+    serialize  encoding the result to json the way the route + fastapi do
+
+two modes per size: "full" clears the stored aggregate state before every request
+(what the first open after a tier shift costs), "incremental" keeps it (what an open
+costs when nothing moved tiers since the last one). the result cache is never served so every request
+actually does the work. autopsy doesn't call the analytics api anymore (everything
+comes from video_metrics), so there's nothing external to stub — redis is swapped for
+an in-process dict so the numbers don't include network hops to a cache.
+
+run from backend/ once migrations are applied:
+
+    python -m benchmarks.autopsy_bench                       # all sizes
+    python -m benchmarks.autopsy_bench --sizes 100 1000 -n 50
+    python -m benchmarks.autopsy_bench --reseed              # drop + recreate the fake channels
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, event, insert, select
+
+import app.services.autopsy as autopsy_service
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+from app.models.channels import Channel
+from app.models.stats import VideoAnalytics, VideoMetrics, VideoStats
+from app.models.users import User
+from app.models.videos import Video, VideoFeatures
+from app.utils.dependencies import get_current_user
+from app.utils.title_features import duration_bucket, extract_title_features, title_hash
+
+SIZES = [100, 1_000, 10_000, 50_000]
+PHASES = ["total", "sql", "enrich", "sections", "serialize"]
+INSERT_CHUNK = 2_000
+
+WORDS = (
+    "valorant ranked guide tips tricks best worst settings aim training pro fails "
+    "highlights montage update patch review reaction challenge tier list beginner "
+    "advanced secret hidden strategy meta build loadout ultimate insane clutch funny "
+    "moments stream vlog tutorial explained comparison budget setup tour day life"
+).split()
+TITLE_TEMPLATES = [
+    "{a} {b} {c}",
+    "{a} {b}: {c} {d}",
+    "Why I {a} {b}?",
+    "{n} {a} {b} You NEED To Know!",
+    "{a} {b} ({c} {d})",
+    "I Tried {a} {b} For {n} Days",
+    "[{a}] {b} {c} {d}",
+]
+CATEGORIES = ["20", "20", "20", "24", "22", "27", "28", "23"]
+
+
+# ── seeding ───────────────────────────────────────────────────────────────────
+
+
+def _fake_title(rng: random.Random) -> str:
+    words = rng.sample(WORDS, 4)
+    title = rng.choice(TITLE_TEMPLATES).format(
+        a=words[0], b=words[1], c=words[2], d=words[3], n=rng.randint(2, 100)
+    )
+    return title.title() if rng.random() < 0.7 else title
+
+
+def _fake_channel_rows(channel_id, size: int, rng: random.Random) -> dict[str, list[dict]]:
+    """one channel's worth of videos + stats + analytics + precomputed metrics/features.
+    view counts are log-normal so there's a long tail of hits like a real channel, and
+    published dates are spread so the newest 200 span a few months."""
+    now = datetime.now(UTC)
+    span_days = max(size // 2, 60)
+    rows: dict[str, list[dict]] = defaultdict(list)
+
+    for i in range(size):
+        video_id = uuid.uuid4()
+        published_at = now - timedelta(days=span_days * i / size, hours=rng.uniform(0, 24))
+        is_short = rng.random() < 0.1
+        # ~1% livestreams / drafts so the junk filter has something to drop
+        duration = 0 if rng.random() < 0.01 else rng.randint(15, 58) if is_short else rng.randint(120, 2400)
+        title = _fake_title(rng)
+        tags = rng.sample(WORDS, rng.randint(0, 15))
+        days_live = max((now.date() - published_at.date()).days, 1)
+        views = max(int(rng.lognormvariate(8, 1.6)), 0)
+        likes = int(views * rng.uniform(0.01, 0.06))
+        comments = int(views * rng.uniform(0.001, 0.01))
+
+        rows["videos"].append({
+            "id": video_id,
+            "channel_id": channel_id,
+            "youtube_video_id": f"bench-{size}-{i}",
+            "title": title,
+            "description": "",
+            "tags": tags,
+            "category_id": rng.choice(CATEGORIES),
+            "duration_seconds": duration,
+            "published_at": published_at,
+            "thumbnail_url": None,
+            "is_short": is_short,
+        })
+        # a few snapshots per video like a handful of past syncs would leave behind
+        for snap in range(3):
+            rows["stats"].append({
+                "video_id": video_id,
+                "view_count": int(views * (0.9 + snap * 0.05)),
+                "like_count": likes,
+                "comment_count": comments,
+                "fetched_at": now - timedelta(hours=6 * (2 - snap)),
+            })
+
+        has_analytics = rng.random() < 0.9
+        ctr = rng.uniform(0.02, 0.12) if has_analytics else None
+        impressions = int(views / ctr) if ctr else None
+        avg_duration = duration * rng.uniform(0.2, 0.6) if has_analytics and duration else None
+        minutes = views * avg_duration / 60 if avg_duration else None
+        revenue = views / 1000 * rng.uniform(1, 6) if has_analytics and not is_short else None
+        if has_analytics:
+            rows["analytics"].append({
+                "video_id": video_id,
+                "date": now.date(),
+                "views": views,
+                "estimated_minutes_watched": minutes,
+                "average_view_duration_seconds": avg_duration,
+                "average_view_percentage": avg_duration / duration * 100 if avg_duration else None,
+                "click_through_rate": ctr,
+                "impressions": impressions,
+                "estimated_revenue": revenue,
+                "rpm": revenue / views * 1000 if revenue and views else None,
+            })
+
+        rows["metrics"].append({
+            "video_id": video_id,
+            "channel_id": channel_id,
+            "view_count": views,
+            "like_count": likes,
+            "comment_count": comments,
+            "views_per_day": views / days_live,
+            "engagement_rate": likes / views * 100 if views else 0.0,
+            "comment_rate": comments / views * 100 if views else 0.0,
+            "views_last_30d": int(views * min(30 / days_live, 1)) if has_analytics else None,
+            "estimated_minutes_watched": minutes,
+            "estimated_revenue": revenue,
+            "rpm": revenue / views * 1000 if revenue and views else None,
+            "click_through_rate": ctr,
+            "impressions": impressions,
+            "average_view_duration_seconds": avg_duration,
+            "average_view_percentage": avg_duration / duration * 100 if avg_duration else None,
+        })
+        rows["features"].append({
+            "video_id": video_id,
+            "title_hash": title_hash(title),
+            "duration_bucket": duration_bucket(duration),
+            **extract_title_features(title),
+        })
+    return rows
+
+
+async def _seed_channel(size: int, reseed: bool) -> tuple[User, Channel]:
+    """find or create the fake user + channel for this size."""
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User).where(User.google_id == f"bench-{size}"))).scalar_one_or_none()
+        if user and reseed:
+            # channels, videos and everything hanging off them cascade
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+            user = None
+
+        if user:
+            channel = (await db.execute(select(Channel).where(Channel.user_id == user.id))).scalar_one()
+            return user, channel
+
+        print(f"seeding {size:,} videos...")
+        started = time.perf_counter()
+        user = User(google_id=f"bench-{size}", email=f"bench-{size}@example.com", name=f"bench {size}")
+        db.add(user)
+        await db.flush()
+        channel = Channel(user_id=user.id, youtube_channel_id=f"bench-{size}", title=f"bench {size}", video_count=size)
+        db.add(channel)
+        await db.flush()
+
+        rows = _fake_channel_rows(channel.id, size, random.Random(size))
+        for model, key in [
+            (Video, "videos"), (VideoStats, "stats"), (VideoAnalytics, "analytics"),
+            (VideoMetrics, "metrics"), (VideoFeatures, "features"),
+        ]:
+            batch = rows[key]
+            for i in range(0, len(batch), INSERT_CHUNK):
+                await db.execute(insert(model), batch[i:i + INSERT_CHUNK])
+        await db.commit()
+        print(f"  seeded in {time.perf_counter() - started:.1f}s")
+        return user, channel
+
+
+# ── instrumentation ───────────────────────────────────────────────────────────
+
+
+class BenchRedis:
+    """just enough of the redis client for the autopsy route. the result cache is
+    never served so every request recomputes; the aggregate state is kept unless the
+    run is in full mode."""
+
+    def __init__(self, timer: "PhaseTimer"):
+        self.store: dict[str, str] = {}
+        self.timer = timer
+
+    async def get(self, key: str):
+        if key.startswith("autopsy:"):
+            return None
+        return self.store.get(key)
+
+    async def set(self, key: str, value: str, ex: int | None = None):
+        if key.startswith("autopsy:"):
+            # the value was encoded just before this call — that's the result's dumps
+            self.timer.current["serialize"] += self.timer.last_dumps
+        self.store[key] = value
+
+    def clear_state(self):
+        self.store = {k: v for k, v in self.store.items() if not k.startswith("autopsy-state:")}
+
+
+class PhaseTimer:
+    """accumulates seconds per phase for the request in flight."""
+
+    def __init__(self):
+        self.current: dict[str, float] = defaultdict(float)
+        self.last_dumps = 0.0
+
+    def wrap(self, phase: str, fn):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.current[phase] += time.perf_counter() - started
+        return timed
+
+    def install(self):
+        # sql: every cursor execute on the engine
+        def before(conn, cursor, statement, parameters, context, executemany):
+            context._bench_started = time.perf_counter()
+
+        def after(conn, cursor, statement, parameters, context, executemany):
+            self.current["sql"] += time.perf_counter() - context._bench_started
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before)
+        event.listen(engine.sync_engine, "after_cursor_execute", after)
+
+        # enrichment + sections: the row → dict helpers and the renderer
+        autopsy_service._member = self.wrap("enrich", autopsy_service._member)
+        autopsy_service._contribution = self.wrap("enrich", autopsy_service._contribution)
+        autopsy_service._render = self.wrap("sections", autopsy_service._render)
+
+        # serialization: the result cache write + fastapi's response encoding. the
+        # service json-encodes its aggregate state with the same json.dumps, so dumps
+        # only notes how long it took — BenchRedis.set books it for the result key
+        timer = self
+
+        class TimedJson:
+            loads = staticmethod(json.loads)
+
+            @staticmethod
+            def dumps(obj, **kwargs):
+                started = time.perf_counter()
+                try:
+                    jsonable_encoder(obj)
+                    return json.dumps(obj, **kwargs)
+                finally:
+                    timer.last_dumps = time.perf_counter() - started
+
+        autopsy_service.json = TimedJson
+
+    def take(self) -> dict[str, float]:
+        phases, self.current = dict(self.current), defaultdict(float)
+        return phases
+
+
+def _percentile(samples: list[float], pct: int) -> float:
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+# ── runner ────────────────────────────────────────────────────────────────────
+
+
+async def _bench_size(client, redis: BenchRedis, timer: PhaseTimer, size: int, args) -> None:
+    user, channel = await _seed_channel(size, args.reseed)
+    app.dependency_overrides[get_current_user] = lambda: user
+    params = {"channel_id": str(channel.id), "window_size": args.window_size, "tier_pct": args.tier_pct}
+
+    for mode in ("full", "incremental"):
+        samples: dict[str, list[float]] = defaultdict(list)
+        for i in range(args.warmup + args.iterations):
+            if mode == "full":
+                redis.clear_state()
+            timer.take()
+            started = time.perf_counter()
+            resp = await client.get("/api/v1/autopsy", params=params)
+            total = time.perf_counter() - started
+            phases = timer.take()
+            resp.raise_for_status()
+            if i < args.warmup:
+                continue
+            samples["total"].append(total)
+            for phase in PHASES[1:]:
+                samples[phase].append(phases.get(phase, 0.0))
+
+        line = "  ".join(
+            f"{phase} {_percentile(samples[phase], 50) * 1000:7.2f}/{_percentile(samples[phase], 95) * 1000:7.2f}"
+            for phase in PHASES
+        )
+        print(f"{size:>7,} {mode:<12} {line}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="benchmark the autopsy endpoint")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("-n", "--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--window-size", type=int, default=200)
+    parser.add_argument("--tier-pct", type=int, default=10)
+    parser.add_argument("--reseed", action="store_true", help="drop and recreate the fake channels")
+    args = parser.parse_args()
+
+    timer = PhaseTimer()
+    timer.install()
+    redis = BenchRedis(timer)
+    app.state.redis = redis
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'videos':>7} {'mode':<12} " + "  ".join(f"{p} p50/p95 ms" for p in PHASES))
+        for size in args.sizes:
+            await _bench_size(client, redis, timer, size, args)
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
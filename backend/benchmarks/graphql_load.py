@@ -0,0 +1,134 @@
+"""sustained graphql load against a synthetic channel, watching the connection pool.
+
+seeds postgres (whatever DATABASE_URL points at — use a throwaway db, never prod) with
+the same fake channel autopsy_bench uses, then keeps --concurrency clients posting a
+videos page with nested stats + history to /graphql through the asgi app for
+--duration seconds. once a second it prints requests/s alongside the pool:
+
+    out        connections checked out right now
+    peak       most ever checked out at once
+    connects   physical connections opened since start
+
+a session leak shows up as `out` ratcheting up between samples and `connects` growing
+past pool size + overflow as the pool keeps opening replacements. the run fails (exit
+1) if anything is still checked out once traffic stops, or the pool had to open more
+connections than it can hold. redis is the real one from REDIS_URL — the cost budget
+and apq live there.
+
+run from backend/ once migrations are applied:
+
+    python -m benchmarks.graphql_load
+    python -m benchmarks.graphql_load --duration 120 --concurrency 64 --size 10000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from base64 import b64encode
+
+import httpx
+import redis.asyncio as aioredis
+from itsdangerous import TimestampSigner
+
+from app.config import settings
+from app.database import engine, pool_metrics
+from app.main import app
+from benchmarks.autopsy_bench import _seed_channel
+
+QUERY = """
+query Load($channelId: ID!, $perPage: Int!) {
+  videos(channelId: $channelId, perPage: $perPage, total: "none") {
+    items {
+      id
+      title
+      latestStats { viewCount likeCount }
+      statsHistory(maxPoints: 20) { viewCount fetchedAt }
+      analytics { views clickThroughRate }
+    }
+  }
+}
+"""
+
+
+def _session_cookie(user_id) -> str:
+    """a session cookie the way starlette's SessionMiddleware signs one."""
+    data = b64encode(json.dumps({"user_id": str(user_id)}).encode())
+    return TimestampSigner(str(settings.secret_key)).sign(data).decode()
+
+
+async def _client_loop(client, payload: dict, stop_at: float, counts: dict) -> None:
+    while time.perf_counter() < stop_at:
+        resp = await client.post("/graphql", json=payload)
+        body = resp.json()
+        if resp.status_code != 200 or body.get("errors"):
+            counts["errors"] += 1
+            if counts["errors"] == 1:
+                print(f"first error: {resp.status_code} {body.get('errors')}")
+        counts["requests"] += 1
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="sustained graphql load with pool metrics")
+    parser.add_argument("--duration", type=int, default=60, help="seconds of traffic")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--size", type=int, default=1_000, help="videos in the fake channel")
+    parser.add_argument("--per-page", type=int, default=50)
+    parser.add_argument("--reseed", action="store_true", help="drop and recreate the fake channel")
+    args = parser.parse_args()
+
+    user, channel = await _seed_channel(args.size, args.reseed)
+    app.state.redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+    app.state.redis_bytes = aioredis.from_url(settings.redis_url)
+    # one user hammering the api would burn through its per-minute cost budget in
+    # seconds — this is measuring sessions, not the budget
+    settings.graphql_cost_budget = 10**12
+
+    payload = {"query": QUERY, "variables": {"channelId": str(channel.id), "perPage": args.per_page}}
+    counts = {"requests": 0, "errors": 0}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://load", cookies={"session": _session_cookie(user.id)}, limits=limits
+    ) as client:
+        stop_at = time.perf_counter() + args.duration
+        workers = [
+            asyncio.create_task(_client_loop(client, payload, stop_at, counts)) for _ in range(args.concurrency)
+        ]
+
+        print(f"{'t':>4} {'req/s':>7} {'out':>4} {'peak':>5} {'connects':>9}")
+        last, started = 0, time.perf_counter()
+        while not all(w.done() for w in workers):
+            await asyncio.sleep(1)
+            m = pool_metrics()
+            print(
+                f"{time.perf_counter() - started:4.0f} {counts['requests'] - last:7d}"
+                f" {m['checked_out']:4d} {m['peak_checked_out']:5d} {m['connects']:9d}"
+            )
+            last = counts["requests"]
+        await asyncio.gather(*workers)
+
+    m = pool_metrics()
+    capacity = m["size"] + engine.sync_engine.pool._max_overflow
+    print(f"\n{counts['requests']:,} requests, {counts['errors']:,} errors, pool after traffic: {m}")
+
+    failures = []
+    if m["checked_out"]:
+        failures.append(f"{m['checked_out']} connections still checked out after traffic stopped")
+    if m["connects"] > capacity:
+        failures.append(f"opened {m['connects']} connections, pool only holds {capacity}")
+    if m["checkouts"] != m["checkins"]:
+        failures.append(f"{m['checkouts']} checkouts vs {m['checkins']} checkins")
+
+    await app.state.redis.aclose()
+    await app.state.redis_bytes.aclose()
+    await engine.dispose()
+
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("ok: no connection growth")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,201 @@
+"""shared fixtures. the db tests run against a real postgres — point TEST_DATABASE_URL at
+a throwaway database (never dev or prod, every table is truncated after each test) and
+they create the schema themselves. without it they're skipped."""
+import os
+
+# settings refuses to load without these — tests never talk to google with them
+os.environ.setdefault("DATABASE_URL", os.environ.get("TEST_DATABASE_URL", "postgresql+asyncpg://localhost/test"))
+os.environ.setdefault("GOOGLE_CLIENT_ID", "test")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "test")
+os.environ.setdefault("GOOGLE_REDIRECT_URI", "http://localhost/callback")
+os.environ.setdefault("SECRET_KEY", "test")
+
+import json
+import time
+import uuid
+from base64 import b64encode
+from datetime import UTC, datetime, timedelta
+
+import httpx
+import pytest
+import sqlalchemy as sa
+from itsdangerous import TimestampSigner
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401 — registers every table on Base.metadata
+from app.config import settings
+from app.database import Base, get_db
+from app.models.channels import Channel
+from app.models.users import User
+from app.models.videos import Video
+
+
+@pytest.fixture
+async def session_factory():
+    """a sessionmaker bound to the test database, schema created, wiped afterwards."""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(sa.text("CREATE EXTENSION IF NOT EXISTS vector"))
+            await conn.run_sync(Base.metadata.create_all)
+    except OSError as e:
+        await engine.dispose()
+        pytest.skip(f"test database unreachable: {e}")
+
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    tables = ", ".join(t.name for t in Base.metadata.sorted_tables)
+    async with engine.begin() as conn:
+        await conn.execute(sa.text(f"TRUNCATE {tables} CASCADE"))
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db(session_factory):
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+async def channel(db) -> Channel:
+    user = User(google_id=f"g-{uuid.uuid4()}", email="test@example.com", name="test")
+    db.add(user)
+    await db.flush()
+    channel = Channel(user_id=user.id, youtube_channel_id=f"UC{uuid.uuid4().hex[:22]}", title="test channel")
+    db.add(channel)
+    await db.commit()
+    return channel
+
+
+@pytest.fixture
+def add_videos(db, channel):
+    """adds a bare video row per youtube id to the channel, returned keyed by it."""
+
+    async def add(youtube_ids: list[str]) -> dict[str, Video]:
+        videos = {
+            yt_id: Video(channel_id=channel.id, youtube_video_id=yt_id, title=yt_id, published_at=datetime.now(UTC))
+            for yt_id in youtube_ids
+        }
+        db.add_all(videos.values())
+        await db.commit()
+        return videos
+
+    return add
+
+
+class FakePipeline:
+    """queues calls and runs them against the fake on execute, like a redis pipeline."""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self):
+        results = [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+        self.calls = []
+        return results
+
+
+class FakeRedis:
+    """the handful of string commands the services use, in memory, with expiry."""
+
+    def __init__(self):
+        self.data: dict[str, tuple[object, float | None]] = {}
+
+    def _live(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            self.data.pop(key, None)
+            return None
+        return value
+
+    def ttl_of(self, key) -> float | None:
+        _, expires = self.data.get(key, (None, None))
+        return None if expires is None else expires - time.monotonic()
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self._live(key)
+
+    async def mget(self, keys):
+        return [self._live(k) for k in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and self._live(key) is not None:
+            return None
+        if isinstance(ex, timedelta):
+            ex = ex.total_seconds()
+        self.data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    async def setex(self, key, ttl, value):
+        return await self.set(key, value, ex=ttl)
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+    async def incrby(self, key, amount=1):
+        value = int(self._live(key) or 0) + amount
+        _, expires = self.data.get(key, (None, None))
+        self.data[key] = (str(value), expires)
+        return value
+
+    async def expire(self, key, ttl):
+        if self._live(key) is None:
+            return False
+        self.data[key] = (self.data[key][0], time.monotonic() + ttl)
+        return True
+
+    async def exists(self, *keys):
+        return sum(self._live(k) is not None for k in keys)
+
+    async def eval(self, script, numkeys, *args):
+        # the only script the services run is a compare-and-delete lock release
+        key, token = args
+        if self._live(key) == token:
+            return await self.delete(key)
+        return 0
+
+
+@pytest.fixture
+def redis() -> FakeRedis:
+    return FakeRedis()
+
+
+@pytest.fixture
+async def api(session_factory, redis, channel):
+    """an http client on the app, logged in as the channel's owner, with the app's db
+    sessions coming from the test database and its redis from the fake."""
+    from app.main import app
+
+    async def test_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = test_db
+    app.state.redis = redis
+    # the session cookie the way starlette's SessionMiddleware signs one
+    data = b64encode(json.dumps({"user_id": str(channel.user_id)}).encode())
+    cookie = TimestampSigner(str(settings.secret_key)).sign(data).decode()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", cookies={"session": cookie}) as client:
+        yield client
+    app.dependency_overrides.pop(get_db, None)
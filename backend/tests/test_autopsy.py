@@ -0,0 +1,38 @@
+from app.models.stats import VideoMetrics
+from app.services import autopsy
+
+
+async def test_unchanged_state_is_not_written_back(db, channel, add_videos, redis, monkeypatch):
+    videos = await add_videos([f"vid{i}" for i in range(12)])
+    for i, v in enumerate(videos.values()):
+        v.duration_seconds = 600
+        db.add(VideoMetrics(
+            video_id=v.id, channel_id=channel.id, view_count=100 * (i + 1), like_count=i, comment_count=i,
+            views_per_day=float(10 * (i + 1)),
+        ))
+    await db.commit()
+
+    writes = []
+    set_ = redis.set
+
+    async def counting_set(key, value, **kwargs):
+        writes.append(key)
+        return await set_(key, value, **kwargs)
+
+    monkeypatch.setattr(redis, "set", counting_set)
+    state_key = f"autopsy-state:{channel.id}:100:10:views"
+
+    first = await autopsy.build_autopsy(db, redis, channel.id, 100, 10, "views")
+    assert writes == [state_key]
+
+    # nothing moved since — the stored state is reused as-is and not rewritten
+    writes.clear()
+    assert await autopsy.build_autopsy(db, redis, channel.id, 100, 10, "views") == first
+    assert writes == []
+
+    # one video's numbers move without shifting any tier — the delta is applied and saved
+    metrics = await db.get(VideoMetrics, videos["vid5"].id)
+    metrics.like_count = 40
+    await db.commit()
+    await autopsy.build_autopsy(db, redis, channel.id, 100, 10, "views")
+    assert writes == [state_key]
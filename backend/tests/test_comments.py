@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.models.videos import VideoComment
+from app.services import comments
+
+
+def _comment(i: int, likes: int = 0) -> dict:
+    return {
+        "youtube_comment_id": f"c{i}",
+        "parent_youtube_id": None,
+        "author_name": f"author {i}",
+        "author_image_url": None,
+        "author_channel_url": None,
+        "author_channel_id": None,
+        "text": f"comment {i}",
+        "like_count": likes,
+        "reply_count": 0,
+        "is_reply": False,
+        "published_at": "2026-10-01T00:00:00Z",
+        "updated_at_youtube": "2026-10-01T00:00:00Z",
+    }
+
+
+async def test_apply_diff_past_the_bind_parameter_limit(db, add_videos):
+    # 5k comments × 14 columns is well past asyncpg's 32767 parameters in one statement
+    video = (await add_videos(["vid1"]))["vid1"]
+    raw = [_comment(i) for i in range(5_000)]
+    assert await comments._apply_diff(db, video.id, raw) == 5_000
+
+    # unchanged rows aren't rewritten; the ones youtube stopped returning are dropped
+    kept = raw[:4_000]
+    kept[0] = _comment(0, likes=3)
+    assert await comments._apply_diff(db, video.id, kept) == 1
+    count = (await db.execute(select(func.count()).select_from(VideoComment))).scalar_one()
+    assert count == 4_000
+
+
+async def test_lock_release_leaves_someone_elses_lock(redis, monkeypatch):
+    # the refresh outlives LOCK_TTL mid-fetch and another worker takes the lock
+    video_id = "00000000-0000-0000-0000-000000000001"
+
+    async def slow_fetch(access_token, refresh_token, youtube_video_id):
+        redis.data.pop(comments._lock_key(video_id))
+        await redis.set(comments._lock_key(video_id), "their-token", ex=comments.LOCK_TTL)
+        raise RuntimeError("quota")
+
+    monkeypatch.setattr(comments.yt, "get_video_comments", slow_fetch)
+    with pytest.raises(RuntimeError):
+        await comments.refresh_comments(redis, video_id, "vid1", "a", "r")
+    assert await redis.get(comments._lock_key(video_id)) == "their-token"
+
+
+async def test_failed_or_partial_fetch_keeps_what_is_stored(db, session_factory, redis, add_videos, monkeypatch):
+    monkeypatch.setattr(comments, "AsyncSessionLocal", session_factory)
+    video = (await add_videos(["vid1"]))["vid1"]
+    await comments._apply_diff(db, video.id, [_comment(i) for i in range(3)])
+
+    async def api_down(access_token, refresh_token, youtube_video_id):
+        raise RuntimeError("backend error")
+
+    # the listing failed — nothing is deleted and the video isn't marked fresh
+    monkeypatch.setattr(comments.yt, "get_video_comments", api_down)
+    with pytest.raises(RuntimeError):
+        await comments.refresh_comments(redis, video.id, "vid1", "a", "r")
+    assert len(await comments.cached_comments(db, video.id)) == 3
+    assert not await comments.is_fresh(redis, video.id)
+
+    async def partial(access_token, refresh_token, youtube_video_id):
+        return [_comment(0), _comment(9)], False
+
+    # some reply pages failed — what came back is added, nothing is dropped, still stale
+    monkeypatch.setattr(comments.yt, "get_video_comments", partial)
+    assert await comments.refresh_comments(redis, video.id, "vid1", "a", "r")
+    ids = {c.youtube_comment_id for c in await comments.cached_comments(db, video.id)}
+    assert ids == {"c0", "c1", "c2", "c9"}
+    assert not await comments.is_fresh(redis, video.id)
@@ -0,0 +1,120 @@
+from datetime import date
+
+import httpx
+from sqlalchemy import select
+
+from app.models.stats import ProcessedReport, VideoDailyAnalytics
+from app.services import sync
+from app.services import youtube as yt
+
+REPORTS = [
+    {"id": "d-1", "createTime": "2026-10-01T00:00:00Z", "downloadUrl": "https://reports/d-1"},
+    {"id": "d-2", "createTime": "2026-10-02T00:00:00Z", "downloadUrl": "https://reports/d-2"},
+]
+CSV = {
+    # two rows for the same video-day (country split) — summed
+    "https://reports/d-1": [
+        {"video_id": "vid1", "date": "20260930", "views": "10", "watch_time_minutes": "1.5"},
+        {"video_id": "vid1", "date": "20260930", "views": "5", "watch_time_minutes": "0.5"},
+    ],
+    "https://reports/d-2": [
+        {"video_id": "vid1", "date": "20261001", "views": "7", "watch_time_minutes": "2"},
+        {"video_id": "vid1", "date": "20261001", "views": "3", "watch_time_minutes": "1"},
+    ],
+}
+
+
+def _fake_reporting(monkeypatch, fail_after: dict[str, int]):
+    """fail_after: url → rows yielded before the download dies."""
+
+    async def ensure_report_job(access_token, refresh_token, report_type, name):
+        return "daily-job"
+
+    async def list_reports(access_token, refresh_token, job_id):
+        return REPORTS, "token"
+
+    async def stream_report_rows(client, url, token):
+        for i, row in enumerate(CSV[url]):
+            if fail_after.get(url) == i:
+                raise httpx.RemoteProtocolError("connection dropped")
+            yield row
+
+    monkeypatch.setattr(yt, "ensure_report_job", ensure_report_job)
+    monkeypatch.setattr(yt, "list_reports", list_reports)
+    monkeypatch.setattr(yt, "stream_report_rows", stream_report_rows)
+
+
+async def _ingest(db, channel, yt_to_db) -> int:
+    # the sync commits once at the end — do the same here
+    saved = await sync._ingest_daily_report(
+        db, "a", "r", channel, yt_to_db, yt.BASIC_REPORT_TYPE, sync.BASIC_REPORT_COLUMNS
+    )
+    await db.commit()
+    return saved
+
+
+async def test_partial_download_writes_nothing_and_is_retried(db, channel, add_videos, monkeypatch):
+    videos = await add_videos(["vid1"])
+    yt_to_db = {"vid1": videos["vid1"].id}
+
+    # the older report dies after its first row — none of it may land, and it
+    # mustn't be recorded, even though the newer report goes through
+    _fake_reporting(monkeypatch, fail_after={"https://reports/d-1": 1})
+    assert await _ingest(db, channel, yt_to_db) == 1
+
+    ledger = set((await db.execute(select(ProcessedReport.report_id))).scalars())
+    assert ledger == {"d-2"}
+    rows = {r.date: r.views for r in (await db.execute(select(VideoDailyAnalytics))).scalars()}
+    assert rows == {date(2026, 10, 1): 10}
+
+    # next sync picks up the day the failed report covered, in full
+    _fake_reporting(monkeypatch, fail_after={})
+    assert await _ingest(db, channel, yt_to_db) == 1
+
+    ledger = set((await db.execute(select(ProcessedReport.report_id))).scalars())
+    assert ledger == {"d-1", "d-2"}
+    db.expire_all()
+    rows = {
+        r.date: (r.views, r.watch_time_minutes) for r in (await db.execute(select(VideoDailyAnalytics))).scalars()
+    }
+    assert rows == {date(2026, 9, 30): (15, 2.0), date(2026, 10, 1): (10, 3.0)}
+
+    # and once everything's in the ledger nothing is downloaded again
+    assert await _ingest(db, channel, yt_to_db) == 0
+
+
+async def test_reports_are_left_to_the_sync_commit(db, channel, add_videos, monkeypatch):
+    videos = await add_videos(["vid1"])
+    _fake_reporting(monkeypatch, fail_after={})
+    await sync._ingest_daily_report(
+        db, "a", "r", channel, {"vid1": videos["vid1"].id}, yt.BASIC_REPORT_TYPE, sync.BASIC_REPORT_COLUMNS
+    )
+
+    # a later step blowing up rolls the sync back — reports and ledger with it
+    await db.rollback()
+    assert (await db.execute(select(ProcessedReport))).first() is None
+    assert (await db.execute(select(VideoDailyAnalytics))).first() is None
+
+
+async def test_revenue_report_is_picked_by_its_type_id(db, channel, add_videos, monkeypatch):
+    ingested = []
+
+    async def ingest(db, access_token, refresh_token, channel, yt_to_db, report_type, columns):
+        ingested.append(report_type)
+        return 0
+
+    async def list_report_types(access_token, refresh_token):
+        return offered
+
+    monkeypatch.setattr(sync, "_ingest_daily_report", ingest)
+    monkeypatch.setattr(yt, "list_report_types", list_report_types)
+
+    # a look-alike isn't mistaken for the revenue report
+    offered = [yt.BASIC_REPORT_TYPE, "channel_revenue_summary_a1"]
+    await sync._sync_video_daily_reports(db, "a", "r", channel, {})
+    assert ingested == [yt.BASIC_REPORT_TYPE]
+
+    ingested.clear()
+    offered = [yt.BASIC_REPORT_TYPE, yt.REVENUE_REPORT_TYPE]
+    await sync._sync_video_daily_reports(db, "a", "r", channel, {})
+    assert ingested == [yt.BASIC_REPORT_TYPE, yt.REVENUE_REPORT_TYPE]
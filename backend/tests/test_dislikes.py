@@ -0,0 +1,118 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import select
+
+from app.config import settings
+from app.models.stats import VideoDislikes
+from app.services import dislikes
+
+
+class StandIn:
+    """what the return youtube dislike api saw: every id asked for, and the most
+    requests it was ever serving at once."""
+
+    def __init__(self):
+        self.calls: list[str] = []
+        self.failing: set[str] = set()
+        self.delay = 0.0
+        self.in_flight = 0
+        self.peak = 0
+
+
+@pytest.fixture
+async def ryd(monkeypatch):
+    """a stand-in ryd api on a local port, with settings.ryd_api_url pointed at it."""
+    state = StandIn()
+    api = FastAPI()
+
+    @api.get("/votes")
+    async def votes(videoId: str):  # noqa: N803 — the real api's parameter name
+        state.calls.append(videoId)
+        state.in_flight += 1
+        state.peak = max(state.peak, state.in_flight)
+        try:
+            await asyncio.sleep(state.delay)
+        finally:
+            state.in_flight -= 1
+        if videoId in state.failing:
+            raise HTTPException(status_code=404)
+        return {"id": videoId, "likes": 100, "dislikes": len(videoId)}
+
+    server = uvicorn.Server(uvicorn.Config(api, host="127.0.0.1", port=0, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    monkeypatch.setattr(settings, "ryd_api_url", f"http://127.0.0.1:{port}")
+
+    yield state
+
+    server.should_exit = True
+    await task
+
+
+async def test_redis_then_db_then_api(ryd, redis, db):
+    await redis.set("dislikes:in-redis", "5")
+    db.add(VideoDislikes(youtube_video_id="in-db", dislikes=7, likes=70))
+    await db.commit()
+
+    async with dislikes.new_client() as client:
+        found = await dislikes.get_dislikes(redis, db, client, ["in-redis", "in-db", "from-api"])
+
+    assert found == {"in-redis": 5, "in-db": 7, "from-api": len("from-api")}
+    assert ryd.calls == ["from-api"]
+    # both lookups that missed redis are written back with the long ttl
+    assert await redis.get("dislikes:in-db") == "7"
+    assert await redis.get("dislikes:from-api") == str(len("from-api"))
+    assert redis.ttl_of("dislikes:from-api") > dislikes.NEGATIVE_TTL
+    # and the api answer is kept in postgres for everyone else
+    stored = (await db.execute(select(VideoDislikes.dislikes).where(VideoDislikes.youtube_video_id == "from-api")))
+    assert stored.scalar_one() == len("from-api")
+
+
+async def test_failed_ids_are_negatively_cached(ryd, redis, db):
+    ryd.failing = {"broken"}
+
+    async with dislikes.new_client() as client:
+        assert await dislikes.get_dislikes(redis, db, client, ["broken"]) == {"broken": None}
+        # asked again within NEGATIVE_TTL — answered from redis, the api isn't bothered
+        assert await dislikes.get_dislikes(redis, db, client, ["broken"]) == {"broken": None}
+
+    assert ryd.calls == ["broken"]
+    assert await redis.get("dislikes:broken") == dislikes.NEGATIVE
+    assert redis.ttl_of("dislikes:broken") <= dislikes.NEGATIVE_TTL
+    assert (await db.execute(select(VideoDislikes))).first() is None
+
+
+async def test_concurrency_is_capped(ryd, monkeypatch):
+    monkeypatch.setattr(settings, "ryd_max_concurrency", 3)
+    ryd.delay = 0.05
+    ids = [f"vid{i}" for i in range(12)]
+
+    async with dislikes.new_client() as client:
+        votes = await dislikes.fetch_votes(client, ids)
+
+    assert set(votes) == set(ids) and all(votes.values())
+    assert ryd.peak == 3
+
+
+async def test_prefetch_only_refreshes_missing_and_stale(ryd, db, session_factory, add_videos, channel, monkeypatch):
+    monkeypatch.setattr(dislikes, "AsyncSessionLocal", session_factory)
+    await add_videos(["missing", "stale", "fresh"])
+    now = datetime.now(UTC)
+    db.add_all([
+        VideoDislikes(youtube_video_id="stale", dislikes=1, likes=1, fetched_at=now - timedelta(days=2)),
+        VideoDislikes(youtube_video_id="fresh", dislikes=1, likes=1, fetched_at=now - timedelta(hours=1)),
+    ])
+    await db.commit()
+
+    await dislikes.prefetch_channel_dislikes(channel.id)
+
+    assert sorted(ryd.calls) == ["missing", "stale"]
+    db.expire_all()
+    stored = dict((await db.execute(select(VideoDislikes.youtube_video_id, VideoDislikes.dislikes))).all())
+    assert stored == {"missing": len("missing"), "stale": len("stale"), "fresh": 1}
@@ -0,0 +1,47 @@
+import uuid
+from datetime import UTC, datetime
+
+import pytest
+
+from app.models.stats import VideoMetrics
+from app.models.videos import Video
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_after
+
+ROW = uuid.uuid4()
+FILTERS = {"is_short": False, "published_after": datetime(2026, 1, 1, tzinfo=UTC)}
+
+
+def test_cursor_round_trips():
+    published = datetime(2026, 10, 1, 12, tzinfo=UTC)
+    cursor = encode_cursor(published, ROW, "published_at", "desc", FILTERS)
+    assert decode_cursor(cursor, "published_at", "desc", dict(FILTERS)) == (published, ROW)
+
+
+@pytest.mark.parametrize(
+    ("sort_by", "order", "filters"),
+    [
+        ("views", "desc", FILTERS),  # different sort — a datetime key against a count
+        ("published_at", "asc", FILTERS),
+        ("published_at", "desc", {**FILTERS, "is_short": True}),
+        ("published_at", "desc", {}),
+    ],
+)
+def test_cursor_from_another_list_is_rejected(sort_by, order, filters):
+    cursor = encode_cursor(datetime(2026, 10, 1, tzinfo=UTC), ROW, "published_at", "desc", FILTERS)
+    with pytest.raises(ValueError, match="different sort or filters"):
+        decode_cursor(cursor, sort_by, order, filters)
+
+
+def test_doctored_key_type_is_a_value_error():
+    # scope matches, but the key is a string where the column holds floats
+    cursor = encode_cursor("lots", ROW, "views_per_day", "desc", {})
+    with pytest.raises(ValueError, match="invalid cursor"):
+        keyset_after(VideoMetrics.views_per_day, Video.id, cursor, "views_per_day", "desc", {})
+    # ints are fine against a float column
+    cursor = encode_cursor(3, ROW, "views_per_day", "desc", {})
+    keyset_after(VideoMetrics.views_per_day, Video.id, cursor, "views_per_day", "desc", {})
+
+
+def test_garbage_is_a_value_error():
+    with pytest.raises(ValueError, match="invalid cursor"):
+        decode_cursor("not-a-cursor", "views", "desc", {})
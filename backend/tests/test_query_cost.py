@@ -0,0 +1,27 @@
+from graphql import parse
+
+from app.graphql.extensions import STATS_HISTORY_ESTIMATE, query_cost
+
+
+def _cost(query: str, variables: dict | None = None) -> int:
+    operation = parse(query).definitions[0]
+    return query_cost(operation.selection_set, {}, variables or {})
+
+
+def test_history_is_costed_by_rows_read_not_points_returned():
+    # maxPoints only shrinks the response — every snapshot in range is still read
+    few = _cost('{ video(id: "1") { statsHistory(maxPoints: 3) { viewCount } } }')
+    many = _cost('{ video(id: "1") { statsHistory(maxPoints: 5000) { viewCount } } }')
+    assert few == many == 1 + STATS_HISTORY_ESTIMATE
+
+
+def test_bounded_history_is_costed_by_its_span():
+    # ten days of 6-hourly snapshots, per video on the page
+    query = """
+    query($from: DateTime!) {
+      videos(channelId: "c", perPage: 20) {
+        items { statsHistory(from: $from, to: "2026-10-11T00:00:00+00:00") { viewCount } }
+      }
+    }
+    """
+    assert _cost(query, {"from": "2026-10-01T00:00:00+00:00"}) == 20 + 20 + 20 * 41
@@ -0,0 +1,66 @@
+from datetime import date
+
+import httpx
+from sqlalchemy import select
+
+from app.models.stats import ProcessedReport, VideoDailyReach
+from app.services import sync
+from app.services import youtube as yt
+
+REPORTS = [
+    {"id": "r-old", "createTime": "2026-10-01T00:00:00Z", "downloadUrl": "https://reports/r-old"},
+    {"id": "r-new", "createTime": "2026-10-02T00:00:00Z", "downloadUrl": "https://reports/r-new"},
+]
+CSV = {
+    "https://reports/r-old": [{"video_id": "vid1", "date": "20260930", "video_thumbnail_impressions": "100",
+                               "video_thumbnail_impressions_ctr": "0.1"}],
+    "https://reports/r-new": [{"video_id": "vid1", "date": "20261001", "video_thumbnail_impressions": "200",
+                               "video_thumbnail_impressions_ctr": "0.05"}],
+}
+
+
+def _fake_reporting(monkeypatch, failing: set[str], downloaded: list[str]):
+    async def ensure_reach_job(access_token, refresh_token):
+        return "job-1"
+
+    async def list_reports(access_token, refresh_token, job_id):
+        return REPORTS, "token"
+
+    async def stream_report_rows(client, url, token):
+        downloaded.append(url)
+        if url in failing:
+            raise httpx.ReadTimeout("timed out")
+        for row in CSV[url]:
+            yield row
+
+    monkeypatch.setattr(yt, "ensure_reach_job", ensure_reach_job)
+    monkeypatch.setattr(yt, "list_reports", list_reports)
+    monkeypatch.setattr(yt, "stream_report_rows", stream_report_rows)
+
+
+async def test_failed_reach_download_is_retried_next_sync(db, channel, add_videos, monkeypatch):
+    videos = await add_videos(["vid1"])
+    yt_to_db = {"vid1": videos["vid1"].id}
+
+    # first sync: the older report fails, the newer one goes through
+    downloaded = []
+    _fake_reporting(monkeypatch, failing={"https://reports/r-old"}, downloaded=downloaded)
+    await sync._sync_reach_reports(db, "a", "r", channel, yt_to_db, date(2026, 10, 2))
+    await db.commit()
+
+    ledger = set((await db.execute(select(ProcessedReport.report_id))).scalars())
+    assert ledger == {"r-new"}
+    days = set((await db.execute(select(VideoDailyReach.date))).scalars())
+    assert days == {date(2026, 10, 1)}
+
+    # second sync: only the failed one is downloaded again, and its day lands
+    downloaded = []
+    _fake_reporting(monkeypatch, failing=set(), downloaded=downloaded)
+    await sync._sync_reach_reports(db, "a", "r", channel, yt_to_db, date(2026, 10, 3))
+    await db.commit()
+
+    assert downloaded == ["https://reports/r-old"]
+    ledger = set((await db.execute(select(ProcessedReport.report_id))).scalars())
+    assert ledger == {"r-old", "r-new"}
+    rows = {r.date: r.impressions for r in (await db.execute(select(VideoDailyReach))).scalars()}
+    assert rows == {date(2026, 9, 30): 100, date(2026, 10, 1): 200}
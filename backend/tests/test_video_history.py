@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import select
+
+from app.models.stats import VideoDailyAnalytics
+from app.services import video_history
+from app.services import youtube as yt
+
+
+def _fake_history(monkeypatch, rows: list[dict], calls: list[str]):
+    async def get_video_daily_history(access_token, refresh_token, youtube_video_id, start_date):
+        calls.append(start_date)
+        return rows
+
+    monkeypatch.setattr(yt, "get_video_daily_history", get_video_daily_history)
+
+
+async def test_empty_top_up_still_throttles(db, redis, add_videos, monkeypatch):
+    video = (await add_videos(["vid1"]))["vid1"]
+    calls = []
+    _fake_history(monkeypatch, [], calls)
+
+    # nothing comes back, so no row's fetched_at moves — the second open within
+    # REFRESH_INTERVAL must still not go back to the api
+    await video_history.refresh_video_history(db, redis, video, "a", "r")
+    await video_history.refresh_video_history(db, redis, video, "a", "r")
+
+    assert len(calls) == 1
+    assert (await db.execute(select(VideoDailyAnalytics))).first() is None
+    assert redis.ttl_of(f"video-history-attempt:{video.id}") > 0
+
+    # once the marker lapses it's asked again
+    await redis.delete(f"video-history-attempt:{video.id}")
+    await video_history.refresh_video_history(db, redis, video, "a", "r")
+    assert len(calls) == 2
+
+
+async def test_failed_top_up_is_retried(db, redis, add_videos, monkeypatch):
+    video = (await add_videos(["vid1"]))["vid1"]
+
+    async def broken(*args):
+        raise RuntimeError("quota exceeded")
+
+    monkeypatch.setattr(yt, "get_video_daily_history", broken)
+    with pytest.raises(RuntimeError):
+        await video_history.refresh_video_history(db, redis, video, "a", "r")
+
+    calls = []
+    day = video.published_at.date().isoformat()
+    _fake_history(monkeypatch, [{"day": day, "views": 5, "likes": 1, "comments": 0}], calls)
+    await video_history.refresh_video_history(db, redis, video, "a", "r")
+
+    assert len(calls) == 1
+    assert await video_history.stored_video_history(db, video) == [
+        {"day": day, "views": 5, "likes": 1, "comments": 0}
+    ]
@@ -0,0 +1,133 @@
+from datetime import UTC, date, datetime, timedelta
+
+import pytest
+
+from app.models.stats import VideoAnalytics, VideoMetrics, VideoStats
+
+# (views, revenue) per video — ties on views and missing revenue on purpose
+SEED = [(500, 12.5), (100, None), (500, 3.0), (900, None), (100, 7.25), (300, 12.5), (50, 0.0)]
+
+
+@pytest.fixture
+async def seeded(db, channel, add_videos):
+    videos = list((await add_videos([f"vid{i}" for i in range(len(SEED))])).values())
+    now = datetime.now(UTC)
+    for v, (views, revenue) in zip(videos, SEED):
+        db.add_all([
+            # an older snapshot + analytics row the page must not pick
+            VideoStats(video_id=v.id, view_count=1, like_count=0, comment_count=0, fetched_at=now - timedelta(days=1)),
+            VideoStats(video_id=v.id, view_count=views, like_count=views // 10, comment_count=1, fetched_at=now),
+            VideoAnalytics(video_id=v.id, date=date.today() - timedelta(days=1), estimated_revenue=-1.0),
+            VideoAnalytics(video_id=v.id, date=date.today(), estimated_revenue=revenue),
+            VideoMetrics(
+                video_id=v.id, channel_id=channel.id, view_count=views, like_count=views // 10, comment_count=1,
+                views_per_day=float(views), estimated_revenue=revenue,
+            ),
+        ])
+    await db.commit()
+    return videos
+
+
+def _expected(videos, key, order: str) -> list[str]:
+    """the order the list promises — nulls last both ways, id breaking ties."""
+    rows = [(key(i), str(v.id)) for i, v in enumerate(videos)]
+    present = sorted((r for r in rows if r[0] is not None), reverse=order == "desc")
+    missing = sorted((r for r in rows if r[0] is None), reverse=order == "desc")
+    return [vid for _, vid in present + missing]
+
+
+async def _walk(api, channel, **params) -> list[dict]:
+    seen, cursor = [], None
+    while True:
+        query = {"channel_id": str(channel.id), "per_page": 2, **params}
+        if cursor:
+            query["cursor"] = cursor
+        body = (await api.get("/api/v1/videos", params=query)).json()
+        seen += body["videos"]
+        cursor = body["next_cursor"]
+        if not cursor:
+            return seen
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize(("sort_by", "index"), [("views", 0), ("revenue", 1)])
+async def test_cursor_walk_covers_the_channel_in_order(api, channel, seeded, sort_by, index, order):
+    seen = await _walk(api, channel, sort_by=sort_by, order=order)
+    assert [v["id"] for v in seen] == _expected(seeded, lambda i: SEED[i][index], order)
+
+
+async def test_page_carries_the_latest_stats_and_analytics(api, channel, seeded):
+    seen = await _walk(api, channel, sort_by="views", order="desc")
+    by_id = {v["id"]: v for v in seen}
+    for v, (views, revenue) in zip(seeded, SEED):
+        assert by_id[str(v.id)]["view_count"] == views
+        assert by_id[str(v.id)]["estimated_revenue"] == revenue
+
+
+async def test_cursor_from_another_sort_is_a_400(api, channel, seeded):
+    first = (await api.get("/api/v1/videos", params={"channel_id": str(channel.id), "per_page": 2})).json()
+    resp = await api.get(
+        "/api/v1/videos",
+        params={"channel_id": str(channel.id), "per_page": 2, "sort_by": "views", "cursor": first["next_cursor"]},
+    )
+    assert resp.status_code == 400
+
+
+async def test_graphql_walk_matches(api, channel, seeded):
+    query = """
+    query($channelId: ID!, $after: String) {
+      videos(channelId: $channelId, sortBy: "views", order: "desc", perPage: 3, after: $after) {
+        nextCursor
+        items { id latestStats { viewCount } }
+      }
+    }
+    """
+    seen, after = [], None
+    while True:
+        resp = await api.post("/graphql", json={"query": query, "variables": {"channelId": str(channel.id), "after": after}})
+        page = resp.json()["data"]["videos"]
+        seen += page["items"]
+        after = page["nextCursor"]
+        if not after:
+            break
+    assert [v["id"] for v in seen] == _expected(seeded, lambda i: SEED[i][0], "desc")
+    assert [v["latestStats"]["viewCount"] for v in seen] == sorted((views for views, _ in SEED), reverse=True)
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+async def test_video_without_metrics_still_lists(api, channel, seeded, add_videos, order):
+    # synced, but its metrics step hasn't run (or failed) — it has no video_metrics row
+    fresh = (await add_videos(["fresh"]))["fresh"]
+
+    seen = await _walk(api, channel, sort_by="views", order=order, total="exact")
+    # a missing metrics row sorts with the nulls, after every video that has one
+    assert [v["id"] for v in seen] == _expected(seeded, lambda i: SEED[i][0], order) + [str(fresh.id)]
+    assert seen[-1]["view_count"] is None
+
+    first = (await api.get("/api/v1/videos", params={"channel_id": str(channel.id)})).json()
+    assert first["total"] == len(SEED) + 1
+
+    query = """
+    query($channelId: ID!) { videos(channelId: $channelId, sortBy: "views", perPage: 100) { total items { id } } }
+    """
+    resp = await api.post("/graphql", json={"query": query, "variables": {"channelId": str(channel.id)}})
+    page = resp.json()["data"]["videos"]
+    assert page["total"] == len(SEED) + 1
+    assert str(fresh.id) in {v["id"] for v in page["items"]}
+
+
+async def test_rest_cursor_continues_in_graphql(api, channel, seeded):
+    # one sort map for both — a revenue sort exists in each, and a cursor from one
+    # picks up where it left off in the other
+    first = (
+        await api.get("/api/v1/videos", params={"channel_id": str(channel.id), "per_page": 3, "sort_by": "revenue"})
+    ).json()
+    query = """
+    query($channelId: ID!, $after: String) {
+      videos(channelId: $channelId, sortBy: "revenue", order: "desc", perPage: 100, after: $after) { items { id } }
+    }
+    """
+    variables = {"channelId": str(channel.id), "after": first["next_cursor"]}
+    resp = (await api.post("/graphql", json={"query": query, "variables": variables})).json()
+    rest = [v["id"] for v in resp["data"]["videos"]["items"]]
+    assert [v["id"] for v in first["videos"]] + rest == _expected(seeded, lambda i: SEED[i][1], "desc")